@@ -79,5 +79,11 @@ def download_document(self, document):
 
         return self.browser.open(document.url).content
 
+    def download_document_stream(self, document):
+        if not isinstance(document, Document):
+            document = self.get_document(document)
+
+        return self.browser.iter_download(document.url)
+
     def get_profile(self):
         return self.browser.get_profile()
@@ -73,3 +73,8 @@ def download_document(self, bill):
         if not isinstance(bill, Bill):
             bill = self.get_document(bill)
         return self.browser.open(bill.url).content
+
+    def download_document_stream(self, bill):
+        if not isinstance(bill, Bill):
+            bill = self.get_document(bill)
+        return self.browser.iter_download(bill.url)
@@ -176,6 +176,14 @@ def download_document(self, document):
 
         return self.browser.open(document.url).content
 
+    def download_document_stream(self, document):
+        if not isinstance(document, Document):
+            document = self.get_document(document)
+        if empty(document.url):
+            return iter(())
+
+        return self.browser.iter_download(document.url)
+
     def iter_resources(self, objs, split_path):
         if Account in objs:
             self._restrict_level(split_path)
@@ -66,6 +66,14 @@ def download_document(self, document):
             return
         return self.browser.open(document.url).content
 
+    def download_document_stream(self, document):
+        if not isinstance(document, Document):
+            document = self.get_document(document)
+
+        if document.url is NotAvailable:
+            return iter(())
+        return self.browser.iter_download(document.url)
+
     def get_document(self, _id):
         subscription_id = _id.split("_")[0]
         subscription = self.get_subscription(subscription_id)
@@ -1,9 +1,15 @@
+from http.server import BaseHTTPRequestHandler
+import logging
+from time import monotonic
 from unittest import TestCase
 
+import pytest
 import requests
+from urllib3.exceptions import ConnectTimeoutError
 
 from woob.browser import Browser
-from woob.browser.adapters import LowSecHTTPAdapter
+from woob.browser.adapters import LowSecHTTPAdapter, RetryPolicy
+from woob.browser.exceptions import ServerError
 
 
 class TestAdapter(TestCase):
@@ -26,3 +32,130 @@ class PermissiveBrowser(Browser):
 
         # change of ciphers is contextual, does not affect previous browser.
         self.assertRaises(requests.exceptions.SSLError, browser.open, 'https://dh1024.badssl.com/')
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self):
+        self.server.calls.append(self.command)
+        length = int(self.headers.get('Content-Length', 0))
+        if length:
+            self.rfile.read(length)
+
+        if len(self.server.calls) <= self.server.failures:
+            self.send_response(503)
+            for name, value in self.server.error_headers.items():
+                self.send_header(name, value)
+            body = b'unavailable'
+        else:
+            self.send_response(200)
+            body = b'ok'
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def flaky_server(http_server):
+    server = http_server(FlakyHandler, calls=[], failures=2, error_headers={})
+    server.url += '/'
+    return server
+
+
+def retry_browser(policy):
+    class RetryBrowser(Browser):
+        RETRY_POLICY = policy
+
+    return RetryBrowser()
+
+
+def test_retry_policy(flaky_server, caplog):
+    browser = retry_browser(RetryPolicy(backoff_factor=0.01, backoff_jitter=0))
+
+    with caplog.at_level(logging.INFO):
+        assert browser.open(flaky_server.url).text == 'ok'
+
+    assert flaky_server.calls == ['GET'] * 3
+    assert [record.getMessage().split(' after ')[0] for record in caplog.records] == [
+        'Retrying (1/3) GET %s' % flaky_server.url,
+        'Retrying (2/3) GET %s' % flaky_server.url,
+    ]
+
+
+def test_retry_policy_exhausted(flaky_server):
+    browser = retry_browser(RetryPolicy(total=1, backoff_factor=0.01))
+
+    # the last error response is handled by the browser as usual
+    with pytest.raises(ServerError):
+        browser.open(flaky_server.url)
+    assert len(flaky_server.calls) == 2
+
+
+def test_retry_policy_idempotent_methods(flaky_server):
+    browser = retry_browser(RetryPolicy(backoff_factor=0.01))
+
+    with pytest.raises(ServerError):
+        browser.open(flaky_server.url, data={'a': 1})
+    assert flaky_server.calls == ['POST']
+
+
+def test_retry_policy_deadline(flaky_server):
+    flaky_server.error_headers = {'Retry-After': '30'}
+    browser = retry_browser(RetryPolicy(backoff_factor=0.01, deadline=5))
+
+    with pytest.raises(ServerError):
+        browser.open(flaky_server.url)
+    assert len(flaky_server.calls) == 1
+
+
+def test_retry_policy_deadline_status(flaky_server):
+    flaky_server.failures = 5
+    policy = RetryPolicy(total=5, backoff_factor=0.2, backoff_jitter=0, deadline=0.3)
+
+    # the error response is returned when the deadline is exceeded
+    with pytest.raises(ServerError):
+        retry_browser(policy).open(flaky_server.url)
+    assert len(flaky_server.calls) == 2
+
+    flaky_server.calls.clear()
+    with pytest.raises(requests.exceptions.RetryError):
+        retry_browser(policy.new(raise_on_status=True)).open(flaky_server.url)
+    assert len(flaky_server.calls) == 2
+
+
+def test_retry_policy_deadline_reached():
+    policy = RetryPolicy(deadline=5, started=monotonic() - 10)
+
+    # no retry is counted once the deadline is reached
+    assert not policy.is_retry('GET', 503)
+    assert policy.new(raise_on_status=True).is_retry('GET', 503)
+    assert policy.new(deadline=None).is_retry('GET', 503)
+
+
+def test_retry_policy_backoff_jitter():
+    policy = RetryPolicy(backoff_factor=1, backoff_jitter=0.5)
+    for _ in range(2):
+        policy = policy.increment('GET', '/', error=ConnectTimeoutError())
+
+    assert policy.backoff_jitter == 0.5
+    backoffs = {policy.get_backoff_time() for _ in range(20)}
+    assert all(2 <= backoff <= 2.5 for backoff in backoffs)
+    assert len(backoffs) > 1
+
+    assert policy.new(backoff_jitter=0).get_backoff_time() == 2
+
+
+def test_retry_policy_retry_after(flaky_server):
+    flaky_server.failures = 1
+    flaky_server.error_headers = {'Retry-After': '1'}
+    browser = retry_browser(RetryPolicy(backoff_factor=0.01, backoff_jitter=0))
+
+    start = monotonic()
+    assert browser.open(flaky_server.url).text == 'ok'
+    assert monotonic() - start >= 1
@@ -1,10 +1,17 @@
+from hashlib import md5, sha256
+from http.server import BaseHTTPRequestHandler
+from io import BytesIO
+import os
+import re
 import sys
 import ssl
+
 import pytest
 
 import requests
 
 from woob.browser import Browser
+from woob.browser.exceptions import ChecksumMismatch
 
 
 @pytest.fixture(scope="function")
@@ -67,3 +74,108 @@ class BrowserVerifyPath(NoRetryBrowser):
 
         r = BrowserVerifyPath().open('https://self-signed.badssl.com/')
         assert r.status_code == 200
+
+
+CONTENT = bytes(range(256)) * 64
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.ranges.append(self.headers.get('Range'))
+        start = 0
+        m = re.match(r'bytes=(\d+)-$', self.headers.get('Range') or '')
+        if m and self.server.accept_ranges and int(m.group(1)) >= len(CONTENT):
+            self.send_response(416)
+            self.send_header('Content-Range', 'bytes */%d' % len(CONTENT))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if m and self.server.accept_ranges:
+            start = int(m.group(1))
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %d-%d/%d' % (start, len(CONTENT) - 1, len(CONTENT)))
+        else:
+            self.send_response(200)
+        body = CONTENT[start:]
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def range_server(http_server):
+    server = http_server(RangeHandler, ranges=[], accept_ranges=True)
+    server.url += '/file'
+    return server
+
+
+class TestDownload:
+    def test_download(self, range_server, tmp_path):
+        dest = str(tmp_path / 'file')
+        progress = []
+
+        Browser().download(
+            range_server.url, dest, chunk_size=4096,
+            checksum='sha256:' + sha256(CONTENT).hexdigest(),
+            progress=lambda done, total: progress.append((done, total)),
+        )
+
+        with open(dest, 'rb') as fp:
+            assert fp.read() == CONTENT
+        assert not os.path.exists(dest + '.part')
+        assert progress == [(4096 * i, len(CONTENT)) for i in range(1, 5)]
+
+    @pytest.mark.parametrize('accept_ranges', (True, False))
+    def test_resume(self, range_server, tmp_path, accept_ranges):
+        range_server.accept_ranges = accept_ranges
+        dest = str(tmp_path / 'file')
+        with open(dest + '.part', 'wb') as fp:
+            fp.write(CONTENT[:1000])
+
+        Browser().download(range_server.url, dest, checksum='md5:' + md5(CONTENT).hexdigest())
+
+        assert range_server.ranges == ['bytes=1000-']
+        with open(dest, 'rb') as fp:
+            assert fp.read() == CONTENT
+
+    @pytest.mark.parametrize('size', (len(CONTENT), len(CONTENT) + 10))
+    def test_resume_complete(self, range_server, tmp_path, size):
+        dest = str(tmp_path / 'file')
+        with open(dest + '.part', 'wb') as fp:
+            fp.write((CONTENT + b'0' * 10)[:size])
+
+        Browser().download(range_server.url, dest, checksum='md5:' + md5(CONTENT).hexdigest())
+
+        # a larger file is downloaded again
+        assert range_server.ranges == ['bytes=%d-' % size] + [None] * (size != len(CONTENT))
+        with open(dest, 'rb') as fp:
+            assert fp.read() == CONTENT
+
+    def test_checksum_mismatch(self, range_server, tmp_path):
+        dest = str(tmp_path / 'file')
+
+        with pytest.raises(ChecksumMismatch):
+            Browser().download(range_server.url, dest, checksum='sha256:1234')
+
+        assert not os.path.exists(dest)
+        assert not os.path.exists(dest + '.part')
+
+    def test_file_object(self, range_server):
+        fp = BytesIO()
+        Browser().download(range_server.url, fp)
+        assert fp.getvalue() == CONTENT
+
+    def test_iter_download(self, range_server):
+        chunks = Browser().iter_download(range_server.url, chunk_size=4096)
+        # nothing is sent before the iteration
+        assert range_server.ranges == []
+
+        chunks = list(chunks)
+        assert [len(chunk) for chunk in chunks] == [4096] * 4
+        assert b''.join(chunks) == CONTENT
+        assert range_server.ranges == [None]
@@ -0,0 +1,136 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+import responses
+
+from woob.browser import PagesBrowser, URL
+from woob.browser.cache import CacheMixin, MemoryCacheStore, SQLiteCacheStore
+from woob.browser.pages import RawPage
+
+
+class CachedPage(RawPage):
+    pass
+
+
+class CachedBrowser(CacheMixin, PagesBrowser):
+    BASEURL = 'https://woob.test'
+
+    cached = URL(r'/page', CachedPage)
+
+    open = CacheMixin.open_with_cache
+
+
+@pytest.fixture()
+def browser():
+    return CachedBrowser()
+
+
+@responses.activate
+def test_max_age(browser):
+    responses.get('https://woob.test/page', body='foo', headers={'Cache-Control': 'max-age=60'})
+
+    for _ in range(3):
+        assert browser.open('https://woob.test/page').text == 'foo'
+
+    assert len(responses.calls) == 1
+    assert browser.cache_stats == {'hits': 2, 'misses': 1}
+
+
+@responses.activate
+def test_no_store(browser):
+    responses.get('https://woob.test/page', body='foo', headers={'Cache-Control': 'no-store', 'ETag': '"1"'})
+
+    browser.open('https://woob.test/page')
+    browser.open('https://woob.test/page')
+
+    assert len(responses.calls) == 2
+    assert len(browser.cache) == 0
+
+
+@responses.activate
+def test_revalidation(browser):
+    responses.get('https://woob.test/page', body='foo', headers={'ETag': '"1"'})
+    responses.get('https://woob.test/page', status=304)
+
+    assert browser.open('https://woob.test/page').text == 'foo'
+    assert browser.open('https://woob.test/page').text == 'foo'
+
+    assert responses.calls[1].request.headers['If-None-Match'] == '"1"'
+    assert browser.cache_stats == {'hits': 1, 'misses': 1, 'revalidations': 1}
+
+
+@responses.activate
+def test_vary(browser):
+    responses.get('https://woob.test/page', body='foo', headers={'Cache-Control': 'max-age=60', 'Vary': 'Accept-Language'})
+
+    browser.open('https://woob.test/page')
+    browser.open('https://woob.test/page')
+    assert len(responses.calls) == 1
+
+    browser.session.headers['Accept-Language'] = 'fr'
+    browser.open('https://woob.test/page')
+    assert len(responses.calls) == 2
+
+
+def test_memory_store_max_size():
+    class FakeEntry:
+        def __init__(self, size):
+            self.size = size
+
+    store = MemoryCacheStore(max_size=100)
+    store['a'] = FakeEntry(40)
+    store['b'] = FakeEntry(40)
+    store.get('a')
+    store['c'] = FakeEntry(40)
+
+    assert 'a' in store
+    assert 'b' not in store
+    assert 'c' in store
+    assert store.size == 80
+
+
+@responses.activate
+def test_sqlite_store(tmp_path):
+    responses.get('https://woob.test/page', body='foo', headers={'Cache-Control': 'max-age=60'})
+
+    browser = CachedBrowser()
+    browser.cache = SQLiteCacheStore(str(tmp_path / 'cache.sqlite'))
+    browser.open('https://woob.test/page')
+
+    # a new browser, like in a new run, gets the response from the database
+    browser = CachedBrowser()
+    browser.cache = SQLiteCacheStore(str(tmp_path / 'cache.sqlite'))
+    browser.location('https://woob.test/page')
+
+    assert len(responses.calls) == 1
+    assert browser.response.text == 'foo'
+    assert browser.response.request.url == 'https://woob.test/page'
+    assert isinstance(browser.page, CachedPage)
+
+
+def test_sqlite_store_max_size(tmp_path):
+    store = SQLiteCacheStore(str(tmp_path / 'cache.sqlite'), max_size=300)
+
+    with responses.RequestsMock() as mock:
+        browser = CachedBrowser()
+        browser.cache = store
+        for name in 'abc':
+            mock.get('https://woob.test/%s' % name, body=name * 100, headers={'Cache-Control': 'max-age=60'})
+            browser.open('https://woob.test/%s' % name)
+
+    assert len(store) == 2
@@ -0,0 +1,50 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from http.server import ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+
+@pytest.fixture()
+def http_server():
+    """
+    Start local HTTP servers, run in threads and stopped after the test.
+
+    It is a function taking the :class:`http.server.BaseHTTPRequestHandler`
+    class handling requests, and attributes to set on the server, which
+    the handler can use. The URL of the server, without trailing slash, is
+    its ``url`` attribute.
+    """
+    servers = []
+
+    def start(handler, **attributes):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        server.daemon_threads = True
+        server.url = 'http://127.0.0.1:%d' % server.server_port
+        for name, value in attributes.items():
+            setattr(server, name, value)
+        Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,140 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import urllib.request
+
+import requests
+import responses
+
+from woob.browser import Browser
+from woob.browser.cookies import BlockAllCookies, WoobCookieJar, request_domains
+
+
+def make_jar():
+    jar = WoobCookieJar()
+    jar.set('session', '1', domain='woob.test', path='/')
+    jar.set('wide', '2', domain='.woob.test', path='/')
+    jar.set('account', '3', domain='www.woob.test', path='/account')
+    jar.set('other', '4', domain='example.org', path='/')
+    return jar
+
+
+def reference_header(jar, url):
+    # header computed by a standard jar with the same cookies
+    reference = requests.cookies.RequestsCookieJar()
+    reference.update(jar)
+    return cookie_header(reference, url)
+
+
+def cookie_header(jar, url):
+    request = urllib.request.Request(url)
+    jar.add_cookie_header(request)
+    return request.get_header('Cookie')
+
+
+def test_request_domains():
+    request = urllib.request.Request('https://www.woob.test/')
+    assert request_domains(request) == {
+        '', 'www.woob.test', '.www.woob.test', 'woob.test', '.woob.test', 'test', '.test',
+    }
+
+
+def test_indexed_lookup():
+    jar = make_jar()
+
+    for url in ('https://woob.test/', 'https://www.woob.test/account/1', 'https://example.org/'):
+        assert cookie_header(jar, url) == reference_header(jar, url)
+    assert sorted(cookie_header(jar, 'https://www.woob.test/account/1').split('; ')) == ['account=3', 'session=1', 'wide=2']
+    assert cookie_header(jar, 'https://unknown.test/') is None
+
+    jar.set_policy(BlockAllCookies())
+    assert cookie_header(jar, 'https://woob.test/') is None
+
+
+def test_overlay():
+    jar = make_jar()
+    overlay = jar.overlay()
+
+    assert len(overlay) == 4
+    assert overlay['session'] == '1'
+
+    overlay.set('session', 'request', domain='woob.test', path='/')
+    overlay.set('new', '5', domain='woob.test', path='/')
+    assert sorted(cookie_header(overlay, 'https://woob.test/').split('; ')) == ['new=5', 'session=request', 'wide=2']
+    assert overlay['session'] == 'request'
+    assert len(overlay) == 5
+
+    # the base jar is not modified
+    assert jar['session'] == '1'
+    assert 'new' not in jar
+
+    # and its new cookies are shown
+    jar.set('late', '6', domain='woob.test', path='/')
+    assert overlay['late'] == '6'
+
+    # cookies of the base jar are copied before being removed
+    overlay.clear('woob.test')
+    assert 'session' not in overlay
+    assert overlay['wide'] == '2'
+    assert jar['session'] == '1'
+    jar.set('later', '7', domain='example.org', path='/')
+    assert 'later' not in overlay
+
+
+def test_overlay_update_from_base():
+    jar = make_jar()
+    overlay = jar.overlay()
+    overlay.set('session', 'request', domain='woob.test', path='/')
+
+    requests.cookies.merge_cookies(overlay, jar)
+    assert overlay['session'] == '1'
+
+
+@responses.activate
+def test_browser_cookies():
+    responses.get(
+        'https://woob.test/login', status=302,
+        headers={'Location': '/home', 'Set-Cookie': 'session=42; Path=/'},
+    )
+    responses.get('https://woob.test/home', body='home')
+
+    browser = Browser()
+    browser.session.cookies.set('tracking', 'x', domain='woob.test', path='/')
+
+    browser.open('https://woob.test/login', cookies={'once': 'y'})
+    assert responses.calls[0].request.headers['Cookie'] == 'tracking=x; once=y'
+    assert responses.calls[1].request.headers['Cookie'] == 'tracking=x; session=42; once=y'
+    assert browser.session.cookies['session'] == '42'
+    assert 'once' not in browser.session.cookies
+
+    browser.open('https://woob.test/home')
+    assert responses.calls[2].request.headers['Cookie'] == 'tracking=x; session=42'
+
+
+def test_changes():
+    jar = WoobCookieJar()
+    jar.set('a', '1', domain='woob.test')
+    changes = jar.changes
+
+    jar.set('a', '1', domain='woob.test')
+    assert jar.changes == changes
+
+    jar.set('a', '2', domain='woob.test')
+    assert jar.changes == changes + 1
+
+    jar.clear('woob.test')
+    assert jar.changes == changes + 2
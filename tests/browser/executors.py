@@ -0,0 +1,139 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from threading import Event, Lock
+import time
+
+import pytest
+import responses
+
+from woob.browser import Browser
+from woob.browser import executors
+from woob.browser.executors import ExecutorShare, SharedExecutor, configure_shared_executor
+
+
+@pytest.fixture(autouse=True)
+def restore_shared_executor(monkeypatch):
+    # configure_shared_executor() changes the process-wide settings
+    monkeypatch.setattr(executors, '_shared_executor', None)
+    monkeypatch.setattr(executors, '_shared_by_default', False)
+
+
+def test_share_limit():
+    executor = SharedExecutor(max_workers=8)
+    share = executor.share(2)
+
+    lock = Lock()
+    running = [0, 0]
+
+    def task():
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(.02)
+        with lock:
+            running[0] -= 1
+
+    futures = [share.submit(task) for _ in range(10)]
+    for future in futures:
+        future.result()
+    assert running[1] == 2
+    assert executor.threads <= 8
+
+
+def test_fairness():
+    executor = SharedExecutor(max_workers=1)
+    started, release = Event(), Event()
+    order = []
+
+    def block():
+        started.set()
+        release.wait()
+
+    busy, other = executor.share(), executor.share()
+    blocker = busy.submit(block)
+    started.wait()
+    futures = [busy.submit(order.append, 'busy') for _ in range(3)]
+    futures += [other.submit(order.append, 'other') for _ in range(2)]
+    release.set()
+
+    blocker.result()
+    for future in futures:
+        future.result()
+    # shares are served in turn, instead of in the order of submission
+    assert order == ['busy', 'other', 'busy', 'other', 'busy']
+
+
+def test_exceptions_and_shutdown():
+    share = SharedExecutor(max_workers=2).share()
+    future = share.submit(lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        future.result()
+
+    share.submit(time.sleep, .05)
+    share.shutdown()
+    assert share.running == 0
+    with pytest.raises(RuntimeError):
+        share.submit(time.sleep, 0)
+
+
+def test_idle_threads_stop():
+    executor = SharedExecutor(max_workers=4, idle_timeout=.05)
+    executor.share().submit(time.sleep, 0).result()
+    assert executor.threads == 1
+
+    for _ in range(50):
+        if executor.threads == 0:
+            break
+        time.sleep(.02)
+    assert executor.threads == 0
+
+
+class SharedBrowser(Browser):
+    SHARED_EXECUTOR = True
+    MAX_WORKERS = 3
+
+
+@responses.activate
+def test_browsers():
+    responses.get('https://woob.test/', body='ok')
+
+    assert not isinstance(Browser().session.executor, ExecutorShare)
+
+    browsers = [SharedBrowser(), SharedBrowser()]
+    executor = executors.get_shared_executor()
+    for browser in browsers:
+        assert isinstance(browser.session.executor, ExecutorShare)
+        assert browser.session.executor.executor is executor
+        assert browser.session.executor.max_workers == 3
+
+    futures = [browser.async_open('https://woob.test/') for browser in browsers for _ in range(5)]
+    assert [future.result().text for future in futures] == ['ok'] * 10
+    assert executor.threads <= 6
+
+
+def test_configure_shared_executor():
+    executor = configure_shared_executor(max_workers=16, max_share=2)
+
+    browser = Browser()
+    assert browser.session.executor.executor is executor
+    assert browser.session.executor.max_workers == 2
+
+    class PrivateBrowser(Browser):
+        SHARED_EXECUTOR = False
+
+    assert not isinstance(PrivateBrowser().session.executor, ExecutorShare)
@@ -26,6 +26,7 @@
 from woob.capabilities.base import NotAvailable
 from woob.browser.filters.base import FilterError
 from woob.browser.filters.html import FormValue, Link
+from woob.browser.filters.json import Dict
 from woob.browser.filters.standard import (
     RawText, DateTime, CleanText, Currency, CleanDecimal, Date,
     NumberFormatError,
@@ -280,3 +281,25 @@ def test_DateTime():
     assert Date(yearfirst=False).filter('20-7-15') == datetime.date(2015, 7, 20)
     assert Date(yearfirst=True).filter('1789-7-15') == datetime.date(1789, 7, 15)
     assert Date(yearfirst=True, strict=False).filter('7-15') == datetime.date(today.year, 7, 15)
+
+
+@pytest.mark.parametrize('selector,expected', (
+    ('', {'accounts': [{'id': '1', 'balance': {'value': 12}}, {'id': '2'}], '0': 'zero'}),
+    ('0', 'zero'),
+    ('accounts/0/id', '1'),
+    ('accounts/1/id', '2'),
+    ('accounts/0/balance/value', 12),
+    (['accounts', 1, 'id'], '2'),
+    (['accounts', 0, lambda item: 'id'], '1'),
+))
+def test_Dict(selector, expected):
+    doc = {'accounts': [{'id': '1', 'balance': {'value': 12}}, {'id': '2'}], '0': 'zero'}
+    assert Dict(selector)(doc) == expected
+
+
+@pytest.mark.parametrize('selector', (
+    'notfound', 'accounts/2', 'accounts/0/id/value', 'accounts/1/balance/value', '0/0',
+))
+def test_Dict_not_found(selector):
+    doc = {'accounts': [{'id': '1', 'balance': {'value': 12}}, {'id': '2'}], '0': 'zero'}
+    assert Dict(selector, default=None)(doc) is None
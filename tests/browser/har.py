@@ -0,0 +1,131 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from base64 import b64decode
+import json
+import os
+
+import pytest
+import responses
+
+from woob.browser import Browser
+from woob.browser.adapters import HARReplayMiss
+from woob.browser.har import HARManager, load_har
+
+
+@pytest.mark.parametrize('har_format,compress,filename', (
+    ('har', False, 'bundle.har'),
+    ('lines', False, 'bundle.harl'),
+    ('lines', True, 'bundle.harl.gz'),
+))
+@responses.activate
+def test_har_formats(tmp_path, har_format, compress, filename):
+    for n in range(5):
+        responses.get('https://woob.test/%d' % n, body='page %d' % n)
+
+    browser = Browser(responses_dirname=str(tmp_path))
+    browser.har_manager = HARManager(str(tmp_path), browser.logger, har_format=har_format, compress=compress)
+    for n in range(5):
+        browser.open('https://woob.test/%d' % n)
+    browser.deinit()
+
+    assert os.listdir(str(tmp_path)) == [filename]
+
+    har = load_har(str(tmp_path / filename))
+    assert har['log']['creator']['name'] == 'woob'
+    assert [entry['request']['url'] for entry in har['log']['entries']] == [
+        'https://woob.test/%d' % n for n in range(5)
+    ]
+    assert b64decode(har['log']['entries'][3]['response']['content']['text']) == b'page 3'
+
+    if har_format == 'har':
+        # still a standard JSON file
+        with open(str(tmp_path / filename)) as fd:
+            assert len(json.load(fd)['log']['entries']) == 5
+
+
+def test_compress_needs_lines_format(tmp_path):
+    with pytest.raises(ValueError):
+        HARManager(str(tmp_path), None, har_format='har', compress=True)
+
+
+@responses.activate
+def record(tmp_path):
+    responses.get(
+        'https://woob.test/login',
+        status=302,
+        headers={'Location': '/home', 'Set-Cookie': 'session=42; Path=/'},
+    )
+    responses.get('https://woob.test/home', body='home')
+    responses.post('https://woob.test/search', body='first', match=[responses.matchers.urlencoded_params_matcher({'q': 'a'})])
+    responses.post('https://woob.test/search', body='second', match=[responses.matchers.urlencoded_params_matcher({'q': 'b'})])
+    responses.get('https://woob.test/list', body='page 1')
+    responses.get('https://woob.test/list', body='page 2')
+
+    browser = Browser(responses_dirname=str(tmp_path))
+    browser.open('https://woob.test/login')
+    browser.open('https://woob.test/search', data={'q': 'a'})
+    browser.open('https://woob.test/search', data={'q': 'b'})
+    browser.open('https://woob.test/list?ts=1')
+    browser.open('https://woob.test/list?ts=2')
+    browser.deinit()
+
+    return str(tmp_path / 'bundle.har')
+
+
+def test_replay(tmp_path):
+    har_path = record(tmp_path)
+
+    browser = Browser()
+    browser.replay_har(har_path, ignore_params=('ts',))
+
+    response = browser.open('https://woob.test/login')
+    assert response.url == 'https://woob.test/home'
+    assert response.text == 'home'
+    assert response.history[0].status_code == 302
+    assert browser.session.cookies['session'] == '42'
+
+    assert browser.open('https://woob.test/search', data={'q': 'b'}).text == 'second'
+    assert browser.open('https://woob.test/search', data={'q': 'a'}).text == 'first'
+
+    assert browser.open('https://woob.test/list?ts=3').text == 'page 1'
+    assert browser.open('https://woob.test/list?ts=4').text == 'page 2'
+    # the last response is served again
+    assert browser.open('https://woob.test/list?ts=5').text == 'page 2'
+
+    with pytest.raises(HARReplayMiss):
+        browser.open('https://woob.test/unknown')
+
+
+def test_replay_strict(tmp_path):
+    har_path = record(tmp_path)
+
+    browser = Browser()
+    browser.replay_har(har_path, strict=True)
+
+    assert browser.open('https://woob.test/list?ts=2').text == 'page 2'
+    with pytest.raises(HARReplayMiss):
+        browser.open('https://woob.test/list?ts=3')
+    with pytest.raises(HARReplayMiss):
+        browser.open('https://woob.test/search', data={'q': 'c'})
+
+
+def test_replay_from_env(tmp_path, monkeypatch):
+    har_path = record(tmp_path)
+    monkeypatch.setenv('WOOB_HAR_REPLAY', har_path)
+
+    assert Browser().open('https://woob.test/home').text == 'home'
@@ -0,0 +1,248 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import logging
+import socket
+from threading import Event, Thread
+
+import pytest
+import requests
+
+from woob.browser import Browser
+from woob.browser.adapters import LowSecHTTPAdapter, RetryPolicy
+from woob.browser.exceptions import HTTPNotFound, ServerError
+
+
+h2 = pytest.importorskip('h2.connection')
+pytest.importorskip('woob.browser.http2')
+
+import h2.config  # noqa: E402
+import h2.events  # noqa: E402
+
+from woob.browser.http2 import HTTP2Adapter  # noqa: E402
+
+
+class H2Server:
+    """
+    HTTP/2 server without TLS (h2c), which only talks HTTP/2.
+
+    It replies to ``/cookie`` by setting a cookie, to ``/redirect`` with a
+    redirection to ``/echo``, to ``/missing`` with a 404, to
+    ``/unavailable`` with a 503, and to any other path with the request as
+    JSON.
+    """
+
+    def __init__(self):
+        self.socket = socket.socket()
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.listen()
+        self.url = 'http://127.0.0.1:%d' % self.socket.getsockname()[1]
+        self.connections = 0
+        self.paths = []
+        self.stopped = Event()
+        Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while not self.stopped.is_set():
+            try:
+                sock, _ = self.socket.accept()
+            except OSError:
+                return
+            self.connections += 1
+            Thread(target=self.handle, args=(sock,), daemon=True).start()
+
+    def handle(self, sock):
+        conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        sock.sendall(conn.data_to_send())
+
+        requests = {}
+        with sock:
+            while True:
+                data = sock.recv(65535)
+                if not data:
+                    return
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        requests[event.stream_id] = {
+                            'headers': {name.decode(): value.decode() for name, value in event.headers},
+                            'body': b'',
+                        }
+                    elif isinstance(event, h2.events.DataReceived):
+                        requests[event.stream_id]['body'] += event.data
+                        conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, h2.events.StreamEnded):
+                        self.reply(conn, event.stream_id, requests.pop(event.stream_id))
+                sock.sendall(conn.data_to_send())
+
+    def reply(self, conn, stream_id, request):
+        path = request['headers'][':path']
+        self.paths.append(path)
+        status, headers = 200, [('content-type', 'application/json')]
+        if path == '/cookie':
+            headers.append(('set-cookie', 'session=42; Path=/'))
+        elif path == '/redirect':
+            status = 302
+            headers.append(('location', '/echo'))
+        elif path == '/missing':
+            status = 404
+        elif path == '/unavailable':
+            status = 503
+
+        body = json.dumps({
+            'path': path,
+            'method': request['headers'][':method'],
+            'cookie': request['headers'].get('cookie'),
+            'body': request['body'].decode(),
+        }).encode()
+        headers = [(':status', str(status)), ('content-length', str(len(body)))] + headers
+        conn.send_headers(stream_id, headers)
+        conn.send_data(stream_id, body, end_stream=True)
+
+    def stop(self):
+        self.stopped.set()
+        self.socket.close()
+
+
+@pytest.fixture()
+def server():
+    server = H2Server()
+    yield server
+    server.stop()
+
+
+@pytest.fixture()
+def browser():
+    browser = Browser()
+    # the test server has no TLS, HTTP/2 is used with prior knowledge
+    browser.session.mount('http://', HTTP2Adapter(http1=False))
+    return browser
+
+
+def test_requests(server, browser):
+    response = browser.open(server.url + '/echo', data={'a': 1})
+    assert response.raw.version == 20
+    assert response.json() == {'path': '/echo', 'method': 'POST', 'cookie': None, 'body': 'a=1'}
+    assert response.sizes == {'received': len(response.content), 'decoded': len(response.content)}
+
+
+def test_cookies_and_redirections(server, browser):
+    browser.open(server.url + '/cookie')
+    assert browser.session.cookies['session'] == '42'
+
+    response = browser.open(server.url + '/redirect')
+    assert response.history[0].status_code == 302
+    assert response.json()['path'] == '/echo'
+    assert response.json()['cookie'] == 'session=42'
+
+
+def test_raise_for_status(server, browser):
+    with pytest.raises(HTTPNotFound) as exc_info:
+        browser.open(server.url + '/missing')
+    assert exc_info.value.response.status_code == 404
+
+
+def test_multiplexing(server, browser):
+    futures = [browser.async_open(server.url + '/echo/%d' % n) for n in range(20)]
+    assert [future.result().json()['path'] for future in futures] == ['/echo/%d' % n for n in range(20)]
+    assert server.connections == 1
+
+
+def test_save_responses(server, tmp_path):
+    browser = Browser(responses_dirname=str(tmp_path))
+    browser.session.mount('http://', HTTP2Adapter(http1=False))
+    browser.open(server.url + '/echo')
+    browser.deinit()
+
+    with open(str(tmp_path / 'bundle.har')) as fd:
+        entry, = json.load(fd)['log']['entries']
+    assert entry['response']['httpVersion'] == 'HTTP/2.0'
+    assert entry['response']['status'] == 200
+
+
+class HTTP2Browser(Browser):
+    HTTP2 = True
+
+
+def test_browser_flag():
+    browser = HTTP2Browser()
+    assert isinstance(browser.session.get_adapter('https://woob.test'), HTTP2Adapter)
+    assert not isinstance(browser.session.get_adapter('http://woob.test'), HTTP2Adapter)
+
+
+def test_retries(server):
+    browser = Browser()
+    browser.session.mount('http://', HTTP2Adapter(
+        http1=False, max_retries=RetryPolicy(total=2, backoff_factor=0, backoff_jitter=0),
+    ))
+
+    # the last error response is handled by the browser as usual
+    with pytest.raises(ServerError):
+        browser.open(server.url + '/unavailable')
+    assert server.paths == ['/unavailable'] * 3
+
+    browser.session.mount('http://', HTTP2Adapter(
+        http1=False, max_retries=RetryPolicy(total=1, backoff_factor=0, raise_on_status=True),
+    ))
+    with pytest.raises(requests.exceptions.RetryError):
+        browser.open(server.url + '/unavailable')
+    assert len(server.paths) == 5
+
+
+def test_connection_retries():
+    # port on which nothing listens
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        url = 'http://127.0.0.1:%d/echo' % sock.getsockname()[1]
+
+    browser = Browser()
+    retries = []
+
+    class CountingRetry(RetryPolicy):
+        def increment(self, *args, **kwargs):
+            retries.append(kwargs.get('error'))
+            return super().increment(*args, **kwargs)
+
+    browser.session.mount('http://', HTTP2Adapter(
+        http1=False, max_retries=CountingRetry(total=2, backoff_factor=0, backoff_jitter=0),
+    ))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        browser.open(url)
+    assert len(retries) == 3
+
+
+class RetryHTTP2Browser(HTTP2Browser):
+    RETRY_POLICY = RetryPolicy(total=5)
+
+
+def test_browser_retry_policy():
+    adapter = RetryHTTP2Browser().session.get_adapter('https://woob.test')
+    assert isinstance(adapter.max_retries, RetryPolicy)
+    assert adapter.max_retries.total == 5
+
+
+def test_browser_unsupported_options(caplog):
+    class LowSecHTTP2Browser(HTTP2Browser):
+        HTTP_ADAPTER_CLASS = LowSecHTTPAdapter
+        SHARED_POOLS = True
+
+    with caplog.at_level(logging.WARNING):
+        LowSecHTTP2Browser()
+    messages = [record.getMessage() for record in caplog.records]
+    assert 'LowSecHTTPAdapter is not used for HTTPS requests, as HTTP2 is enabled' in messages
+    assert 'connection pools are not shared for HTTPS requests, as HTTP2 is enabled' in messages
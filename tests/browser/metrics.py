@@ -0,0 +1,191 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import gzip
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import responses
+
+from woob.browser import Browser, PagesBrowser, URL
+from woob.browser.elements import ItemElement, ListElement, method
+from woob.browser.filters.standard import CleanText
+from woob.browser.metrics import RequestMetrics
+from woob.browser.pages import HTMLPage
+from woob.browser.profiles import ENCODINGS, Firefox
+from woob.capabilities.base import BaseObject
+
+
+class ListHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'<html><body><ul>%s</ul></body></html>' % b''.join(
+            b'<li>item %d</li>' % n for n in range(50)
+        )
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server_url(http_server):
+    return http_server(ListHandler).url
+
+
+class ListPage(HTMLPage):
+    @method
+    class iter_items(ListElement):
+        item_xpath = '//li'
+
+        class item(ItemElement):
+            klass = BaseObject
+
+            obj_id = CleanText('.')
+
+
+def make_browser(url):
+    class MetricsBrowser(PagesBrowser):
+        BASEURL = url
+        COLLECT_METRICS = True
+
+        items = URL(r'/items', ListPage)
+
+    return MetricsBrowser()
+
+
+def test_metrics(server_url):
+    browser = make_browser(server_url)
+    recorded = []
+    browser.metrics.callbacks.append(recorded.append)
+
+    browser.items.go()
+    assert len(recorded) == 1
+    metrics = recorded[0]
+    assert isinstance(metrics, RequestMetrics)
+    assert metrics.name == 'items'
+    assert metrics.status == 200
+    assert metrics.connect > 0
+    assert metrics.tls == pytest.approx(0, abs=.01)
+    assert metrics.ttfb >= metrics.connect
+    assert metrics.size == len(browser.response.content)
+    # the document is built when it is used
+    assert metrics.parse == 0
+    assert metrics.iteration == 0
+
+    assert len(list(browser.page.iter_items())) == 50
+    assert metrics.parse > 0
+    assert metrics.iteration > 0
+
+    # the connection is reused
+    browser.items.go()
+    assert recorded[1].connect == 0
+
+
+def test_summary(server_url):
+    browser = make_browser(server_url)
+    for _ in range(3):
+        list(browser.items.go().iter_items())
+    browser.open('/other')
+
+    summary = browser.metrics.summary()
+    assert summary.keys() == {'items', 'GET %s' % server_url.split('://')[1]}
+    assert summary['items']['count'] == 3
+    assert summary['items']['bytes'] == 3 * len(browser.response.content)
+    assert 0 < summary['items']['total']['p50'] <= summary['items']['total']['p95']
+    assert summary['items']['parse']['sum'] > 0
+
+
+def test_disabled(server_url):
+    browser = make_browser(server_url)
+    browser.COLLECT_METRICS = False
+    browser.items.go()
+
+    assert browser.metrics.records == []
+    assert not hasattr(browser.response, 'metrics')
+    assert browser.response.timings['ttfb'] > 0
+
+
+def compress(encoding, data):
+    if encoding == 'gzip':
+        return gzip.compress(data)
+    if encoding == 'br':
+        import brotli
+        return brotli.compress(data)
+    try:
+        from compression import zstd
+    except ImportError:
+        from backports import zstd
+    return zstd.compress(data)
+
+
+@pytest.mark.parametrize('encoding', ('gzip', 'br', 'zstd'))
+@responses.activate
+def test_content_encoding(encoding):
+    if encoding not in ENCODINGS:
+        pytest.skip('%s is not supported' % encoding)
+
+    class CompressedBrowser(Browser):
+        PROFILE = Firefox()
+        COLLECT_METRICS = True
+
+    body = b'{"items": [%s]}' % b', '.join(b'"item %d"' % n for n in range(100))
+    responses.get('https://woob.test/items', body=compress(encoding, body), headers={'Content-Encoding': encoding})
+
+    browser = CompressedBrowser()
+    response = browser.open('https://woob.test/items')
+    assert encoding in responses.calls[0].request.headers['Accept-Encoding']
+    assert response.content == body
+
+    metrics, = browser.metrics.records
+    assert metrics.content_encoding == encoding
+    assert metrics.decoded_size == len(body)
+    assert 0 < metrics.size < len(body)
+    summary = browser.metrics.summary()['GET woob.test']
+    assert summary['decoded_bytes'] == len(body)
+    assert summary['bytes'] == metrics.size
+
+
+@responses.activate
+def test_adapter_sizes():
+    body = b'{"items": [%s]}' % b', '.join(b'"item %d"' % n for n in range(100))
+    responses.get('https://woob.test/items', body=gzip.compress(body), headers={'Content-Encoding': 'gzip'})
+
+    class StreamBrowser(Browser):
+        COLLECT_METRICS = True
+
+    # sizes are counted by the adapter, even without metrics
+    for browser in (Browser(), StreamBrowser()):
+        response = browser.open('https://woob.test/items', stream=True)
+        assert response.sizes == {'received': 0, 'decoded': 0}
+        assert b''.join(response.iter_content(64)) == body
+        assert response.sizes == {'received': len(gzip.compress(body)), 'decoded': len(body)}
+
+        response = browser.open('https://woob.test/items')
+        adapter = browser.session.get_adapter('https://woob.test')
+        assert adapter.received_bytes == 2 * response.sizes['received']
+        assert adapter.decoded_bytes == 2 * len(body)
+
+    # metrics of streamed responses are updated when the body is read
+    first, second = browser.metrics.records
+    assert first.decoded_size == second.decoded_size == len(body)
+    assert first.size == second.size == len(gzip.compress(body))
@@ -0,0 +1,118 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import importlib
+import os
+import sys
+import time
+import types
+
+import pytest
+
+
+class FakeCertificate:
+    # DER data is the expiration date, in seconds since epoch
+    def __init__(self, der, perm=False):
+        self.valid_not_after = int(der) * 1e6
+
+
+@pytest.fixture()
+def nss_module(monkeypatch):
+    # the cache does not need a real NSS
+    package = types.ModuleType('nss')
+    for name in ('ssl', 'error', 'nss'):
+        module = types.ModuleType('nss.%s' % name)
+        setattr(package, name, module)
+        monkeypatch.setitem(sys.modules, 'nss.%s' % name, module)
+    package.nss.Certificate = FakeCertificate
+    for n, name in enumerate(('PR_CONNECT_TIMEOUT_ERROR', 'PR_IO_TIMEOUT_ERROR', 'PR_CONNECT_RESET_ERROR')):
+        setattr(package.error, name, -n)
+    monkeypatch.setitem(sys.modules, 'nss', package)
+    monkeypatch.delitem(sys.modules, 'woob.browser.nss', raising=False)
+
+    with pytest.warns(DeprecationWarning):
+        module = importlib.import_module('woob.browser.nss')
+    yield module
+    del sys.modules['woob.browser.nss']
+
+
+def make_der(ttl=3600):
+    return str(int(time.time() + ttl)).encode('ascii')
+
+
+def test_aia_cache(nss_module):
+    cache = nss_module.AIACache()
+    der = make_der()
+
+    assert cache.get('http://ca.test/int.der', 'CN=CA') is None
+    cache.set('http://ca.test/int.der', 'CN=CA', der)
+    assert cache.get('http://ca.test/int.der', 'CN=CA') == der
+    # certificates are also keyed by issuer
+    assert cache.get('http://ca.test/int.der', 'CN=Other') is None
+
+    cache.discard('http://ca.test/int.der', 'CN=CA')
+    assert cache.get('http://ca.test/int.der', 'CN=CA') is None
+    assert list(cache.iter_certificates()) == []
+
+
+def test_aia_cache_expiry(nss_module):
+    cache = nss_module.AIACache(max_age=60)
+
+    # expired certificate
+    cache.set('http://ca.test/old.der', 'CN=CA', make_der(-10))
+    assert cache.get('http://ca.test/old.der', 'CN=CA') is None
+
+    # fetched too long ago
+    cache.set('http://ca.test/int.der', 'CN=CA', make_der())
+    cache.entries[cache.key('http://ca.test/int.der', 'CN=CA')]['fetched'] -= 120
+    assert cache.get('http://ca.test/int.der', 'CN=CA') is None
+
+
+def test_aia_cache_persistence(nss_module, tmp_path):
+    path = str(tmp_path / 'aia')
+    cache = nss_module.AIACache(path)
+    der = make_der()
+    cache.set('http://ca.test/int.der', 'CN=CA', der)
+    cache.set('http://ca.test/old.der', 'CN=CA', make_der(-10))
+
+    other = nss_module.AIACache(path)
+    assert other.get('http://ca.test/int.der', 'CN=CA') == der
+    assert list(other.iter_certificates()) == [der]
+
+    # files which can't be read are ignored
+    with open(os.path.join(path, 'broken.json'), 'w') as fd:
+        fd.write('{')
+    assert list(other.iter_certificates()) == [der]
+
+    other.discard('http://ca.test/int.der', 'CN=CA')
+    assert nss_module.AIACache(path).get('http://ca.test/int.der', 'CN=CA') is None
+    assert list(other.iter_certificates()) == []
+
+
+def test_aia_cache_path(nss_module, monkeypatch, tmp_path):
+    assert nss_module.AIA_CACHE.path is None
+
+    calls = []
+    monkeypatch.setattr(nss_module, 'update_cert_db', lambda path, aia_cache=None: calls.append((path, aia_cache)))
+    nss_module.create_cert_db(str(tmp_path / 'pki'), aia_cache_path=str(tmp_path / 'aia'))
+
+    assert nss_module.AIA_CACHE.path == str(tmp_path / 'aia')
+    assert calls == [(str(tmp_path / 'pki'), nss_module.AIA_CACHE)]
+
+    cache = nss_module.AIA_CACHE
+    nss_module.set_aia_cache_path(str(tmp_path / 'aia'))
+    assert nss_module.AIA_CACHE is cache
@@ -0,0 +1,122 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from http.server import BaseHTTPRequestHandler
+from threading import Event
+
+import pytest
+
+from woob.browser import PagesBrowser, URL
+from woob.browser.elements import ItemElement, ListElement, method
+from woob.browser.filters.html import Link
+from woob.browser.filters.standard import CleanText
+from woob.browser.pages import HTMLPage, pagination
+from woob.capabilities.base import BaseObject
+
+
+class ListHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        num = int(self.path.rsplit('/', 1)[1])
+        body = '<html><body><ul>%s</ul>%s</body></html>' % (
+            ''.join('<li>item %d.%d</li>' % (num, n) for n in range(3)),
+            '<a href="/list/%d">next</a>' % (num + 1) if num < 3 else '',
+        )
+        body = body.encode('ascii')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server(http_server):
+    return http_server(ListHandler, paths=[])
+
+
+class ListPage(HTMLPage):
+    @pagination
+    @method
+    class iter_items(ListElement):
+        item_xpath = '//li'
+        next_page = Link('//a', default=None)
+
+        class item(ItemElement):
+            klass = BaseObject
+
+            obj_id = CleanText('.')
+
+
+class PrefetchListPage(ListPage):
+    @pagination
+    @method
+    class iter_items(ListPage.iter_items.klass):
+        prefetch_next_page = True
+
+
+def make_browser(url, page):
+    class ListBrowser(PagesBrowser):
+        BASEURL = url
+
+        items = URL(r'/list/(?P<num>\d+)', page)
+
+    return ListBrowser()
+
+
+def wait_path(server, path, tries=100):
+    for _ in range(tries):
+        if path in server.paths:
+            return True
+        Event().wait(.02)
+    return False
+
+
+def test_pagination(server):
+    browser = make_browser(server.url, ListPage)
+    items = browser.items.go(num=1).iter_items()
+
+    next(items)
+    assert not wait_path(server, '/list/2', tries=10)
+    assert [item.id for item in items] == ['item %d.%d' % (num, n) for num in range(1, 4) for n in range(3)][1:]
+
+
+def test_prefetch(server):
+    browser = make_browser(server.url, PrefetchListPage)
+    items = browser.items.go(num=1).iter_items()
+
+    # the next page is requested while the first items are built
+    next(items)
+    assert wait_path(server, '/list/2')
+    assert [item.id for item in items] == ['item %d.%d' % (num, n) for num in range(1, 4) for n in range(3)][1:]
+    assert server.paths == ['/list/1', '/list/2', '/list/3']
+    assert browser.url == server.url + '/list/3'
+    assert isinstance(browser.page, PrefetchListPage)
+
+
+def test_prefetch_browser_pagination(server):
+    browser = make_browser(server.url, PrefetchListPage)
+    browser.items.go(num=1)
+
+    items = browser.pagination(lambda: PrefetchListPage.iter_items.__wrapped__(browser.page))
+    assert len(list(items)) == 9
+    assert server.paths == ['/list/1', '/list/2', '/list/3']
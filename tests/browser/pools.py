@@ -0,0 +1,115 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from woob.browser import Browser
+from woob.browser.adapters import LowSecHTTPAdapter
+from woob.browser.pools import ConnectionPoolRegistry
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        body = b'hello'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server_url(http_server):
+    server = http_server(KeepAliveHandler, connections=set())
+    return server.url + '/', server
+
+
+def test_shared_pools_reuse_connections(server_url):
+    url, server = server_url
+    registry = ConnectionPoolRegistry()
+
+    class SharedBrowser(Browser):
+        SHARED_POOLS = registry
+
+    for _ in range(3):
+        with SharedBrowser() as browser:
+            assert browser.open(url).text == 'hello'
+
+    assert len(server.connections) == 1
+
+    stats = registry.stats()
+    assert stats['pools'] == 1
+    assert stats['pools_created'] == 1
+    assert stats['connections'] == 1
+    assert stats['requests'] == 3
+    assert stats['hosts'][url.rstrip('/')] == {'connections': 1, 'requests': 3, 'idle': 1}
+
+
+def test_private_pools(server_url):
+    url, server = server_url
+
+    for _ in range(2):
+        with Browser() as browser:
+            browser.open(url)
+
+    assert len(server.connections) == 2
+
+
+def test_adapter_classes_do_not_share(server_url):
+    url, server = server_url
+    registry = ConnectionPoolRegistry()
+
+    class SharedBrowser(Browser):
+        SHARED_POOLS = registry
+
+    class LowSecBrowser(SharedBrowser):
+        HTTP_ADAPTER_CLASS = LowSecHTTPAdapter
+
+    SharedBrowser().open(url)
+    LowSecBrowser().open(url)
+
+    assert len(server.connections) == 2
+    assert registry.stats()['pools'] == 2
+
+
+def test_idle_eviction(server_url):
+    url, server = server_url
+    registry = ConnectionPoolRegistry(idle_timeout=60)
+
+    class SharedBrowser(Browser):
+        SHARED_POOLS = registry
+
+    SharedBrowser().open(url)
+    assert registry.evict_idle() == 0
+
+    adapter = SharedBrowser().session.get_adapter(url)
+    assert registry.evict_idle(max(adapter.poolmanager.last_used.values()) + 61) == 1
+
+    stats = registry.stats()
+    assert stats['pools'] == 0
+    assert stats['pools_evicted'] == 1
+    assert stats['requests'] == 1
+
+    SharedBrowser().open(url)
+    assert len(server.connections) == 2
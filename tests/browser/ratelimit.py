@@ -0,0 +1,127 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+from tempfile import gettempdir
+from threading import Lock, Thread
+from time import monotonic, sleep
+from uuid import uuid4
+
+import responses
+
+from woob.browser import Browser
+from woob.browser.ratelimit import RateLimit, RateLimiter
+
+
+@responses.activate
+def test_rate():
+    responses.get('https://woob.test/', body='foo')
+
+    class LimitedBrowser(Browser):
+        RATE_LIMITS = RateLimit(rate=20)
+
+    browser = LimitedBrowser()
+    start = monotonic()
+    for _ in range(5):
+        browser.open('https://woob.test/')
+    # the first request is not delayed
+    assert monotonic() - start >= 0.19
+
+
+@responses.activate
+def test_burst():
+    responses.get('https://woob.test/', body='foo')
+
+    class LimitedBrowser(Browser):
+        RATE_LIMITS = RateLimit(rate=1, burst=5)
+
+    browser = LimitedBrowser()
+    start = monotonic()
+    for _ in range(5):
+        browser.open('https://woob.test/')
+    assert monotonic() - start < 0.5
+
+
+def test_max_concurrent():
+    limit = RateLimit(max_concurrent=2)
+    lock = Lock()
+    running = []
+    peak = []
+
+    def work():
+        with limit.acquire('woob.test'):
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            sleep(.05)
+            with lock:
+                running.pop()
+
+    threads = [Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
+
+
+@responses.activate
+def test_redirect_does_not_wait_for_its_own_slot():
+    responses.get('https://woob.test/a', status=302, headers={'Location': '/b'})
+    responses.get('https://woob.test/b', body='b')
+
+    class LimitedBrowser(Browser):
+        RATE_LIMITS = RateLimit(max_concurrent=1)
+
+    browser = LimitedBrowser()
+    assert browser.open('https://woob.test/a').text == 'b'
+    assert browser.async_open('https://woob.test/a').result(5).text == 'b'
+
+
+def test_hosts():
+    api = RateLimit(rate=1)
+    domain = RateLimit(rate=2)
+    default = RateLimit(rate=3)
+    limiter = RateLimiter({'api.woob.test': api, '.woob.test': domain, '*': default})
+
+    assert limiter.limit_for('api.woob.test') is api
+    assert limiter.limit_for('www.woob.test') is domain
+    assert limiter.limit_for('woob.test') is domain
+    assert limiter.limit_for('example.com') is default
+    assert RateLimiter({'woob.test': api}).limit_for('example.com') is None
+
+
+def test_hosts_have_their_own_budget():
+    limit = RateLimit(rate=1)
+    start = monotonic()
+    for host in ('a.woob.test', 'b.woob.test', 'c.woob.test'):
+        with limit.acquire(host):
+            pass
+    assert monotonic() - start < 0.5
+
+
+def test_shared_between_processes():
+    name = 'test-%s' % uuid4().hex
+    start = monotonic()
+    # distinct objects, as in distinct processes
+    for _ in range(3):
+        with RateLimit(rate=20, shared=name).acquire('woob.test'):
+            pass
+    assert monotonic() - start >= 0.09
+
+    os.remove(os.path.join(gettempdir(), 'woob_ratelimit.%s.woob.test' % name))
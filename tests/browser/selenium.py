@@ -0,0 +1,172 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+
+from itertools import count
+
+import pytest
+
+pytest.importorskip('selenium')
+
+from selenium import webdriver  # noqa: E402
+
+from woob.browser.selenium import (  # noqa: E402
+    DriverPool, DriverPoolTimeout, SeleniumBrowser, SeleniumBrowserSetupError,
+)
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        assert handle in self.driver.windows
+        self.driver.current = handle
+
+
+class FakeDriver:
+    ids = count()
+
+    def __init__(self):
+        # window handles, with their browser context
+        self.windows = {'default': None}
+        self.current = 'default'
+        self.contexts = set()
+        self.commands = []
+        self.quitted = False
+        self.switch_to = FakeSwitchTo(self)
+
+    @property
+    def window_handles(self):
+        return list(self.windows)
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.commands.append(cmd)
+        if cmd == 'Target.createBrowserContext':
+            context = 'context-%d' % next(self.ids)
+            self.contexts.add(context)
+            return {'browserContextId': context}
+        elif cmd == 'Target.createTarget':
+            handle = 'window-%d' % next(self.ids)
+            self.windows[handle] = params['browserContextId']
+            return {'targetId': handle}
+        elif cmd == 'Target.disposeBrowserContext':
+            self.contexts.remove(params['browserContextId'])
+            self.windows = {
+                handle: context for handle, context in self.windows.items()
+                if context != params['browserContextId']
+            }
+        return {}
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quitted = True
+
+
+def test_pool_reuse():
+    pool = DriverPool(max_drivers=2)
+    first = pool.acquire('chrome', FakeDriver)
+    pool.release('chrome', first)
+
+    assert pool.acquire('chrome', FakeDriver) is first
+    # other settings
+    other = pool.acquire('firefox', FakeDriver)
+    assert other is not first
+
+    pool.release('chrome', first)
+    pool.release('firefox', other, reusable=False)
+    assert other.quitted and not first.quitted
+
+    pool.close()
+    assert first.quitted
+
+
+def test_pool_max_drivers():
+    pool = DriverPool(max_drivers=1, wait_timeout=.1)
+    first = pool.acquire('chrome', FakeDriver)
+
+    with pytest.raises(DriverPoolTimeout):
+        pool.acquire('chrome', FakeDriver)
+
+    # an idle driver with other settings is replaced
+    pool.release('chrome', first)
+    second = pool.acquire('firefox', FakeDriver)
+    assert second is not first
+    assert first.quitted
+
+    # a failed creation frees its slot
+    pool.release('firefox', second, reusable=False)
+    with pytest.raises(ValueError):
+        pool.acquire('chrome', lambda: int('failed'))
+    pool.release('chrome', pool.acquire('chrome', FakeDriver))
+
+
+def test_pool_expiration():
+    pool = DriverPool(max_uses=2)
+    driver = pool.acquire('chrome', FakeDriver)
+    pool.release('chrome', driver)
+    assert pool.acquire('chrome', FakeDriver) is driver
+    pool.release('chrome', driver)
+    assert driver.quitted
+
+    pool = DriverPool(idle_timeout=0)
+    driver = pool.acquire('chrome', FakeDriver)
+    pool.release('chrome', driver)
+    assert driver.quitted
+    assert pool.acquire('chrome', FakeDriver) is not driver
+
+
+class PooledBrowser(SeleniumBrowser):
+    DRIVER = webdriver.Chrome
+    DRIVER_POOL = None
+
+    def _setup_driver(self, preferences):
+        self.driver = FakeDriver()
+
+
+def test_browser_context():
+    PooledBrowser.DRIVER_POOL = pool = DriverPool()
+    try:
+        browser = PooledBrowser()
+        driver = browser.driver
+        context, = driver.contexts
+        assert driver.windows[driver.current] == context
+
+        browser.deinit()
+        assert not driver.contexts
+        assert driver.window_handles == ['default']
+        assert driver.current == 'default'
+        assert 'Network.clearBrowserCookies' in driver.commands
+
+        browser = PooledBrowser()
+        assert browser.driver is driver
+        assert driver.contexts and context not in driver.contexts
+        browser.deinit()
+    finally:
+        pool.close()
+        PooledBrowser.DRIVER_POOL = None
+
+
+def test_pool_needs_chrome():
+    class Browser(SeleniumBrowser):
+        DRIVER = webdriver.Firefox
+        DRIVER_POOL = DriverPool()
+
+    with pytest.raises(SeleniumBrowserSetupError):
+        Browser()
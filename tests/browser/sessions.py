@@ -0,0 +1,128 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from http.server import BaseHTTPRequestHandler
+from itertools import count
+from threading import Event, Thread
+
+import pytest
+
+from woob.browser import Browser
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self):
+        self.server.paths.append((self.command, self.path))
+        # wait for every client to have sent its request
+        self.server.release.wait(5)
+        body = self.path.encode('ascii')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server(http_server):
+    return http_server(SlowHandler, paths=[], release=Event())
+
+
+class DedupBrowser(Browser):
+    DEDUPLICATE_REQUESTS = True
+
+
+def wait_requests(server, count):
+    for _ in range(100):
+        if len(server.paths) >= count:
+            break
+        Event().wait(.02)
+
+
+def test_deduplicate_identical_requests(server):
+    browser = DedupBrowser()
+    futures = [browser.async_open(server.url + '/a') for _ in range(2)]
+    wait_requests(server, 1)
+    # synchronous requests are deduplicated too
+    sync_thread_results = []
+    thread = Thread(target=lambda: sync_thread_results.append(browser.open(server.url + '/a')))
+    thread.start()
+    Event().wait(.1)
+    server.release.set()
+    thread.join()
+
+    responses = [future.result() for future in futures] + sync_thread_results
+    assert server.paths == [('GET', '/a')]
+    assert len({id(response) for response in responses}) == 3
+    assert [response.text for response in responses] == ['/a'] * 3
+    assert not browser.session._inflight
+
+
+def test_deduplicated_responses_are_independent(server):
+    calls = count()
+
+    def callback(response):
+        response.headers['X-Call'] = str(next(calls))
+        return response
+
+    browser = DedupBrowser()
+    futures = [browser.async_open(server.url + '/a', callback=callback) for _ in range(3)]
+    wait_requests(server, 1)
+    Event().wait(.1)
+    server.release.set()
+
+    responses = [future.result() for future in futures]
+    assert server.paths == [('GET', '/a')]
+    assert sorted(response.headers['X-Call'] for response in responses) == ['0', '1', '2']
+    assert [response.text for response in responses] == ['/a'] * 3
+
+
+def test_different_requests(server):
+    browser = DedupBrowser()
+    futures = [browser.async_open(server.url + path) for path in ('/a', '/b')]
+    wait_requests(server, 2)
+    server.release.set()
+
+    assert [future.result().text for future in futures] == ['/a', '/b']
+    assert len(server.paths) == 2
+
+
+def test_post_requests_are_not_deduplicated(server):
+    browser = DedupBrowser()
+    futures = [browser.async_open(server.url + '/a', data={'a': 1}) for _ in range(2)]
+    wait_requests(server, 2)
+    server.release.set()
+
+    for future in futures:
+        future.result()
+    assert server.paths == [('POST', '/a'), ('POST', '/a')]
+
+
+def test_disabled_by_default(server):
+    browser = Browser()
+    futures = [browser.async_open(server.url + '/a') for _ in range(2)]
+    wait_requests(server, 2)
+    server.release.set()
+
+    assert futures[0].result() is not futures[1].result()
+    assert len(server.paths) == 2
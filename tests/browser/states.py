@@ -0,0 +1,94 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from datetime import timedelta
+
+from woob.browser import Browser
+from woob.browser.browsers import StatesMixin
+from woob.tools.date import now_as_utc
+
+
+class StatesBrowser(StatesMixin, Browser):
+    __states__ = ('token',)
+
+    token = None
+
+
+class CompactBrowser(StatesBrowser):
+    COMPACT_STATE = True
+
+
+def test_cookies_are_dumped_once():
+    browser = StatesBrowser()
+    browser.session.cookies.set('session', '42', domain='woob.test')
+    first = browser.dump_state()['cookies']
+    assert browser._dumped_cookies[3] is first
+
+    # setting the same cookie does not change the jar
+    browser.session.cookies.set('session', '42', domain='woob.test')
+    assert browser.dump_state()['cookies'] is first
+
+    browser.session.cookies.set('session', '43', domain='woob.test')
+    assert browser.dump_state()['cookies'] != first
+
+
+def test_is_state_dirty():
+    browser = StatesBrowser()
+    browser.session.cookies.set('session', '42', domain='woob.test')
+    stored = browser.dump_state()
+
+    assert browser.is_state_dirty(stored, None)
+    assert not browser.is_state_dirty(browser.dump_state(), stored)
+
+    browser.token = 'foo'
+    assert browser.is_state_dirty(browser.dump_state(), stored)
+    stored = browser.dump_state()
+
+    browser.session.cookies.clear()
+    assert browser.is_state_dirty(browser.dump_state(), stored)
+
+
+def test_is_state_dirty_expire():
+    browser = StatesBrowser()
+    browser.STATE_DURATION = 60
+    state = browser.dump_state()
+
+    # only the expiration has moved, it is still far enough
+    stored = dict(state, expire=str(now_as_utc() + timedelta(minutes=50)))
+    assert not browser.is_state_dirty(state, stored)
+
+    stored = dict(state, expire=str(now_as_utc() + timedelta(minutes=20)))
+    assert browser.is_state_dirty(state, stored)
+
+
+def test_compact_state():
+    states = []
+    for klass in (CompactBrowser, StatesBrowser):
+        browser = klass()
+        for n in range(5):
+            browser.session.cookies.set('cookie%d' % n, str(n), domain='woob.test', path='/foo')
+        states.append(browser.dump_state())
+    assert len(states[0]['cookies']) < len(states[1]['cookies'])
+
+    # both formats are loaded
+    for state in states:
+        loaded = StatesBrowser()
+        loaded.load_state(state)
+        assert sorted(
+            (cookie.name, cookie.value, cookie.domain, cookie.path)
+            for cookie in loaded.session.cookies
+        ) == [('cookie%d' % n, str(n), 'woob.test', '/foo') for n in range(5)]
@@ -21,7 +21,10 @@
 
 from woob.browser import PagesBrowser, URL
 from woob.browser.pages import Page, RawPage
-from woob.browser.url import BrowserParamURL, UrlNotResolvable, normalize_url
+from woob.browser.url import (
+    BrowserParamURL, UrlNotResolvable, URLDispatcher, normalize_url,
+    regex_literal_prefix, select_reverse_pattern,
+)
 
 
 # Mock that allows to represent a Page
@@ -654,3 +657,128 @@ def test_normalize_url():
     ]
     for todo, expected in tests:
         assert normalize_url(todo) == expected
+
+
+def test_regex_literal_prefix():
+    tests = [
+        (r'https://example\.org/accounts/(?P<id>\d+)', 'https://example.org/accounts/'),
+        (r'https://example\.org/list\?page=\d+', 'https://example.org/list?page='),
+        (r'https://example\.org/pages?/', 'https://example.org/page'),
+        (r'https://example\.org/a{2}', 'https://example.org/'),
+        (r'https://example\.org/a+', 'https://example.org/a'),
+        (r'https?://example\.org/', 'http'),
+        (r'(?i)https://example\.org/', ''),
+        (r'.*/login', ''),
+        (r'https://a\.test/x|https://b\.test/y', ''),
+        (r'https://example\.org/(?:a|b)', 'https://example.org/'),
+        (r'https://example\.org/[|(]', 'https://example.org/'),
+        (r'https://example\.org/\|a', 'https://example.org/|a'),
+        (r'https://example\.org/(?i:a)', 'https://example.org/'),
+    ]
+    for regex, expected in tests:
+        assert regex_literal_prefix(regex) == expected
+
+
+def test_dispatcher():
+    class MyBrowser(PagesBrowser):
+        BASEURL = 'https://example.org/'
+
+        login = URL(r'login', RawPage)
+        accounts = URL(r'accounts/(?P<id>\d+)', r'https://other\.org/accounts', RawPage)
+        anything = URL(r'https?://.*/accounts', RawPage)
+        home = URL(r'$', RawPage)
+
+    browser = MyBrowser()
+    dispatcher = URLDispatcher(browser, browser._urls)
+
+    def candidates(url):
+        return [name for name, _ in dispatcher.candidates(url)]
+
+    assert candidates('https://example.org/login') == ['login', 'anything', 'home']
+    assert candidates('https://example.org/accounts/1') == ['accounts', 'anything', 'home']
+    assert candidates('https://other.org/accounts') == ['accounts', 'anything']
+    assert candidates('https://unknown.org/') == ['anything']
+
+    # each match is among the candidates
+    for url in ('https://example.org/login', 'https://other.org/accounts', 'https://example.org/'):
+        assert [name for name, url_obj in browser._urls.items() if url_obj.match(url)] == [
+            name for name, url_obj in dispatcher.candidates(url) if url_obj.match(url)
+        ]
+
+    assert dispatcher.is_valid(browser)
+    browser.BASEURL = 'https://example.com/'
+    assert not dispatcher.is_valid(browser)
+
+
+@responses.activate
+def test_dispatcher_alternation():
+    responses.get('https://b.test/y', body='')
+
+    class MyBrowser(PagesBrowser):
+        either = URL(r'https://a\.test/x|https://b\.test/y', RawPage)
+
+    browser = MyBrowser()
+    dispatcher = URLDispatcher(browser, browser._urls)
+    assert [name for name, _ in dispatcher.candidates('https://b.test/y')] == ['either']
+
+    browser.location('https://b.test/y')
+    assert isinstance(browser.page, RawPage)
+
+
+@responses.activate
+def test_dispatcher_updates():
+    responses.get('https://example.org/page', body='')
+    responses.get('https://example.com/page', body='')
+
+    class FirstPage(RawPage):
+        pass
+
+    class SecondPage(RawPage):
+        pass
+
+    class MyBrowser(PagesBrowser):
+        BASEURL = 'https://example.org/'
+
+        first = URL(r'page', FirstPage)
+
+    browser = MyBrowser()
+    browser.location('https://example.org/page')
+    assert isinstance(browser.page, FirstPage)
+
+    browser.BASEURL = 'https://example.com/'
+    browser.location('https://example.com/page')
+    assert isinstance(browser.page, FirstPage)
+
+    browser.second = URL(r'page', SecondPage)
+    browser.location('https://example.com/page')
+    assert isinstance(browser.page, FirstPage)
+
+    del browser.first
+    browser.location('https://example.com/page')
+    assert isinstance(browser.page, SecondPage)
+
+
+def test_select_reverse_pattern():
+    regexes = (r'/accounts/(?P<id>\d+)(?:/page/(?P<page>\d+))?', r'/accounts\?q=(?P<query>.*)')
+
+    assert select_reverse_pattern(regexes, frozenset()) is None
+    assert select_reverse_pattern(regexes, frozenset(['id'])) == '/accounts/%(id)s'
+    assert select_reverse_pattern(regexes, frozenset(['id', 'page'])) == '/accounts/%(id)s/page/%(page)s'
+    assert select_reverse_pattern(regexes, frozenset(['query'])) == '/accounts?q=%(query)s'
+    assert select_reverse_pattern(regexes, frozenset(['id', 'query'])) is None
+
+
+def test_build_cached_patterns():
+    class MyBrowser(PagesBrowser):
+        BASEURL = 'https://example.org/'
+
+        accounts = URL(r'accounts/(?P<id>\d+)(?:/page/(?P<page>\d+))?')
+
+    browser = MyBrowser()
+    for page in range(1, 4):
+        assert browser.accounts.build(id=1, page=page) == 'https://example.org/accounts/1/page/%d' % page
+    assert browser.accounts.build(id=2) == 'https://example.org/accounts/2'
+    assert browser.accounts.build(id=2, params={'a': 'b'}) == 'https://example.org/accounts/2?a=b'
+
+    with pytest.raises(UrlNotResolvable):
+        browser.accounts.build(page=1)
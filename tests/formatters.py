@@ -20,6 +20,9 @@
 from tempfile import mkstemp
 from os import remove
 
+import pytest
+
+from woob.tools import json
 from woob.tools.application.formatters.json import (
     JsonFormatter, JsonLineFormatter,
 )
@@ -42,12 +45,25 @@ def formatter_test_output(Formatter, obj):
     return res
 
 
-def test_json():
+@pytest.fixture
+def json_backend(monkeypatch):
+    monkeypatch.setattr(json, '_backend', json.JsonBackend())
+
+
+def test_json(json_backend):
     assert formatter_test_output(JsonFormatter, {'foo': 'bar'}) == '[{"foo": "bar"}]\n'
     assert formatter_test_output(JsonLineFormatter, {'foo': 'bar'}) == '{"foo": "bar"}\n'
     assert formatter_test_output(JsonLineFormatter, {'foo': 'bar'}) == '{"foo": "bar"}\n'
 
 
+def test_json_orjson(monkeypatch):
+    pytest.importorskip('orjson')
+    monkeypatch.setattr(json, '_backend', json.OrjsonBackend())
+
+    assert formatter_test_output(JsonFormatter, {'foo': 'bar'}) == '[{"foo":"bar"}]\n'
+    assert formatter_test_output(JsonLineFormatter, {'foo': 'bar'}) == '{"foo":"bar"}\n'
+
+
 def test_table():
     assert formatter_test_output(TableFormatter, {'foo': 'bar'}) == (
         '┌─────┐\n'
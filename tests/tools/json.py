@@ -0,0 +1,104 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from woob.capabilities.base import BaseObject, NotAvailable
+from woob.tools import json
+
+
+@pytest.fixture(params=list(json.JSON_BACKENDS))
+def backend(request, monkeypatch):
+    try:
+        backend = json.JSON_BACKENDS[request.param]()
+    except ImportError:
+        pytest.skip('%s is not installed' % request.param)
+    monkeypatch.setattr(json, '_backend', backend)
+    return backend
+
+
+def test_loads(backend):
+    document = '{"label": "Crédit", "amounts": [1, 2.5, null], "ok": true}'
+    expected = {'label': 'Crédit', 'amounts': [1, 2.5, None], 'ok': True}
+
+    assert json.loads(document) == expected
+    assert json.loads(document.encode('utf-8')) == expected
+    # handled by every backend, even when the library does not support it
+    assert repr(json.loads('[NaN]')) == '[nan]'
+
+    with pytest.raises(ValueError):
+        json.loads(b'{"label": ')
+
+
+def test_dumps(backend):
+    obj = BaseObject('42', backend='bank')
+    obj.url = NotAvailable
+
+    assert json.loads(json.dumps({
+        'account': obj,
+        'date': date(2024, 2, 29),
+        'balance': Decimal('12.30'),
+        1: '/',
+        'big': 2 ** 70,
+    })) == {
+        'account': {'id': '42@bank', 'url': None},
+        'date': '2024-02-29',
+        'balance': 12.3 if backend.name == 'ujson' else '12.30',
+        '1': '/',
+        'big': float(2 ** 70) if backend.name == 'orjson' else 2 ** 70,
+    }
+
+
+def test_set_json_backend(monkeypatch):
+    monkeypatch.setattr(json, '_backend', None)
+    monkeypatch.delenv('WOOB_JSON_BACKEND', raising=False)
+    # other backends are only used when they are chosen
+    assert json.get_json_backend().name == 'json'
+
+    monkeypatch.setenv('WOOB_JSON_BACKEND', 'ujson')
+    try:
+        assert json.set_json_backend().name == 'ujson'
+    except ImportError:
+        pass
+
+    monkeypatch.setenv('WOOB_JSON_BACKEND', 'unknown')
+    with pytest.raises(ValueError, match='WOOB_JSON_BACKEND'):
+        json.set_json_backend()
+
+    with pytest.raises(ValueError):
+        json.set_json_backend('unknown')
+
+
+@pytest.mark.parametrize('path,expected', (
+    ('', [{'data': [{'id': 1, 'tags': ['a']}, {'id': 2, 'tags': []}], 'total': 2}]),
+    ('total', [2]),
+    ('total.', [2]),
+    ('data.*.id', [1, 2]),
+    ('data.*.tags.*', ['a']),
+    ('*', [[{'id': 1, 'tags': ['a']}, {'id': 2, 'tags': []}], 2]),
+    ('data.*.notfound', []),
+    ('total.id', []),
+))
+def test_mini_jsonpath(path, expected):
+    doc = {'data': [{'id': 1, 'tags': ['a']}, {'id': 2, 'tags': []}], 'total': 2}
+
+    assert list(json.mini_jsonpath(doc, path)) == expected
+    assert json.compile_jsonpath(path) is json.compile_jsonpath(path)
@@ -0,0 +1,155 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+
+import random
+
+import pytest
+
+from woob.tools.pdf import (
+    ApproxRectDict, ApproxVecDict, Rect, TableIndex, TextRect, build_rows, find_in_table, get_pdf_rows,
+    uniq_lines,
+)
+
+
+def make_pdf(pages):
+    """
+    Build a PDF with a table on each page, from a list of rows of cell texts.
+    """
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for rows in pages:
+        stream = []
+        for j, row in enumerate(rows):
+            for i, text in enumerate(row):
+                x, y = 50 + i * 150, 700 - j * 30
+                # tables are made of lines
+                edges = ((x, y, x + 150, y), (x, y + 30, x + 150, y + 30), (x, y, x, y + 30), (x + 150, y, x + 150, y + 30))
+                for edge in edges:
+                    stream.append('%d %d m %d %d l S' % edge)
+                stream.append('BT /F1 12 Tf %d %d Td (%s) Tj ET' % (x + 10, y + 10, text))
+        stream = '\n'.join(stream)
+        objects.append('<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(
+            '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R '
+            '/Resources << /Font << /F1 3 0 R >> >> >>' % (len(objects))
+        )
+        kids.append('%d 0 R' % len(objects))
+    objects[1] = '<< /Type /Pages /Kids [%s] /Count %d >>' % (' '.join(kids), len(kids))
+
+    pdf = b'%PDF-1.4\n'
+    offsets = []
+    for n, obj in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += ('%d 0 obj\n%s\nendobj\n' % (n, obj)).encode('latin-1')
+    xref = len(pdf)
+    pdf += ('xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)).encode('ascii')
+    for offset in offsets:
+        pdf += ('%010d 00000 n \n' % offset).encode('ascii')
+    pdf += ('trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)).encode('ascii')
+    return pdf
+
+
+def test_table_index():
+    rnd = random.Random(0)
+    for _ in range(50):
+        rows = []
+        y = 0
+        for _ in range(rnd.randint(1, 10)):
+            height = rnd.randint(1, 30)
+            x = 0
+            row = []
+            for _ in range(rnd.randint(1, 5)):
+                width = rnd.randint(1, 50)
+                row.append(Rect(x, y, x + width, y + height))
+                x += width
+            rows.append(row)
+            # rows may overlap
+            y += rnd.randint(0, height + 5)
+
+        index = TableIndex(rows)
+        for _ in range(100):
+            x0, y0 = rnd.uniform(-5, 200), rnd.uniform(-5, y + 30)
+            rect = TextRect(x0, y0, x0 + rnd.uniform(0, 20), y0 + rnd.uniform(0, 15), '')
+            assert index.find(rect) == find_in_table(rows, rect)
+
+
+def test_approx_dicts():
+    points = ApproxVecDict({(10, 20): 'a'})
+    assert points[10, 20] == points[11, 19] == points[9, 21] == 'a'
+    assert points.get((12, 20)) is None
+    with pytest.raises(KeyError):
+        points[10, 22]
+
+    rects = ApproxRectDict({(10, 20, 10, 50): 'v', (10, 20, 60, 20): 'h', (1, 2, 3, 4): 'o'})
+    assert rects[11, 19, 11, 51] == 'v'
+    assert rects[9, 21, 61, 21] == 'h'
+    assert rects[1, 2, 3, 4] == 'o'
+    for coords in ((12, 20, 12, 50), (10, 20, 62, 20), (1, 2, 3, 5)):
+        with pytest.raises(KeyError):
+            rects[coords]
+
+
+def test_build_rows():
+    lines = []
+    for j in range(3):
+        for i in range(2):
+            x, y = i * 100, j * 20
+            lines += [
+                Rect(x, y, x + 100, y), Rect(x, y + 20, x + 100, y + 20),
+                Rect(x, y, x, y + 20), Rect(x + 100, y, x + 100, y + 20),
+            ]
+    # shared edges are drawn twice, or slightly moved
+    lines.append(Rect(1, 0, 101, 0))
+
+    lines = uniq_lines(lines)
+    assert len(lines) == 17
+    assert build_rows(lines) == [
+        [Rect(0, y, 100, y + 20), Rect(100, y, 200, y + 20)] for y in (0, 20, 40)
+    ]
+
+
+PAGES = [
+    [['Date', 'Label', 'Amount'], ['01/02', 'Coffee', '-2.50']],
+    [['Date', 'Label', 'Amount'], ['03/02', 'Salary', '1200.00'], ['04/02', 'Rent', '-600.00']],
+    [['Total', '598.00']],
+]
+
+
+def test_get_pdf_rows():
+    pytest.importorskip('pdfminer')
+
+    rows = list(get_pdf_rows(make_pdf(PAGES)))
+    assert rows == [[[[cell] for cell in row] for row in page] for page in PAGES]
+
+    assert list(get_pdf_rows(make_pdf(PAGES), workers=2)) == rows
+
+
+def test_get_pdf_rows_cache():
+    pytest.importorskip('pdfminer')
+
+    cache = {}
+    data = make_pdf(PAGES)
+    rows = list(get_pdf_rows(data, cache=cache))
+    assert list(cache.values()) == [rows]
+
+    key, = cache
+    cache[key] = [[[['cached']]]]
+    assert list(get_pdf_rows(data, cache=cache)) == [[[['cached']]]]
+    # the layout option is a part of the key
+    assert list(get_pdf_rows(data, miner_layout=False, cache=cache)) == list(get_pdf_rows(data, miner_layout=False))
+    assert len(cache) == 2
@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 
-from argparse import ArgumentParser, FileType
+from argparse import ArgumentParser
 from base64 import b64decode
-import json
 import mimetypes
 import os
 from pathlib import Path
 from urllib.parse import urlparse
 
+from woob.browser.har import load_har
 from woob.tools.request import to_curl
 
 
@@ -93,18 +93,20 @@ def extract(n, destdir):
             write_body(entry, fd)
 
     parser = ArgumentParser()
-    parser.add_argument('file', type=FileType('r'), help='HAR file to extract')
+    parser.add_argument('file', help='HAR file to extract (.har, .harl or .harl.gz)')
     parser.add_argument('destdir', nargs='?', default=None, help='Destination directory for extracted files')
     args = parser.parse_args()
 
     if args.destdir is None:
         # Automatically generate destdir if not provided
-        if args.file.name.endswith('.har'):
-            args.destdir = args.file.name[:-4]
+        for ext in ('.har', '.harl', '.harl.gz'):
+            if args.file.endswith(ext):
+                args.destdir = args.file[:-len(ext)]
+                break
         else:
-            args.destdir = f'{args.file.name}_content'
+            args.destdir = f'{args.file}_content'
 
-    data = json.load(args.file)
+    data = load_har(args.file)
     for n in range(len(data['log']['entries'])):
         print('extracting request', n)
         extract(n, args.destdir)
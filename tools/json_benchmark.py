@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Compare the JSON backends of :mod:`woob.tools.json` on a large API response.
+
+For each installed backend, it measures the decoding of the response by
+:class:`woob.browser.pages.JsonPage`, and the encoding of the result by the
+``json`` formatter.
+
+Usage: json_benchmark.py [-n TRANSACTIONS] [-r ROUNDS]
+"""
+
+import argparse
+from decimal import Decimal
+import json as stdlib_json
+import random
+from time import perf_counter
+
+import requests
+
+from woob.browser import Browser
+from woob.browser.pages import JsonPage
+from woob.tools import json
+
+
+def build_document(count):
+    rnd = random.Random(0)
+    return {
+        'account': {'id': 'FR7630001007941234567890185', 'label': 'Compte chèque', 'currency': 'EUR'},
+        'transactions': [
+            {
+                'id': 'tr-%08d' % n,
+                'date': '2024-%02d-%02d' % (n % 12 + 1, n % 28 + 1),
+                'label': 'CARTE %d PAIEMENT MAGASIN n°%d' % (n, rnd.randint(1, 10 ** 6)),
+                'amount': round(rnd.uniform(-500, 500), 2),
+                'categories': ['achats', 'alimentation'] if n % 3 else [],
+                'coming': n % 10 == 0,
+                'details': {'merchant': 'Magasin %d' % (n % 97), 'mcc': 5411, 'country': 'FR'},
+            }
+            for n in range(count)
+        ],
+    }
+
+
+def build_response(content):
+    response = requests.Response()
+    response._content = content
+    response._content_consumed = True
+    response.status_code = 200
+    response.url = 'https://woob.test/transactions'
+    response.headers['Content-Type'] = 'application/json'
+    return response
+
+
+def measure(func, rounds):
+    best = None
+    for _ in range(rounds):
+        start = perf_counter()
+        func()
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--transactions', type=int, default=50000, help='number of transactions')
+    parser.add_argument('-r', '--rounds', type=int, default=5, help='rounds of each measure, the best is kept')
+    args = parser.parse_args()
+
+    document = build_document(args.transactions)
+    content = stdlib_json.dumps(document).encode('utf-8')
+    browser = Browser()
+    print('Document of %.1f MB, best of %d rounds' % (len(content) / 1e6, args.rounds))
+    print('%-8s %12s %12s %12s' % ('backend', 'page (ms)', 'text (ms)', 'dumps (ms)'))
+
+    results = []
+    for name, klass in json.JSON_BACKENDS.items():
+        try:
+            backend = klass()
+        except ImportError:
+            print('%-8s not installed' % name)
+            continue
+        json.set_json_backend(name)
+
+        # decoded from bytes
+        page = measure(lambda: JsonPage(browser, build_response(content)).doc, args.rounds)
+        # decoded from the text, like before bytes were given to backends
+        text = measure(lambda: backend.loads(build_response(content).text), args.rounds)
+
+        doc = backend.loads(content)
+        doc['account']['balance'] = Decimal('1234.56')
+        dumps = measure(lambda: json.dumps(doc), args.rounds)
+        results.append((name, page, text, dumps))
+
+    # speedup of pages, compared to the json module decoding text
+    reference = dict((name, text) for name, page, text, dumps in results)['json']
+    for name, page, text, dumps in results:
+        print('%-8s %12.1f %12.1f %12.1f   x%.2f' % (name, page * 1e3, text * 1e3, dumps * 1e3, reference / page))
+
+    browser.deinit()
+
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,7 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 from decimal import Decimal
+import os
 
 from woob.capabilities.bill import CapDocument, Detail, Subscription
 from woob.capabilities.profile import CapProfile
@@ -214,20 +215,54 @@ def do_download(self, line, force_pdf=False):
             extension = document.format if not force_pdf else 'pdf'
             dest = document.id + (f'.{extension}' if extension else '')
 
-        for buf in self.do('download_document' if not force_pdf else 'download_document_pdf', document, backends=names):
-            if buf:
-                if dest == "-":
-                    self.stdout.buffer.write(buf)
-                else:
-                    try:
-                        with open(dest, 'wb') as f:
-                            f.write(buf)
-                        if not document.has_file:
-                            print('Warning: document.has_file is falsy but the file is available', file=self.stderr)
-                    except IOError as e:
-                        print('Unable to write document in "%s": %s' % (dest, e), file=self.stderr)
-                        return 1
-                return
+        if dest == "-":
+            for buf in self.iter_document_chunks(document, force_pdf):
+                self.stdout.buffer.write(buf)
+            return
+
+        try:
+            if self.write_document(document, dest, force_pdf) and not document.has_file:
+                print('Warning: document.has_file is falsy but the file is available', file=self.stderr)
+        except IOError as e:
+            print('Unable to write document in "%s": %s' % (dest, e), file=self.stderr)
+            return 1
+
+    def iter_document_chunks(self, document, force_pdf):
+        # backends are called directly, as the count and the condition given
+        # by the user apply to listed objects, not to chunks of a document
+        if force_pdf:
+            # conversion needs the whole document
+            return self.woob.do('download_document_pdf', document, backends=(document.backend,))
+        return self.woob.do('download_document_stream', document, backends=(document.backend,))
+
+    def write_document(self, document, dest, force_pdf):
+        """
+        Write a document to a file as it is downloaded.
+
+        Data is written in a temporary file, renamed to ``dest`` once the
+        download is complete.
+
+        :return: True if the document has been written, False if there is
+            no content
+        """
+        part_path = dest + '.part'
+        written = False
+        try:
+            with open(part_path, 'wb') as f:
+                for buf in self.iter_document_chunks(document, force_pdf):
+                    if buf:
+                        f.write(buf)
+                        written = True
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+
+        if written:
+            os.replace(part_path, dest)
+        else:
+            os.remove(part_path)
+        return written
 
     def do_download_pdf(self, line):
         """
@@ -257,24 +292,15 @@ def download_subscription(self, subscription, force_pdf):
         return True
 
     def download_doc(self, document, force_pdf):
-        if force_pdf:
-            method = 'download_document_pdf'
-        else:
-            method = 'download_document'
-
         extension = document.format if not force_pdf else 'pdf'
         dest = document.id + (f'.{extension}' if extension else '')
 
-        for buf in self.do(method, document, backends=(document.backend,)):
-            if buf:
-                try:
-                    with open(dest, 'wb') as f:
-                        f.write(buf)
-                        if not document.has_file:
-                            print('Warning: document.has_file is falsy but the file is available', file=self.stderr)
-                except IOError as e:
-                    print('Unable to write bill in "%s": %s' % (dest, e), file=self.stderr)
-                    return False
+        try:
+            if self.write_document(document, dest, force_pdf) and not document.has_file:
+                print('Warning: document.has_file is falsy but the file is available', file=self.stderr)
+        except IOError as e:
+            print('Unable to write bill in "%s": %s' % (dest, e), file=self.stderr)
+            return False
         return True
 
     def do_profile(self, line):
@@ -16,24 +16,326 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 
+from base64 import b64decode
+from http.client import HTTPMessage
+from io import BytesIO
+import inspect
+import random
+from threading import Lock
+from time import monotonic
+from urllib.parse import parse_qsl, urlsplit
+
 import requests
+from urllib3 import HTTPResponse
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.poolmanager import pool_classes_by_scheme
+from urllib3.util.retry import Retry
 from urllib3.util.ssl_ import create_urllib3_context
 
+from .har import load_har
+
+
+__all__ = ['HTTPAdapter', 'LowSecHTTPAdapter', 'HARReplayAdapter', 'HARReplayMiss', 'RetryPolicy']
+
+
+_RETRY_HAS_JITTER = 'backoff_jitter' in inspect.signature(Retry.__init__).parameters
+
+
+class RetryPolicy(Retry):
+    """
+    Retry policy of the transport, with exponential backoff.
+
+    It is a :class:`urllib3.util.Retry` with the defaults needed to survive
+    transient errors of websites, a random jitter added to the backoff, an
+    overall deadline, and logging of each retry. It is used as the
+    ``max_retries`` of :class:`HTTPAdapter`, see
+    :attr:`woob.browser.browsers.Browser.RETRY_POLICY`.
+
+    Only idempotent methods are retried after the request has been sent (on
+    a read error or an error status). When retries are exhausted or the
+    deadline is reached on an error status, the last response is returned,
+    so it is handled as usual by the browser.
+
+    :param total: maximum number of retries
+    :param status_forcelist: status codes to retry
+    :param backoff_factor: the n-th retry waits ``backoff_factor * 2 ** (n - 1)``
+        seconds (the first retry may not wait, depending on the urllib3
+        version)
+    :param backoff_jitter: maximum random number of seconds added to each
+        backoff
+    :param deadline: maximum number of seconds spent retrying, from the
+        first failure, or None
+    :param logger: logger used to report retries
+    """
+
+    DEFAULT_STATUS_FORCELIST = frozenset((429, 500, 502, 503, 504))
+
+    def __init__(
+        self, total=3, *args, status_forcelist=DEFAULT_STATUS_FORCELIST,
+        backoff_factor=0.5, backoff_jitter=0.5, deadline=None, logger=None,
+        raise_on_status=False, started=None, **kwargs
+    ):
+        if _RETRY_HAS_JITTER:
+            kwargs['backoff_jitter'] = backoff_jitter
+        super().__init__(
+            total, *args, status_forcelist=status_forcelist,
+            backoff_factor=backoff_factor, raise_on_status=raise_on_status, **kwargs
+        )
+        if not _RETRY_HAS_JITTER:
+            self.backoff_jitter = backoff_jitter
+        self.deadline = deadline
+        self.logger = logger
+        self.started = started
+
+    def new(self, **kwargs):
+        kwargs.setdefault('backoff_jitter', self.backoff_jitter)
+        kwargs.setdefault('deadline', self.deadline)
+        kwargs.setdefault('logger', self.logger)
+        kwargs.setdefault('started', self.started)
+        return super().new(**kwargs)
+
+    if not _RETRY_HAS_JITTER:
+        # urllib3 < 2 has no backoff_jitter
+        def get_backoff_time(self):
+            backoff = super().get_backoff_time()
+            if backoff and self.backoff_jitter:
+                backoff += random.uniform(0, self.backoff_jitter)
+            return backoff
+
+    def _deadline_exceeded(self, now, delay=0):
+        return self.deadline is not None and self.started is not None and now + delay - self.started > self.deadline
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if not super().is_retry(method, status_code, has_retry_after):
+            return False
+        # once the deadline is reached, the error response is returned as is
+        # without counting another retry
+        return self.raise_on_status or not self._deadline_exceeded(monotonic())
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        new_retry = super().increment(method, url, response, error, _pool, _stacktrace)
+
+        now = monotonic()
+        if new_retry.started is None:
+            new_retry.started = now
+
+        delay = new_retry.get_backoff_time()
+        if response is not None and self.respect_retry_after_header:
+            delay = max(delay, new_retry.get_retry_after(response) or 0)
+
+        if new_retry._deadline_exceeded(now, delay):
+            # like when retries are exhausted, urllib3 returns the response
+            # instead of raising if raise_on_status is false
+            reason = error or ResponseError('deadline of %ss exceeded' % new_retry.deadline)
+            raise MaxRetryError(_pool, url, reason) from reason
+
+        if new_retry.logger is not None:
+            if _pool is not None:
+                host = _pool.host
+                if _pool.port not in (None, {'http': 80, 'https': 443}.get(_pool.scheme)):
+                    host = '%s:%s' % (host, _pool.port)
+                url = '%s://%s%s' % (_pool.scheme, host, url)
+            attempts = len(new_retry.history)
+            new_retry.logger.info(
+                'Retrying (%d/%s) %s %s after %s, in %.1fs',
+                attempts, new_retry.total + attempts if isinstance(new_retry.total, int) else '-', method, url,
+                error if error is not None else 'status %s' % response.status, delay,
+            )
+        return new_retry
+
+
+class _TimedConnectionMixin:
+    """
+    Measure the time to establish connections.
+    """
+
+    _new_conn_time = None
+    timings = None
+
+    def _new_conn(self):
+        start = monotonic()
+        sock = super()._new_conn()
+        self._new_conn_time = monotonic() - start
+        return sock
+
+    def connect(self):
+        start = monotonic()
+        super().connect()
+        total = monotonic() - start
+        connect = self._new_conn_time if self._new_conn_time is not None else total
+        # for HTTPS, it also includes the CONNECT request to a proxy
+        self.timings = {'connect': connect, 'tls': total - connect}
+
+    def pop_timings(self):
+        """
+        Get the timings of the connection, if it has just been established.
+        """
+        timings, self.timings = self.timings, None
+        return timings or {'connect': 0., 'tls': 0.}
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+TIMED_POOL_CLASSES = {
+    'http': TimedHTTPConnectionPool,
+    'https': TimedHTTPSConnectionPool,
+}
 
-__all__ = ['HTTPAdapter', 'LowSecHTTPAdapter']
 
+_SIZES_LOCK = Lock()
 
-class HTTPAdapter(requests.adapters.HTTPAdapter):
+
+class _BodySizesMixin:
+    """
+    Count the bytes of the bodies of responses, as received and after
+    decompression.
+    """
+
+    received_bytes = 0
+    """Bytes received for the bodies of responses, before decompression."""
+
+    decoded_bytes = 0
+    """Bytes of the bodies of responses, after decompression."""
+
+    def _count_sizes(self, response):
+        sizes = response.sizes = {'received': 0, 'decoded': 0}
+        raw = response.raw
+        if not hasattr(raw, 'stream') or not hasattr(raw, 'tell'):
+            return
+
+        # iter_content(), and so the content attribute, read the body with
+        # stream(), even for responses which are not streamed
+        stream = raw.stream
+
+        def counting_stream(*args, **kwargs):
+            for chunk in stream(*args, **kwargs):
+                self._add_sizes(sizes, raw.tell() - sizes['received'], len(chunk))
+                yield chunk
+            # the end of a compressed body may not give any chunk
+            self._add_sizes(sizes, raw.tell() - sizes['received'], 0)
+
+        raw.stream = counting_stream
+
+    def _add_sizes(self, sizes, received, decoded):
+        with _SIZES_LOCK:
+            sizes['received'] += received
+            sizes['decoded'] += decoded
+            self.received_bytes += received
+            self.decoded_bytes += decoded
+
+
+class HTTPAdapter(_BodySizesMixin, requests.adapters.HTTPAdapter):
     """
     Custom Adapter class with extra features.
 
+    Responses have a ``timings`` dict attribute, with the ``ttfb`` (time
+    from the sending of the request to the reception of headers) and the
+    ``received`` time (:func:`time.monotonic` when headers were received).
+    When a connection has been opened, its ``connect`` and ``tls`` times
+    are added, or 0 when an existing connection has been reused.
+
+    They also have a ``sizes`` dict attribute, with the bytes of the body
+    ``received`` and ``decoded`` after decompression, updated as the body is
+    read. The totals of every response of the adapter are in
+    :attr:`received_bytes` and :attr:`decoded_bytes`. Only bodies read with
+    :meth:`requests.Response.iter_content` or
+    :attr:`requests.Response.content` are counted.
+
     :param proxy_headers: headers to send to proxy (if any)
     :type proxy_headers: dict
+    :param pool_registry: take connection pools from this registry instead
+        of creating private ones (optional)
+    :type pool_registry: :class:`woob.browser.pools.ConnectionPoolRegistry`
     """
     def __init__(self, *args, **kwargs):
         self._proxy_headers = kwargs.pop('proxy_headers', {})
+        self.pool_registry = kwargs.pop('pool_registry', None)
         super().__init__(*args, **kwargs)
 
+    def pool_registry_key(self):
+        """
+        Key identifying the pools this adapter can share with other ones.
+
+        Adapters changing how connections are established (SSL context,
+        socket options, etc.) get distinct pools as long as they are of
+        different classes. Override it if instances of the same class may
+        use different settings.
+        """
+        return type(self)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self.pool_registry is None:
+            super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+            self._enable_timings(self.poolmanager)
+            return
+
+        # save these values for pickling
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+
+        self.poolmanager = self.pool_registry.pool_manager(self.pool_registry_key(), **pool_kwargs)
+        self._enable_timings(self.poolmanager)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        if (
+            self.pool_registry is None
+            or proxy in self.proxy_manager
+            or proxy.lower().startswith('socks')
+        ):
+            return self._enable_timings(super().proxy_manager_for(proxy, **proxy_kwargs))
+
+        manager = self.proxy_manager[proxy] = self.pool_registry.proxy_manager(
+            self.pool_registry_key(), proxy, self.proxy_headers(proxy), **proxy_kwargs
+        )
+        return self._enable_timings(manager)
+
+    def _enable_timings(self, manager):
+        # managers with specific pools, like SOCKS ones, are left untouched
+        if manager.pool_classes_by_scheme is pool_classes_by_scheme:
+            manager.pool_classes_by_scheme = TIMED_POOL_CLASSES
+        return manager
+
+    def send(self, request, *args, **kwargs):
+        start = monotonic()
+        response = super().send(request, *args, **kwargs)
+        received = monotonic()
+
+        response.timings = {'ttfb': received - start, 'received': received}
+        connection = getattr(response.raw, '_connection', None)
+        if isinstance(connection, _TimedConnectionMixin):
+            response.timings.update(connection.pop_timings())
+        self._count_sizes(response)
+        return response
+
+    def close(self):
+        if self.pool_registry is None:
+            return super().close()
+
+        # shared managers are kept open for other adapters, only close the
+        # private ones (SOCKS proxies).
+        shared = self.pool_registry.is_shared
+        for manager in self.proxy_manager.values():
+            if not shared(manager):
+                manager.clear()
+        self.proxy_manager.clear()
+
     def add_proxy_header(self, key, value):
         self._proxy_headers[key] = value
 
@@ -67,3 +369,179 @@ def proxy_manager_for(self, *args, **kwargs):
         context = create_urllib3_context(ciphers="DEFAULT:@SECLEVEL=1")
         kwargs['ssl_context'] = context
         return super().proxy_manager_for(*args, **kwargs)
+
+
+class HARReplayMiss(requests.exceptions.ConnectionError):
+    """
+    Raised by :class:`HARReplayAdapter` when no recorded response matches
+    a request.
+    """
+
+
+class HARReplayAdapter(HTTPAdapter):
+    """
+    Adapter serving responses recorded in a HAR file instead of using the
+    network.
+
+    It reads files saved with ``responses_dirname`` (see
+    :meth:`woob.browser.browsers.Browser.save_response`), in any format
+    supported by :func:`woob.browser.har.load_har`, so a browser can run
+    against a recorded session without network access, for example to
+    benchmark or test modules. See :meth:`woob.browser.browsers.Browser.replay_har`.
+
+    Requests are matched on method, URL and body. When several recorded
+    entries match, they are served in the recorded order, and the last one
+    is served again once they have all been used.
+
+    :param har: path of the HAR file, or already loaded HAR object
+    :param ignore_params: names of query string and form parameters which
+        are not compared, for example timestamps or nonces
+    :param match_body: compare request bodies
+    :param strict: if False, when no entry matches exactly, use an entry
+        with the same method and path, regardless of body and query string
+    """
+
+    # headers describing the transfer, which do not apply to the recorded
+    # (decoded) content
+    SKIPPED_HEADERS = frozenset(('content-encoding', 'content-length', 'transfer-encoding'))
+
+    def __init__(self, har, *args, ignore_params=(), match_body=True, strict=False, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if isinstance(har, str):
+            har = load_har(har)
+
+        self.ignore_params = frozenset(ignore_params)
+        self.match_body = match_body
+        self.strict = strict
+
+        self.entries = har['log']['entries']
+        self.served = [False] * len(self.entries)
+        self.served_lock = Lock()
+
+        self.index = {}
+        self.fuzzy_index = {}
+        for n, entry in enumerate(self.entries):
+            request = entry['request']
+            url_key, path_key = self.url_keys(request['url'])
+            self.index.setdefault((request['method'], url_key), []).append(n)
+            self.fuzzy_index.setdefault((request['method'], path_key), []).append(n)
+
+    def url_keys(self, url):
+        """
+        Keys to compare URLs exactly, and only on their path.
+        """
+        parts = urlsplit(url)
+        path_key = (parts.scheme, parts.netloc.lower(), parts.path)
+        query = sorted(
+            (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if k not in self.ignore_params
+        )
+        return path_key + (tuple(query),), path_key
+
+    def body_key(self, body, content_type):
+        if body is None:
+            body = b''
+        elif isinstance(body, str):
+            body = body.encode('utf-8')
+
+        if content_type.startswith('application/x-www-form-urlencoded'):
+            return tuple(sorted(
+                (k, v) for k, v in parse_qsl(body.decode('latin-1'), keep_blank_values=True)
+                if k not in self.ignore_params
+            ))
+        return body
+
+    def recorded_body_key(self, request):
+        post_data = request.get('postData')
+        if post_data is None or 'text' not in post_data:
+            return self.body_key(None, '')
+
+        encoding = 'latin-1' if post_data.get('x-binary') else 'utf-8'
+        return self.body_key(post_data['text'].encode(encoding), post_data.get('mimeType', ''))
+
+    def find_entry(self, request):
+        """
+        Find the recorded entry to serve for a request.
+
+        :param request: the prepared request
+        :rtype: dict
+        :raises: :class:`HARReplayMiss`
+        """
+        url_key, path_key = self.url_keys(request.url)
+        candidates = self.index.get((request.method, url_key), [])
+
+        if candidates and self.match_body:
+            body_key = self.body_key(request.body, request.headers.get('Content-Type', ''))
+            same_body = [n for n in candidates if self.recorded_body_key(self.entries[n]['request']) == body_key]
+            if same_body or self.strict:
+                candidates = same_body
+
+        if not candidates and not self.strict:
+            candidates = self.fuzzy_index.get((request.method, path_key), [])
+
+        if not candidates:
+            raise HARReplayMiss('No recorded response for %s %s' % (request.method, request.url), request=request)
+
+        with self.served_lock:
+            n = next((n for n in candidates if not self.served[n]), candidates[-1])
+            self.served[n] = True
+        return self.entries[n]
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        entry = self.find_entry(request)
+        recorded = entry['response']
+
+        if not recorded.get('status'):
+            # recorded without response, because of a timeout or another error
+            raise requests.exceptions.ConnectionError(
+                'Recorded request %s %s got no response' % (request.method, request.url),
+                request=request,
+            )
+
+        content = recorded.get('content', {})
+        if content.get('encoding') == 'base64':
+            body = b64decode(content.get('text', ''))
+        else:
+            body = content.get('text', '').encode('utf-8')
+
+        headers = [
+            (header['name'], header['value']) for header in recorded['headers']
+            if header['name'].lower() not in self.SKIPPED_HEADERS
+        ]
+        headers.append(('Content-Length', str(len(body))))
+
+        # used by requests to extract cookies
+        message = HTTPMessage()
+        for name, value in headers:
+            message.add_header(name, value)
+
+        http_version = recorded.get('httpVersion') or 'HTTP/1.1'
+        try:
+            version = int(float(http_version.partition('/')[2]) * 10)
+        except ValueError:
+            version = 11
+
+        raw = HTTPResponse(
+            body=BytesIO(body),
+            headers=headers,
+            status=recorded['status'],
+            version=version,
+            reason=recorded.get('statusText'),
+            preload_content=False,
+            decode_content=False,
+            original_response=_RecordedResponse(message),
+        )
+        return self.build_response(request, raw)
+
+
+class _RecordedResponse:
+    # minimal http.client.HTTPResponse replacement, for cookies extraction
+    def __init__(self, msg):
+        self.msg = msg
+
+    def isclosed(self):
+        return True
+
+    def close(self):
+        pass
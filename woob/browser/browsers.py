@@ -18,14 +18,16 @@
 from __future__ import annotations
 
 from collections import OrderedDict
+from concurrent.futures import Future
 from functools import wraps
 import importlib
 import re
 import base64
+import hashlib
 from hashlib import sha256
 import zlib
 from logging import Logger
-from typing import Callable, Tuple, Type, Dict, Any, List, ClassVar
+from typing import BinaryIO, Callable, Iterator, Tuple, Type, Dict, Any, List, ClassVar
 
 import os
 from copy import copy, deepcopy
@@ -33,7 +35,7 @@
 from datetime import datetime, timedelta
 from threading import Lock
 from urllib.parse import urlparse, urljoin, urlencode, parse_qsl
-import http
+import http.cookiejar
 from uuid import uuid4
 import warnings
 import tempfile
@@ -52,14 +54,22 @@
 from woob.tools.json import json
 from woob.tools.request import to_curl
 
-from .adapters import HTTPAdapter
-from .cookies import WoobCookieJar
-from .exceptions import HTTPNotFound, ClientError, ServerError
+from .adapters import HARReplayAdapter, HTTPAdapter, RetryPolicy
+from .cookies import OverlayCookieJar, WoobCookieJar
+from .executors import ExecutorShare, SharedExecutor, get_shared_executor, is_shared_by_default
+from .exceptions import ChecksumMismatch, HTTPNotFound, ClientError, ServerError
 from .har import HARManager
+from .metrics import MetricsCollector, RequestMetrics
+from .pools import ConnectionPoolRegistry, get_pool_registry
+from .ratelimit import RateLimit, RateLimiter
 from .sessions import FuturesSession
 from .profiles import Firefox, Profile
-from .pages import NextPage
-from .url import URL, normalize_url
+from .pages import NextPage, Page
+from .url import URL, URLDispatcher, normalize_url
+
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-\d+/(?:\d+|\*)$')
+UNSATISFIED_RANGE_RE = re.compile(r'^bytes \*/(\d+)$')
 
 
 class Browser:
@@ -115,11 +125,57 @@ class Browser:
     MAX_RETRIES: ClassVar[int] = 2
     """
     Maximum retries on failed requests.
+
+    Ignored if :attr:`RETRY_POLICY` is set.
+    """
+
+    RETRY_POLICY: ClassVar[RetryPolicy | None] = None
+    """
+    Retry policy of the transport.
+
+    If set, requests which fail because of a connection error or an error
+    status are retried by the HTTP adapter according to this
+    :class:`~woob.browser.adapters.RetryPolicy`, with exponential backoff
+    and support of ``Retry-After``, and retries are logged.
+
+    Example::
+
+        RETRY_POLICY = RetryPolicy(total=4, status_forcelist={502, 503}, deadline=60)
+    """
+
+    HTTP2: ClassVar[bool] = False
+    """
+    Send HTTPS requests with HTTP/2, when the server supports it.
+
+    Concurrent requests to a host share a single connection, which is
+    useful for APIs needing many small requests. It uses
+    :class:`~woob.browser.http2.HTTP2Adapter` instead of
+    :attr:`HTTP_ADAPTER_CLASS`, so custom SSL settings of the adapter class
+    and :attr:`SHARED_POOLS` do not apply to HTTPS requests, while
+    :attr:`RETRY_POLICY` and :attr:`MAX_RETRIES` do. It needs the ``http2``
+    extra of woob (``pip install woob[http2]``).
     """
 
     MAX_WORKERS: ClassVar[int] = 10
     """
     Maximum of threads for asynchronous requests.
+
+    With a shared executor (see :attr:`SHARED_EXECUTOR`), it is the maximum
+    number of asynchronous requests of the browser run at the same time by
+    the threads of the executor.
+    """
+
+    SHARED_EXECUTOR: ClassVar[bool | SharedExecutor | None] = None
+    """
+    Run asynchronous requests in threads shared with other browsers.
+
+    If True, they are run by the process-wide executor (see
+    :func:`~woob.browser.executors.get_shared_executor`), which serves the
+    browsers in turn, and if False, by threads of this browser only. It can
+    also be a :class:`~woob.browser.executors.SharedExecutor` instance.
+
+    If None, the process-wide executor is only used if it has been enabled
+    for every browser with :func:`~woob.browser.executors.configure_shared_executor`.
     """
 
     ALLOW_REFERRER: ClassVar[bool] = True
@@ -142,6 +198,61 @@ class Browser:
     Example: :class:`~woob.browser.cookies.BlockAllCookies()`
     """
 
+    DEDUPLICATE_REQUESTS: ClassVar[bool] = False
+    """
+    Send only once identical idempotent requests made at the same time.
+
+    When several threads or asynchronous requests open the same URL (same
+    method, body and headers) concurrently, only the first one is actually
+    sent, and the others get its response. Only ``GET``, ``HEAD`` and
+    ``OPTIONS`` requests which are not streamed are concerned.
+    """
+
+    SHARED_POOLS: ClassVar[bool | ConnectionPoolRegistry] = False
+    """
+    Share keep-alive connections with other browsers.
+
+    If True, connection pools are taken from the process-wide registry (see
+    :func:`~woob.browser.pools.get_pool_registry`), so connections opened by
+    a browser are reused by other browsers, and by new instances of this one,
+    as long as they target the same host with the same proxy and TLS
+    settings.
+
+    It can also be a :class:`~woob.browser.pools.ConnectionPoolRegistry`
+    instance, to share connections with a restricted set of browsers or to
+    use other limits.
+    """
+
+    RATE_LIMITS: ClassVar[RateLimit | Dict[str, RateLimit] | None] = None
+    """
+    Limits of the requests rate and concurrency, for each host.
+
+    It is a :class:`~woob.browser.ratelimit.RateLimit` applied to every host,
+    or a dict of host names to limits, where a name starting with a dot also
+    matches subdomains and ``'*'`` matches every other host. Requests wait
+    until they are allowed, whether they are synchronous or asynchronous.
+
+    Limits are objects of the class, so they are shared by every instance
+    of the browser in the process, and with other processes for limits
+    created with the ``shared`` parameter.
+
+    Example::
+
+        RATE_LIMITS = {
+            'api.example.com': RateLimit(rate=2, burst=5, max_concurrent=2),
+            '*': RateLimit(max_concurrent=4),
+        }
+    """
+
+    COLLECT_METRICS: ClassVar[bool] = False
+    """
+    Record the timings of each request in :attr:`metrics`.
+
+    Connection, TLS handshake, time to first byte, download, parsing of
+    pages and iteration on their elements are measured for every response,
+    see :class:`~woob.browser.metrics.RequestMetrics`.
+    """
+
     @classmethod
     def asset(cls, localfile: str) -> str:
         """
@@ -205,6 +316,7 @@ def __init__(
         self.url: str | None = None
         self.response: requests.Response | None = None
         self.har_manager: HARManager | None = None
+        self.metrics = MetricsCollector()
 
         if self.responses_dirname is not None:
             self.har_manager = HARManager(self.responses_dirname, self.logger)
@@ -220,6 +332,8 @@ def deinit(self):
         usage.
         """
         self.session.close()
+        if self.har_manager is not None:
+            self.har_manager.flush()
 
     def __enter__(self):
         return self
@@ -366,10 +480,31 @@ def _save_request_to_har(self, request):
 
         self.logger.info('Request saved to %s', request_filepath)
 
+    def _get_pool_registry(self) -> ConnectionPoolRegistry | None:
+        if isinstance(self.SHARED_POOLS, ConnectionPoolRegistry):
+            return self.SHARED_POOLS
+        if self.SHARED_POOLS:
+            return get_pool_registry()
+        return None
+
+    def _get_executor(self) -> ExecutorShare | None:
+        executor = self.SHARED_EXECUTOR
+        if executor is None:
+            executor = is_shared_by_default()
+        if executor is True:
+            executor = get_shared_executor()
+        if not executor:
+            return None
+        return executor.share(self.MAX_WORKERS)
+
     def _create_session(self) -> requests.Session:
         return FuturesSession(
+            executor=self._get_executor(),
             max_workers=self.MAX_WORKERS, max_retries=self.MAX_RETRIES,
             adapter_class=self.HTTP_ADAPTER_CLASS,
+            pool_registry=self._get_pool_registry(),
+            deduplicate=self.DEDUPLICATE_REQUESTS,
+            rate_limiter=RateLimiter(self.RATE_LIMITS) if self.RATE_LIMITS else None,
         )
 
     def _setup_session(self, profile: Profile):
@@ -394,16 +529,41 @@ def _setup_session(self, profile: Profile):
         # defines a max_retries. It's mandatory in case a server is not
         # handling keep alive correctly, like the proxy burp
         adapter_kwargs['max_retries'] = self.MAX_RETRIES
+        if self.RETRY_POLICY is not None:
+            adapter_kwargs['max_retries'] = self.RETRY_POLICY.new(logger=self.logger)
 
         adapter_kwargs['proxy_headers'] = self.proxy_headers
 
+        pool_registry = self._get_pool_registry()
+        if pool_registry is not None:
+            adapter_kwargs['pool_registry'] = pool_registry
+
         # set connection pool size equal to MAX_WORKERS if needed
         if self.MAX_WORKERS > requests.adapters.DEFAULT_POOLSIZE:
             adapter_kwargs['pool_connections'] = self.MAX_WORKERS
             adapter_kwargs['pool_maxsize'] = self.MAX_WORKERS
 
         session.mount('http://', self.HTTP_ADAPTER_CLASS(**adapter_kwargs))
-        session.mount('https://', self.HTTP_ADAPTER_CLASS(**adapter_kwargs))
+        if self.HTTP2:
+            from .http2 import HTTP2Adapter
+
+            if self.HTTP_ADAPTER_CLASS is not HTTPAdapter:
+                self.logger.warning(
+                    '%s is not used for HTTPS requests, as HTTP2 is enabled', self.HTTP_ADAPTER_CLASS.__name__
+                )
+            if pool_registry is not None:
+                self.logger.warning('connection pools are not shared for HTTPS requests, as HTTP2 is enabled')
+
+            session.mount('https://', HTTP2Adapter(
+                max_retries=adapter_kwargs['max_retries'],
+                pool_maxsize=max(self.MAX_WORKERS, requests.adapters.DEFAULT_POOLSIZE),
+                proxy_headers=self.proxy_headers,
+            ))
+        else:
+            session.mount('https://', self.HTTP_ADAPTER_CLASS(**adapter_kwargs))
+
+        if os.environ.get('WOOB_HAR_REPLAY'):
+            self._mount_har_replay(session, os.environ['WOOB_HAR_REPLAY'])
 
         ## woob only can provide proxy and HTTP auth options
         session.trust_env = False
@@ -420,6 +580,26 @@ def _setup_session(self, profile: Profile):
         if self.COOKIE_POLICY:
             session.cookies.set_policy(self.COOKIE_POLICY)
 
+    def _mount_har_replay(self, session: requests.Session, har: str | dict, **kwargs) -> HARReplayAdapter:
+        adapter = HARReplayAdapter(har, **kwargs)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return adapter
+
+    def replay_har(self, har: str | dict, **kwargs) -> HARReplayAdapter:
+        """
+        Serve every response from a recorded HAR file, without network access.
+
+        It can also be enabled by setting the ``WOOB_HAR_REPLAY`` environment
+        variable to the path of the HAR file.
+
+        :param har: path of a HAR file saved with ``responses_dirname``, or
+            already loaded HAR object
+        :param kwargs: options of :class:`woob.browser.adapters.HARReplayAdapter`
+        :return: the mounted adapter
+        """
+        return self._mount_har_replay(self.session, har, **kwargs)
+
     def set_profile(self, profile: Profile):
         """
         Update the profile of the session.
@@ -441,7 +621,7 @@ def location(self, url: str | requests.Request, **kwargs) -> requests.Response:
 
     def open(
         self,
-        url: str | requests.Request,
+        url: str | requests.Request | Future,
         *,
         referrer: str | None = None,
         allow_redirects: bool = True,
@@ -482,7 +662,8 @@ def open(
 
         >>> Browser().open('https://google.com', is_async=True).result().text # doctest: +SKIP
 
-        :param url: URL
+        :param url: URL, or :py:class:`~concurrent.futures.Future` of a
+            request already sent with ``is_async``, to get its response
         :param params: (optional) Dictionary, list of tuples or bytes to send
             in the query string
         :param data: (optional) Dictionary, list of tuples, bytes, or file-like
@@ -525,6 +706,11 @@ def open(
         :rtype: :class:`requests.Response`
         """
 
+        if isinstance(url, Future):
+            # the request has already been sent, and its response handled
+            # by the callbacks given when it was
+            return url.result()
+
         if isinstance(url, str):
             url = normalize_url(url)
         elif isinstance(url, requests.Request):
@@ -537,9 +723,13 @@ def open(
             # The _cookies attribute is not present in requests < 2.2. As in
             # previous version it doesn't calls extract_cookies_to_jar(), it is
             # not a problem as we keep our own cookiejar instance.
-            preq._cookies = WoobCookieJar.from_cookiejar(preq._cookies)
-            if self.COOKIE_POLICY:
-                preq._cookies.set_policy(self.COOKIE_POLICY)
+            if isinstance(preq._cookies, OverlayCookieJar):
+                # already a view of the session cookies, not a copy
+                preq._cookies.set_policy(self.COOKIE_POLICY or http.cookiejar.DefaultCookiePolicy())
+            else:
+                preq._cookies = WoobCookieJar.from_cookiejar(preq._cookies)
+                if self.COOKIE_POLICY:
+                    preq._cookies.set_policy(self.COOKIE_POLICY)
 
         if proxies is None:
             proxies = self.PROXIES
@@ -555,11 +745,19 @@ def open(
         # We define an inner_callback here in order to execute the same code
         # regardless of is_async param.
         def inner_callback(future, response):
-            if allow_redirects:
-                response = self.handle_refresh(response)
+            metrics = None
+            if self.COLLECT_METRICS:
+                metrics = response.metrics = RequestMetrics(response)
 
-            self.raise_for_status(response)
-            return callback(response)
+            try:
+                if allow_redirects:
+                    response = self.handle_refresh(response)
+
+                self.raise_for_status(response)
+                return callback(response)
+            finally:
+                if metrics is not None:
+                    self.metrics.record(metrics)
 
         # call python3-requests
         try:
@@ -610,6 +808,172 @@ def async_open(self, url: str, **kwargs) -> requests.Response:
             del kwargs['is_async']
         return self.open(url, is_async=True, **kwargs)
 
+    def download(
+        self,
+        url: str | requests.Request,
+        dest: str | BinaryIO,
+        *,
+        chunk_size: int = 64 * 1024,
+        resume: bool = True,
+        checksum: str | None = None,
+        progress: Callable[[int, int | None], None] | None = None,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Download a file without loading it in memory.
+
+        The response is streamed to a ``.part`` file next to ``dest``, which
+        is renamed to ``dest`` once the download is complete, so ``dest``
+        never contains a partial file. If a ``.part`` file is left by a
+        previous attempt, the download is resumed with a ``Range`` request
+        when the server supports it.
+
+        >>> Browser().download('https://example.org', '/tmp/example.html') # doctest: +SKIP
+        <Response [200]>
+
+        :param url: URL or request to download, other arguments of
+            :meth:`open()` can be given
+        :param dest: path of the file to write, or a writable binary file
+            object (in which case the download can't be resumed)
+        :param chunk_size: size of the chunks read from the network
+        :param resume: resume a previous partial download if any
+        :param checksum: expected checksum of the file, as ``'algorithm:hexdigest'``
+            with any algorithm supported by :mod:`hashlib` (e.g. ``'sha256:e3b0...'``)
+        :param progress: function called after each chunk with the number of
+            bytes already downloaded and the total size, if known
+        :raises: :class:`~woob.browser.exceptions.ChecksumMismatch` if the
+            checksum of the downloaded file is not the expected one, in
+            which case the partial file is removed
+        :return: the response, which content has been consumed
+        """
+        hasher = None
+        if checksum is not None:
+            hasher = hashlib.new(checksum.partition(':')[0])
+
+        if hasattr(dest, 'write'):
+            return self._download_to(url, dest, 0, chunk_size, hasher, checksum, progress, kwargs)
+
+        part_path = dest + '.part'
+        offset = 0
+        if resume and os.path.exists(part_path):
+            offset = os.path.getsize(part_path)
+
+        mode = 'ab' if offset else 'wb'
+        with open(part_path, mode) as fp:
+            if offset and hasher is not None:
+                with open(part_path, 'rb') as previous:
+                    for chunk in iter(lambda: previous.read(chunk_size), b''):
+                        hasher.update(chunk)
+
+            try:
+                response = self._download_to(url, fp, offset, chunk_size, hasher, checksum, progress, kwargs)
+            except ChecksumMismatch:
+                fp.close()
+                os.remove(part_path)
+                raise
+
+        os.replace(part_path, dest)
+        return response
+
+    def _download_to(self, url, fp, offset, chunk_size, hasher, checksum, progress, kwargs):
+        if offset:
+            range_kwargs = dict(kwargs)
+            headers = dict(kwargs.get('headers') or {})
+            headers['Range'] = 'bytes=%d-' % offset
+            # ranges are on the encoded content, avoid any transformation
+            headers['Accept-Encoding'] = 'identity'
+            range_kwargs['headers'] = headers
+
+            try:
+                response = self.open(url, stream=True, **range_kwargs)
+            except ClientError as exc:
+                if exc.response is None or exc.response.status_code != 416:
+                    raise
+                response = exc.response
+                response.close()
+
+                unsatisfied_range = UNSATISFIED_RANGE_RE.match(response.headers.get('Content-Range', ''))
+                if unsatisfied_range and int(unsatisfied_range.group(1)) == offset:
+                    # the partial file is already complete
+                    self.logger.debug('Download of %s was already complete', response.url)
+                    if progress is not None:
+                        progress(offset, offset)
+                    self._check_download_checksum(response, hasher, checksum)
+                    return response
+
+                self.logger.debug('Unable to resume download of %s, restarting it', response.url)
+                fp.seek(0)
+                fp.truncate()
+                if hasher is not None:
+                    hasher = hashlib.new(hasher.name)
+                return self._download_to(url, fp, 0, chunk_size, hasher, checksum, progress, kwargs)
+        else:
+            response = self.open(url, stream=True, **kwargs)
+
+        try:
+            total = response.headers.get('Content-Length')
+            total = int(total) if total and total.isdigit() else None
+
+            if offset:
+                content_range = CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+                if response.status_code == 206 and content_range and int(content_range.group(1)) == offset:
+                    self.logger.debug('Resuming download of %s at byte %d', response.url, offset)
+                    if total is not None:
+                        total += offset
+                else:
+                    # range not supported, restart from the beginning
+                    self.logger.debug('Unable to resume download of %s, restarting it', response.url)
+                    fp.seek(0)
+                    fp.truncate()
+                    offset = 0
+                    if hasher is not None:
+                        hasher = hashlib.new(hasher.name)
+
+            downloaded = offset
+            for chunk in response.iter_content(chunk_size):
+                fp.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+                downloaded += len(chunk)
+                if progress is not None:
+                    progress(downloaded, total)
+        finally:
+            response.close()
+
+        self._check_download_checksum(response, hasher, checksum)
+        return response
+
+    def iter_download(
+        self, url: str | requests.Request, *, chunk_size: int = 64 * 1024, **kwargs
+    ) -> Iterator[bytes]:
+        """
+        Download a file by chunks, without loading it in memory.
+
+        The request is sent when the iteration starts. It is useful to
+        implement streaming methods of capabilities, like
+        :meth:`~woob.capabilities.bill.CapDocument.download_document_stream`.
+
+        :param url: URL or request to download, other arguments of
+            :meth:`open()` can be given
+        :param chunk_size: size of the chunks read from the network
+        """
+        response = self.open(url, stream=True, **kwargs)
+        try:
+            yield from response.iter_content(chunk_size)
+        finally:
+            response.close()
+
+    @staticmethod
+    def _check_download_checksum(response, hasher, checksum):
+        if hasher is None:
+            return
+
+        expected_digest = checksum.partition(':')[2]
+        if hasher.hexdigest() != expected_digest.lower():
+            raise ChecksumMismatch(
+                'Checksum of %s is %s:%s, expected %s' % (response.url, hasher.name, hasher.hexdigest(), checksum)
+            )
+
     def raise_for_status(self, response: requests.Response):
         """
         Like :meth:`requests.Response.raise_for_status()` but will use other
@@ -891,11 +1255,14 @@ def absurl(self, uri: str, base: str | bool | None = None) -> str:
 
         return urljoin(base, uri)
 
-    def open(self, url: requests.Request | str, *args, **kwargs) -> requests.Response:
+    def open(self, url: requests.Request | str | Future, *args, **kwargs) -> requests.Response:
         """
         Like :meth:`Browser.open` but handles urls without domains, using
         the :attr:`BASEURL` attribute.
         """
+        if isinstance(url, Future):
+            return super().open(url, *args, **kwargs)
+
         if isinstance(url, requests.Request):
             req = url
             req_url = req.url
@@ -964,6 +1331,7 @@ class PagesBrowser(DomainBrowser):
     """
 
     _urls = None
+    _url_dispatcher = None
 
     def __init__(self, *args, **kwargs):
         self._urls = OrderedDict()
@@ -998,10 +1366,12 @@ def __setattr__(self, key, value):
                 value = copy(value)
                 value.browser = self
                 self._urls[key] = value
+                self._url_dispatcher = None
             elif key in self._urls:
                 # We want to remove the URL from our mapping only.
                 url = self._urls.pop(key)
                 url.browser = None
+                self._url_dispatcher = None
 
         super().__setattr__(key, value)
 
@@ -1010,6 +1380,7 @@ def __delattr__(self, key):
             if key in self._urls:
                 # We want to remove the URL from our mapping.
                 del self._urls[key]
+                self._url_dispatcher = None
 
         super().__delattr__(key)
 
@@ -1028,34 +1399,49 @@ def open(self, *args, **kwargs) -> requests.Response:
         # asynchronous requests, see :meth:`Browser.open` and its `is_async`
         # and `callback` params.
         def internal_callback(response):
-            # Try to handle the response page with an URL instance.
-            response.page = None
-            if page_class:
-                response.page = page_class(self, response)
-                return callback(response)
+            self.handle_page(response, page_class=page_class)
+            return callback(response)
 
-            for url in self._urls.values():
-                response.page = url.handle(response)
-                if response.page is not None:
-                    self.logger.debug('Handle %s with %s', response.url, response.page.__class__.__name__)
-                    break
+        return super(PagesBrowser, self).open(callback=internal_callback, *args, **kwargs)
+
+    def handle_page(self, response: requests.Response, page_class: Type[Page] | None = None):
+        """
+        Set the ``page`` attribute of a response.
+
+        It is an instance of ``page_class`` if given, or of the page class
+        of the first :class:`~woob.browser.url.URL` object matching the
+        response, or ``None``.
+        """
+        # Try to handle the response page with an URL instance.
+        response.page = None
+        if page_class:
+            response.page = page_class(self, response)
+            return
 
-            if response.page is None:
-                regexp = r'^(?P<proto>\w+)://.*'
+        dispatcher = self._url_dispatcher
+        if dispatcher is None or not dispatcher.is_valid(self):
+            dispatcher = self._url_dispatcher = URLDispatcher(self, self._urls)
 
-                proto_response = re.match(regexp, response.url)
-                if proto_response and self.BASEURL:
-                    proto_response = proto_response.group('proto')
-                    proto_base = re.match(regexp, self.BASEURL).group('proto')
+        for name, url in dispatcher.candidates(response.url):
+            response.page = url.handle(response)
+            if response.page is not None:
+                self.logger.debug('Handle %s with %s', response.url, response.page.__class__.__name__)
+                if getattr(response, 'metrics', None) is not None:
+                    response.metrics.name = name
+                break
 
-                    if proto_base == 'https' and proto_response != 'https':
-                        raise BrowserHTTPSDowngrade()
+        if response.page is None:
+            regexp = r'^(?P<proto>\w+)://.*'
 
-                self.logger.debug('Unable to handle %s', response.url)
+            proto_response = re.match(regexp, response.url)
+            if proto_response and self.BASEURL:
+                proto_response = proto_response.group('proto')
+                proto_base = re.match(regexp, self.BASEURL).group('proto')
 
-            return callback(response)
+                if proto_base == 'https' and proto_response != 'https':
+                    raise BrowserHTTPSDowngrade()
 
-        return super(PagesBrowser, self).open(callback=internal_callback, *args, **kwargs)
+            self.logger.debug('Unable to handle %s', response.url)
 
     def location(self, *args, **kwargs) -> requests.Response:
         """
@@ -1200,11 +1586,24 @@ class StatesMixin:
     Saved state variables.
     """
 
+    _COOKIE_STATE_ATTRS = ('name', 'value', 'domain', 'path', 'secure', 'expires')
+
     STATE_DURATION: ClassVar[int | float | None] = None
     """
     In minutes, used to set an expiration datetime object of the state.
     """
 
+    COMPACT_STATE: ClassVar[bool] = False
+    """
+    Store cookies as rows of values instead of objects, which makes the
+    state smaller and faster to dump and load.
+
+    States stored in either format can be loaded.
+    """
+
+    # last dumped cookies, with the jar and its number of changes
+    _dumped_cookies: Tuple[Any, int, bool, str] | None = None
+
     def locate_browser(self, state: dict):
         """
         From the ``state`` object, go on the saved url.
@@ -1227,6 +1626,8 @@ def _load_cookies(self, cookie_state: str):
             self.logger.error('Unable to reload cookies from storage')
         else:
             for jcookie in jcookies:
+                if isinstance(jcookie, list):
+                    jcookie = dict(zip(self._COOKIE_STATE_ATTRS, jcookie))
                 self.session.cookies.set(**jcookie)
             self.logger.debug('Reloaded cookies from storage')
 
@@ -1263,6 +1664,60 @@ def get_expire(self) -> str | None:
 
         return str((now_as_utc() + timedelta(minutes=self.STATE_DURATION)).replace(microsecond=0))
 
+    def _dump_cookies(self) -> str:
+        jar = self.session.cookies
+        changes = getattr(jar, 'changes', None)
+
+        # cookies are only serialized again when they have changed
+        dumped = self._dumped_cookies
+        if (
+            changes is not None and dumped is not None and dumped[0] is jar
+            and dumped[1:3] == (changes, self.COMPACT_STATE)
+        ):
+            return dumped[3]
+
+        if self.COMPACT_STATE:
+            cookies = [
+                [getattr(cookie, attr) for attr in self._COOKIE_STATE_ATTRS]
+                for cookie in jar
+            ]
+            data = json.dumps(cookies, separators=(',', ':'))
+        else:
+            cookies = [
+                {attr: getattr(cookie, attr) for attr in self._COOKIE_STATE_ATTRS}
+                for cookie in jar
+            ]
+            data = json.dumps(cookies)
+
+        encoded = base64.b64encode(zlib.compress(data.encode('utf-8'))).decode('ascii')
+        if changes is not None:
+            self._dumped_cookies = (jar, changes, self.COMPACT_STATE, encoded)
+        return encoded
+
+    def is_state_dirty(self, state: dict, stored_state: dict | None) -> bool:
+        """
+        Check if a ``state`` object has to be stored again.
+
+        It is not when it is the same as the stored one. Only moving the
+        expiration forward is not worth storing the state again, unless half
+        of :attr:`STATE_DURATION` has elapsed since it was stored.
+
+        :param state: the state given by :meth:`dump_state`
+        :param stored_state: the state which was stored, if any
+        """
+        if not stored_state:
+            return True
+
+        keys = set(state) | set(stored_state)
+        changed = {key for key in keys if state.get(key) != stored_state.get(key)}
+        if changed != {'expire'} or self.STATE_DURATION is None or not stored_state.get('expire'):
+            return bool(changed)
+
+        expire = parser.parse(stored_state['expire'])
+        if not expire.tzinfo:
+            expire = expire.replace(tzinfo=tz.tzlocal())
+        return expire - now_as_utc() < timedelta(minutes=self.STATE_DURATION / 2)
+
     def dump_state(self) -> dict:
         """
         Dump the current state in a ``state`` object.
@@ -1274,14 +1729,7 @@ def dump_state(self) -> dict:
         if hasattr(self, 'page') and self.page:
             state['url'] = self.page.url
 
-        cookies = [
-            {
-                attr: getattr(cookie, attr)
-                for attr in ('name', 'value', 'domain', 'path', 'secure', 'expires')
-            }
-            for cookie in self.session.cookies
-        ]
-        state['cookies'] = base64.b64encode(zlib.compress(json.dumps(cookies).encode('utf-8'))).decode('ascii')
+        state['cookies'] = self._dump_cookies()
         for attrname in self.__states__:
             try:
                 state[attrname] = getattr(self, attrname)
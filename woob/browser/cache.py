@@ -15,24 +15,371 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
-__all__ = ['CacheMixin']
+from collections import Counter, OrderedDict
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+from hashlib import sha256
+import os
+import sqlite3
+from threading import Lock
+import time
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from woob.tools.json import json
+
+__all__ = ['CacheMixin', 'CacheEntry', 'CacheStore', 'MemoryCacheStore', 'SQLiteCacheStore']
+
+
+def parse_cache_control(value):
+    """
+    Parse a ``Cache-Control`` header value to a dict.
+
+    Directives without argument have a ``None`` value.
+
+    >>> parse_cache_control('public, max-age=60, no-cache="Set-Cookie"')
+    {'public': None, 'max-age': '60', 'no-cache': 'Set-Cookie'}
+    """
+    directives = {}
+    for part in (value or '').split(','):
+        name, sep, arg = part.partition('=')
+        name = name.strip().lower()
+        if name:
+            directives[name] = arg.strip().strip('"') if sep else None
+    return directives
+
+
+def parse_http_date(value):
+    """
+    Parse an HTTP date to a timestamp, or return None if it is invalid.
+    """
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
 
 
 class CacheEntry:
+    """
+    A cached response, with what is needed to check its freshness.
+
+    :param response: the response to cache
+    """
+
     def __init__(self, response):
         self.response = response
-        self.etag = response.headers.get('ETag')
-        self.last_modified = response.headers.get('Last-Modified')
+        self.stored_at = time.time()
+
+        # values of the headers listed in Vary, sent to get this response
+        request_headers = getattr(response.request, 'headers', None) or {}
+        self.vary = {name: request_headers.get(name) for name in self.vary_headers}
+
+    @property
+    def headers(self):
+        return self.response.headers
+
+    @property
+    def etag(self):
+        return self.headers.get('ETag')
+
+    @property
+    def last_modified(self):
+        return self.headers.get('Last-Modified')
+
+    @property
+    def cache_control(self):
+        return parse_cache_control(self.headers.get('Cache-Control'))
+
+    @property
+    def vary_headers(self):
+        return [name.strip().lower() for name in self.headers.get('Vary', '').split(',') if name.strip()]
+
+    @property
+    def size(self):
+        """Approximative size in bytes of the entry."""
+        return len(self.response.content or b'') + sum(len(k) + len(v) for k, v in self.headers.items())
 
     def has_cache_key(self):
         return (self.etag or self.last_modified)
 
+    def freshness_lifetime(self):
+        """
+        Number of seconds the response can be used without revalidation,
+        according to ``Cache-Control: max-age`` or ``Expires`` headers.
+        """
+        cache_control = self.cache_control
+        if 'no-cache' in cache_control:
+            return 0
+
+        if cache_control.get('max-age'):
+            try:
+                return max(0, int(cache_control['max-age']))
+            except ValueError:
+                return 0
+
+        if 'Expires' in self.headers:
+            expires = parse_http_date(self.headers['Expires'])
+            if expires is None:
+                # invalid dates, like "0", mean already expired
+                return 0
+            date = parse_http_date(self.headers.get('Date')) or self.stored_at
+            return max(0, expires - date)
+
+        return 0
+
+    def current_age(self, now=None):
+        if now is None:
+            now = time.time()
+
+        try:
+            age = int(self.headers.get('Age', 0))
+        except ValueError:
+            age = 0
+        return age + max(0, now - self.stored_at)
+
+    def is_fresh(self, now=None):
+        return self.freshness_lifetime() > self.current_age(now)
+
+    def is_storable(self):
+        if 'no-store' in self.cache_control or '*' in self.vary_headers:
+            return False
+        return bool(self.has_cache_key() or self.freshness_lifetime() > 0)
+
+    def matches(self, headers):
+        """
+        Check request headers have the same values than the ones sent to
+        get the cached response, for the headers listed in ``Vary``.
+
+        :param headers: headers which will be sent by the new request
+        :type headers: :class:`requests.structures.CaseInsensitiveDict`
+        """
+        return all(headers.get(name) == value for name, value in self.vary.items())
+
     def update_request(self, request):
         if self.last_modified:
             request.headers['If-Modified-Since'] = self.last_modified
         if self.etag:
             request.headers['If-None-Match'] = self.etag
 
+    def revalidate(self, response):
+        """
+        Update the entry with the headers of a ``304 Not Modified`` response.
+        """
+        for name in ('Cache-Control', 'Date', 'Expires', 'ETag', 'Last-Modified', 'Age', 'Vary'):
+            if name in response.headers:
+                self.headers[name] = response.headers[name]
+        self.stored_at = time.time()
+
+    def to_dict(self):
+        """
+        Export the entry metadata, to store it along with the response
+        content.
+        """
+        response = self.response
+        return {
+            'url': response.url,
+            'status_code': response.status_code,
+            'reason': response.reason,
+            'encoding': response.encoding,
+            'headers': list(response.headers.items()),
+            'stored_at': self.stored_at,
+            'vary': self.vary,
+        }
+
+    @classmethod
+    def from_dict(cls, data, content):
+        """
+        Rebuild an entry exported by :meth:`to_dict`.
+
+        The returned response has no ``request`` attribute.
+        """
+        response = Response()
+        response.url = data['url']
+        response.status_code = data['status_code']
+        response.reason = data['reason']
+        response.encoding = data['encoding']
+        response.headers = CaseInsensitiveDict(data['headers'])
+        response._content = content
+        response.elapsed = timedelta(0)
+        response.request = None
+
+        entry = cls.__new__(cls)
+        entry.response = response
+        entry.stored_at = data['stored_at']
+        entry.vary = data['vary']
+        return entry
+
+
+class CacheStore:
+    """
+    Base class of stores used by :class:`CacheMixin`.
+
+    A store behaves like a dict, mapping keys built by
+    :meth:`CacheMixin.make_cache_key` to :class:`CacheEntry` objects.
+    """
+
+    def __getitem__(self, key):
+        raise NotImplementedError()
+
+    def __setitem__(self, key, entry):
+        raise NotImplementedError()
+
+    def __delitem__(self, key):
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+
+class MemoryCacheStore(CacheStore):
+    """
+    Store entries in memory.
+
+    :param max_size: maximum size in bytes of the stored responses, the
+        least recently used ones are evicted first (optional)
+    :type max_size: int
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def __getitem__(self, key):
+        with self.lock:
+            entry, size = self.entries[key]
+            self.entries.move_to_end(key)
+            return entry
+
+    def __setitem__(self, key, entry):
+        size = entry.size
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (entry, size)
+            self.size += size
+
+            while self.max_size is not None and self.size > self.max_size and self.entries:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def __delitem__(self, key):
+        with self.lock:
+            self.size -= self.entries.pop(key)[1]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+class SQLiteCacheStore(CacheStore):
+    """
+    Store entries in a SQLite database, so they are kept across runs.
+
+    The same file can be used by several browsers and processes.
+
+    :param path: path of the database file
+    :type path: str
+    :param max_size: maximum size in bytes of the stored responses, the
+        least recently used ones are evicted first (optional)
+    :type max_size: int
+    """
+
+    def __init__(self, path, max_size=None):
+        self.path = path
+        self.max_size = max_size
+        self.lock = Lock()
+
+        dirname = os.path.dirname(path)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, meta TEXT NOT NULL, content BLOB, '
+            'size INTEGER NOT NULL, accessed REAL NOT NULL)'
+        )
+        self.db.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+
+    @staticmethod
+    def hash_key(key):
+        return sha256(repr(key).encode('utf-8')).hexdigest()
+
+    def __getitem__(self, key):
+        hkey = self.hash_key(key)
+        with self.lock:
+            row = self.db.execute('SELECT meta, content FROM entries WHERE key = ?', (hkey,)).fetchone()
+            if row is None:
+                raise KeyError(key)
+            self.db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (time.time(), hkey))
+
+        return CacheEntry.from_dict(json.loads(row[0]), row[1])
+
+    def __setitem__(self, key, entry):
+        row = (
+            self.hash_key(key),
+            json.dumps(entry.to_dict()),
+            entry.response.content,
+            entry.size,
+            time.time(),
+        )
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)', row)
+            if self.max_size is not None:
+                self._evict()
+
+    def _evict(self):
+        total, = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()
+        if total <= self.max_size:
+            return
+
+        to_delete = []
+        for hkey, size in self.db.execute('SELECT key, size FROM entries ORDER BY accessed'):
+            if total <= self.max_size:
+                break
+            to_delete.append((hkey,))
+            total -= size
+        self.db.executemany('DELETE FROM entries WHERE key = ?', to_delete)
+
+    def __delitem__(self, key):
+        with self.lock:
+            cursor = self.db.execute('DELETE FROM entries WHERE key = ?', (self.hash_key(key),))
+        if not cursor.rowcount:
+            raise KeyError(key)
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def clear(self):
+        with self.lock:
+            self.db.execute('DELETE FROM entries')
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
 
 class CacheMixin:
     """Mixin to inherit in a Browser"""
@@ -47,7 +394,9 @@ class CacheMixin:
     If `True`, the `ETag` and `Last-Modified` of the response will be
     stored along with the cache. When the request is re-executed, instead
     of simply returning the previous response, the server is queried to
-    check if a newer version of the page exists.
+    check if a newer version of the page exists, unless the response is
+    still fresh according to its `Cache-Control: max-age` or `Expires`
+    headers.
     If a newer page exists, it is returned instead and overwrites the
     obsolete page in the cache.
     """
@@ -55,14 +404,19 @@ class CacheMixin:
     def __init__(self, *args, **kwargs):
         super(CacheMixin, self).__init__(*args, **kwargs)
 
-        self.cache = {}
+        self.cache = MemoryCacheStore()
 
         """Cache store object
 
-        To limit the size of the cache, a :class:`woob.tools.lrudict.LimitedLRUDict`
-        instance can be used.
+        To limit the size of the cache, a :class:`MemoryCacheStore` with
+        a ``max_size`` can be used. To keep the cache across runs, use a
+        :class:`SQLiteCacheStore`.
         """
 
+        self.cache_stats = Counter()
+
+        """Number of cache ``hits``, ``misses`` and ``revalidations``."""
+
     def make_cache_key(self, request):
         """Make a key for the cache corresponding to the request."""
 
@@ -70,27 +424,50 @@ def make_cache_key(self, request):
         headers = tuple(request.headers.values())
         return (request.method, request.url, body, headers)
 
+    def get_cached_response(self, entry, request):
+        """Get the response of a cache entry, to return it to the caller."""
+        response = entry.response
+        if response.request is None:
+            # entry reloaded from a persistent store
+            response.request = self.prepare_request(request)
+            if hasattr(self, 'handle_page'):
+                self.handle_page(response)
+        return response
+
     def open_with_cache(self, url, **kwargs):
         """Perform a request using the cache if possible."""
         request = self.build_request(url, **kwargs)
 
         key = self.make_cache_key(request)
-        if key in self.cache:
-            if not self.cache_is_updatable:
+        entry = self.cache.get(key)
+        if entry is not None and entry.vary:
+            headers = CaseInsensitiveDict(self.session.headers)
+            headers.update(request.headers)
+            if not entry.matches(headers):
+                entry = None
+
+        if entry is not None:
+            if not self.cache_is_updatable or entry.is_fresh():
                 self.logger.debug('cache HIT for %r', request.url)
-                return self.cache[key].response
+                self.cache_stats['hits'] += 1
+                return self.get_cached_response(entry, request)
             else:
-                self.cache[key].update_request(request)
+                entry.update_request(request)
 
         response = super(CacheMixin, self).open(request, **kwargs)
-        if response.status_code == 304:
+        if response.status_code == 304 and entry is not None:
             self.logger.debug('cache HIT for %r', request.url)
-            return self.cache[key].response
+            self.cache_stats['hits'] += 1
+            self.cache_stats['revalidations'] += 1
+            entry.revalidate(response)
+            self.cache[key] = entry
+            return self.get_cached_response(entry, request)
         elif response.status_code == 200:
             entry = CacheEntry(response)
-            if entry.has_cache_key():
+            if entry.is_storable():
                 self.logger.debug('storing %r response in cache', request.url)
                 self.cache[key] = entry
 
         self.logger.debug('cache MISS for %r', request.url)
+        self.cache_stats['misses'] += 1
         return response
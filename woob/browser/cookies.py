@@ -15,14 +15,100 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
+import copy
 import http.cookiejar
+import time
+
 import requests.cookies
 
 
-__all__ = ['WoobCookieJar', 'BlockAllCookies']
+__all__ = ['WoobCookieJar', 'OverlayCookieJar', 'BlockAllCookies']
+
+
+def request_domains(request):
+    """
+    Get the cookie domains which can match a request with the default
+    cookie policy: the request host and its parent domains, with and
+    without a leading dot.
+    """
+    domains = {''}
+    for host in http.cookiejar.eff_request_host(request):
+        if not host.startswith('.'):
+            host = '.' + host
+        index = 0
+        while index != -1:
+            domains.add(host[index:])
+            domains.add(host[index + 1:])
+            index = host.find('.', index + 1)
+    return domains
 
 
 class WoobCookieJar(requests.cookies.RequestsCookieJar):
+    """
+    Cookie jar of browsers.
+
+    Cookies sent with a request are only searched in the domains matching
+    its host, instead of asking the policy about every domain of the jar.
+    """
+
+    changes = 0
+    """
+    Number of modifications of the cookies of the jar.
+
+    Setting a cookie which is already in the jar, with the same value and
+    attributes, is not counted.
+    """
+
+    @staticmethod
+    def _cookie_state(cookie):
+        return (cookie.value, cookie.secure, cookie.expires)
+
+    def set_cookie(self, cookie, *args, **kwargs):
+        with self._cookies_lock:
+            old = self._cookies.get(cookie.domain, {}).get(cookie.path, {}).get(cookie.name)
+            old_state = old and self._cookie_state(old)
+            super().set_cookie(cookie, *args, **kwargs)
+            # compared afterwards, as the value may be unquoted when set
+            if old is None or old_state != self._cookie_state(cookie):
+                self.changes += 1
+
+    def clear(self, domain=None, path=None, name=None):
+        with self._cookies_lock:
+            super().clear(domain, path, name)
+            self.changes += 1
+
+    def _matching_domains(self, cookies, request):
+        """
+        Get the domains of a cookies dict which may match a request, in the
+        order of the dict.
+        """
+        policy = self._policy
+        if (
+            not isinstance(policy, http.cookiejar.DefaultCookiePolicy)
+            or type(policy).domain_return_ok is not http.cookiejar.DefaultCookiePolicy.domain_return_ok
+        ):
+            # a custom policy may accept any domain
+            return list(cookies)
+
+        domains = request_domains(request)
+        return [domain for domain in cookies if domain in domains]
+
+    def _cookies_for_request(self, request):
+        cookies = []
+        for domain in self._matching_domains(self._cookies, request):
+            cookies.extend(self._cookies_for_domain(domain, request))
+        return cookies
+
+    def overlay(self):
+        """
+        Get a jar with the cookies of this one, without copying them.
+
+        Cookies set in the returned jar are not added to this one.
+
+        :rtype: :class:`OverlayCookieJar`
+        """
+        return OverlayCookieJar(self)
+
     @classmethod
     def from_cookiejar(klass, cj):
         """
@@ -51,6 +137,103 @@ def copy(self):
 WeboobCookieJar = WoobCookieJar
 
 
+class OverlayCookieJar(WoobCookieJar):
+    """
+    Cookie jar showing the cookies of another jar, with its own cookies on
+    top of them.
+
+    It is used for the cookies of a single request: they are the cookies of
+    the session, which are not copied, plus the ones given for this request
+    or set during its redirections, which are not added to the session.
+    Cookies of the session are copied only when they are removed from this
+    jar.
+
+    :param base: the jar to show the cookies of
+    :type base: :class:`http.cookiejar.CookieJar`
+    """
+
+    def __init__(self, base, policy=None):
+        super().__init__(policy or base._policy)
+        self._base = base
+
+    def _is_shadowed(self, cookie):
+        return cookie.name in self._cookies.get(cookie.domain, {}).get(cookie.path, {})
+
+    def _base_cookies(self):
+        with self._base._cookies_lock:
+            return [cookie for cookie in self._base if not self._is_shadowed(cookie)]
+
+    def _materialize(self):
+        # copy the cookies of the base jar, before removing some of them
+        if self._base is None:
+            return
+
+        for cookie in self._base_cookies():
+            super().set_cookie(copy.copy(cookie))
+        self._base = None
+
+    def __iter__(self):
+        if self._base is not None:
+            yield from self._base_cookies()
+        yield from http.cookiejar.deepvalues(self._cookies)
+
+    def _cookies_for_request(self, request):
+        cookies = []
+        base = self._base
+        if base is not None:
+            policy = self._policy
+            with base._cookies_lock:
+                for domain in self._matching_domains(base._cookies, request):
+                    if not policy.domain_return_ok(domain, request):
+                        continue
+
+                    own = self._cookies.get(domain, {})
+                    for path, cookies_by_name in base._cookies[domain].items():
+                        if not policy.path_return_ok(path, request):
+                            continue
+                        for name, cookie in cookies_by_name.items():
+                            if name not in own.get(path, {}) and policy.return_ok(cookie, request):
+                                cookies.append(cookie)
+
+        return cookies + super()._cookies_for_request(request)
+
+    def update(self, other):
+        if self._base is not None and other is self._base:
+            # the cookies of the base jar are already shown, only make them
+            # replace ours, like a copy would do
+            with self._cookies_lock:
+                for cookie in list(http.cookiejar.deepvalues(self._cookies)):
+                    if cookie.name in other._cookies.get(cookie.domain, {}).get(cookie.path, {}):
+                        super().clear(cookie.domain, cookie.path, cookie.name)
+            return
+        super().update(other)
+
+    def clear(self, domain=None, path=None, name=None):
+        with self._cookies_lock:
+            self._materialize()
+            super().clear(domain, path, name)
+
+    def clear_session_cookies(self):
+        with self._cookies_lock:
+            self._materialize()
+            super().clear_session_cookies()
+
+    def clear_expired_cookies(self):
+        # expired cookies of the base jar are not sent, and they are removed
+        # by the base jar itself
+        with self._cookies_lock:
+            now = time.time()
+            for cookie in list(http.cookiejar.deepvalues(self._cookies)):
+                if cookie.is_expired(now):
+                    super().clear(cookie.domain, cookie.path, cookie.name)
+
+    def copy(self):
+        new_cj = WoobCookieJar()
+        new_cj.set_policy(self._policy)
+        new_cj.update(self)
+        return new_cj
+
+
 class BlockAllCookies(http.cookiejar.CookiePolicy):
     return_ok = set_ok = domain_return_ok = path_return_ok = lambda self, *args, **kwargs: False
     netscape = True
@@ -30,7 +30,7 @@
 import lxml.html
 
 from woob.tools.log import getLogger, DEBUG_FILTERS
-from woob.browser.pages import NextPage
+from woob.browser.pages import NextPage, Page
 from woob.capabilities.base import FetchError
 
 from .filters.standard import _Filter, CleanText
@@ -101,7 +101,17 @@ def method(klass):
     """
 
     def inner(self, *args, **kwargs):
-        return klass(self)(*args, **kwargs)
+        # time spent in elements is added to the metrics of the page, if
+        # they are collected
+        metrics = getattr(getattr(self, 'response', None), 'metrics', None)
+        if metrics is None:
+            return klass(self)(*args, **kwargs)
+
+        with metrics.measure('iteration'):
+            result = klass(self)(*args, **kwargs)
+        if hasattr(result, '__next__'):
+            return metrics.measure_iter('iteration', result)
+        return result
 
     inner.klass = klass
     return inner
@@ -232,6 +242,14 @@ class ListElement(AbstractElement):
     flush_at_end = False
     ignore_duplicate = False
 
+    prefetch_next_page = False
+    """Send the request of the next page before building the items of this
+    one, so it is received while they are built.
+
+    It can only be enabled when ``next_page`` only depends on the document,
+    and not on the items.
+    """
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.objects = OrderedDict()
@@ -265,6 +283,11 @@ def __iter__(self):
 
         self.parse(self.el)
 
+        if self.prefetch_next_page:
+            next_page = self.get_next_page()
+            if next_page is not None and not isinstance(next_page, Page):
+                next_page = self.page.browser.async_open(next_page)
+
         items = []
         for el in self.find_elements():
             for attrname in dir(self):
@@ -287,22 +310,30 @@ def __iter__(self):
             for obj in self.flush():
                 yield obj
 
-        self.check_next_page()
+        if not self.prefetch_next_page:
+            self.check_next_page()
+        elif next_page is not None:
+            raise NextPage(next_page)
 
     def flush(self):
         for obj in self.objects.values():
             yield obj
 
-    def check_next_page(self):
+    def get_next_page(self):
+        """
+        Get the next page given by ``next_page``, or None.
+        """
         if not hasattr(self, 'next_page'):
-            return
+            return None
 
         next_page = getattr(self, 'next_page')
         try:
-            value = self.use_selector(next_page)
+            return self.use_selector(next_page)
         except (AttributeNotFound, XPathNotFound):
-            return
+            return None
 
+    def check_next_page(self):
+        value = self.get_next_page()
         if value is None:
             return
 
@@ -40,6 +40,12 @@ class LoggedOut(Exception):
     pass
 
 
+class ChecksumMismatch(Exception):
+    """
+    Raised when a downloaded file does not have the expected checksum.
+    """
+
+
 class BrowserTooManyRequests(BrowserUnavailable):
     """
     Client tries to perform too many requests within a certain timeframe.
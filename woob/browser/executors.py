@@ -0,0 +1,250 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Executor, Future
+from threading import Condition, Lock, Thread
+from typing import Any, Callable, Deque, Tuple
+
+
+__all__ = [
+    'SharedExecutor', 'ExecutorShare', 'get_shared_executor', 'configure_shared_executor', 'is_shared_by_default',
+]
+
+
+class ExecutorShare(Executor):
+    """
+    Part of a :class:`SharedExecutor` given to one user, like a browser.
+
+    It is used like a :class:`concurrent.futures.ThreadPoolExecutor`, but
+    its tasks are run by the threads of the shared executor, and at most
+    ``max_workers`` of them are run at the same time.
+    """
+
+    def __init__(self, executor: SharedExecutor, max_workers: int):
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+
+        self.executor = executor
+        self.max_workers = max_workers
+        self.pending: Deque[Tuple[Future, Callable, tuple, dict]] = deque()
+        self.running = 0
+        self.queued = False
+        self.closed = False
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        future: Future = Future()
+        with self.executor._condition:
+            if self.closed:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+            self.pending.append((future, fn, args, kwargs))
+            self.executor._enqueue(self)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        """
+        Stop accepting tasks, and wait for the tasks of this share.
+
+        Other shares of the executor are not affected.
+        """
+        condition = self.executor._condition
+        with condition:
+            self.closed = True
+            if cancel_futures:
+                while self.pending:
+                    self.pending.popleft()[0].cancel()
+            if wait:
+                condition.wait_for(lambda: not self.pending and not self.running)
+
+
+class SharedExecutor:
+    """
+    Pool of threads shared by several users, like all the browsers of a
+    process.
+
+    Each user gets an :class:`ExecutorShare` with :meth:`share`, limited to
+    a number of concurrent tasks. Shares with pending tasks are served in
+    turn, so a share with many tasks does not delay the tasks of the other
+    ones until all of its own are done.
+
+    Threads are started when needed, and stop after being idle for
+    ``idle_timeout`` seconds, so an idle process does not keep them.
+
+    :param max_workers: maximum number of threads
+    :param max_share: maximum number of concurrent tasks of a share, when
+        it is not given to :meth:`share`, or None for ``max_workers``
+    :param idle_timeout: seconds after which an idle thread stops
+    """
+
+    def __init__(self, max_workers: int = 32, max_share: int | None = None, idle_timeout: float = 60.0):
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+
+        self.max_workers = max_workers
+        self.max_share = max_share
+        self.idle_timeout = idle_timeout
+
+        self._condition = Condition(Lock())
+        # shares with pending tasks, in the order they are served
+        self._ready: Deque[ExecutorShare] = deque()
+        self._threads = 0
+        self._idle = 0
+
+    def __repr__(self):
+        return '<%s max_workers=%r max_share=%r threads=%r>' % (
+            type(self).__name__, self.max_workers, self.max_share, self._threads,
+        )
+
+    def share(self, max_workers: int | None = None) -> ExecutorShare:
+        """
+        Get a new share of the executor.
+
+        :param max_workers: maximum number of concurrent tasks of the share,
+            which is also limited by :attr:`max_share`
+        """
+        limits = [limit for limit in (max_workers, self.max_share, self.max_workers) if limit]
+        return ExecutorShare(self, min(limits))
+
+    @property
+    def threads(self) -> int:
+        """
+        Number of running threads.
+        """
+        with self._condition:
+            return self._threads
+
+    def _enqueue(self, share: ExecutorShare):
+        # called with the lock held
+        if not share.queued:
+            share.queued = True
+            self._ready.append(share)
+
+        if self._idle == 0 and self._threads < self.max_workers:
+            self._threads += 1
+            Thread(target=self._work, name='woob-executor', daemon=True).start()
+        else:
+            self._condition.notify_all()
+
+    def _next_task(self) -> Tuple[ExecutorShare, Future, Callable, tuple, dict] | None:
+        # called with the lock held
+        for _ in range(len(self._ready)):
+            share = self._ready.popleft()
+            if share.running >= share.max_workers:
+                # wait for its tasks to end, without blocking the other ones
+                self._ready.append(share)
+                continue
+
+            future, fn, args, kwargs = share.pending.popleft()
+            share.running += 1
+            if share.pending:
+                # served again after the other shares
+                self._ready.append(share)
+            else:
+                share.queued = False
+            return share, future, fn, args, kwargs
+        return None
+
+    def _work(self):
+        condition = self._condition
+        while True:
+            with condition:
+                task = self._next_task()
+                while task is None:
+                    self._idle += 1
+                    notified = condition.wait(self.idle_timeout)
+                    self._idle -= 1
+                    task = self._next_task()
+                    if task is None and not notified:
+                        self._threads -= 1
+                        return
+
+            share, future, fn, args, kwargs = task
+            try:
+                self._run(future, fn, args, kwargs)
+            finally:
+                with condition:
+                    share.running -= 1
+                    condition.notify_all()
+
+    @staticmethod
+    def _run(future: Future, fn: Callable, args: tuple, kwargs: dict):
+        if not future.set_running_or_notify_cancel():
+            return
+
+        try:
+            result: Any = fn(*args, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+
+_shared_executor: SharedExecutor | None = None
+_shared_by_default = False
+_shared_executor_lock = Lock()
+
+
+def get_shared_executor() -> SharedExecutor:
+    """
+    Get the process-wide executor.
+
+    It is the one used by browsers having
+    :attr:`~woob.browser.browsers.Browser.SHARED_EXECUTOR` set to ``True``,
+    or by every browser once enabled by :func:`configure_shared_executor`.
+    """
+    global _shared_executor
+
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            _shared_executor = SharedExecutor()
+        return _shared_executor
+
+
+def configure_shared_executor(
+    max_workers: int = 32,
+    max_share: int | None = None,
+    idle_timeout: float = 60.0,
+    default: bool = True,
+) -> SharedExecutor:
+    """
+    Replace the process-wide executor.
+
+    Browsers already created keep using the previous one.
+
+    :param max_workers: maximum number of threads of the process
+    :param max_share: maximum number of concurrent tasks of each browser,
+        which is also limited by its :attr:`~woob.browser.browsers.Browser.MAX_WORKERS`
+    :param idle_timeout: seconds after which an idle thread stops
+    :param default: use it for browsers which do not set
+        :attr:`~woob.browser.browsers.Browser.SHARED_EXECUTOR`, instead of
+        giving them their own threads
+    """
+    global _shared_executor, _shared_by_default
+
+    with _shared_executor_lock:
+        _shared_executor = SharedExecutor(max_workers, max_share, idle_timeout)
+        _shared_by_default = default
+        return _shared_executor
+
+
+def is_shared_by_default() -> bool:
+    """
+    Whether browsers use the process-wide executor unless they tell otherwise.
+    """
+    return _shared_by_default
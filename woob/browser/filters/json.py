@@ -17,7 +17,8 @@
 
 from __future__ import annotations
 
-from typing import Callable, Any
+from functools import lru_cache
+from typing import Callable, Any, Tuple
 
 from .base import _Filter, _NO_DEFAULT, Filter, debug, ItemNotFound
 
@@ -32,6 +33,68 @@ def __repr__(self):
 _NOT_FOUND = NotFound()
 
 
+@lru_cache(maxsize=4096)
+def _compile_keys(keys: Tuple) -> Callable[[Any], Any] | None:
+    """
+    Build a function getting the value of a selector made of keys only, or
+    None if it contains filters.
+
+    The value is first looked up as in dictionaries only, and lists are
+    only handled when it fails, as they need keys to be converted.
+    """
+    if any(type(key) not in (str, int) for key in keys):
+        return None
+
+    def walk(content):
+        for key in keys:
+            if isinstance(content, list):
+                key = int(key)
+            try:
+                content = content[key]
+            except (KeyError, IndexError, TypeError):
+                return _NOT_FOUND
+        return content
+
+    if not keys:
+        return lambda content: content
+
+    if len(keys) == 1:
+        key, = keys
+
+        def get(content):
+            try:
+                return content[key]
+            except (KeyError, IndexError):
+                return _NOT_FOUND
+            except TypeError:
+                return walk(content)
+
+    elif len(keys) == 2:
+        key1, key2 = keys
+
+        def get(content):
+            try:
+                return content[key1][key2]
+            except (KeyError, IndexError):
+                return _NOT_FOUND
+            except TypeError:
+                return walk(content)
+
+    else:
+        def get(content):
+            value = content
+            try:
+                for key in keys:
+                    value = value[key]
+            except (KeyError, IndexError):
+                return _NOT_FOUND
+            except TypeError:
+                return walk(content)
+            return value
+
+    return get
+
+
 class Dict(Filter):
     """Filter to find elements in a dictionary or list.
 
@@ -89,6 +152,14 @@ def select(cls, selector, item, obj=None, key=None):
         else:
             content = item.el
 
+        try:
+            get = _compile_keys(tuple(selector))
+        except TypeError:
+            # unhashable elements
+            get = None
+        if get is not None:
+            return get(content)
+
         for el in selector:
             if isinstance(content, list):
                 el = int(el)
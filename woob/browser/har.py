@@ -16,23 +16,253 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 
+import atexit
 import base64
+import gzip
 import io
 import os
+import queue
 from datetime import datetime
-from threading import Lock
+from threading import Lock, Thread
 from urllib.parse import urlparse, parse_qsl
 
 from woob.tools.json import json
 from woob.tools.log import getLogger
 from woob import __version__ as woob_version
 
-__all__ = ['HARManager']
+__all__ = ['HARManager', 'load_har']
+
+
+HAR_FORMATS = ('har', 'lines')
+"""
+Supported formats of HAR files.
+
+* ``har``: standard HAR file, ``bundle.har``, which can be opened by web
+  browsers.
+* ``lines``: ``bundle.harl``, a newline-delimited JSON file with the ``log``
+  object (without ``entries``) on the first line, then an entry per line.
+  It can be gzip-compressed (``bundle.harl.gz``). Use :func:`load_har` to
+  read it.
+"""
+
+
+class HARWriter:
+    """
+    Append HAR entries to a file from a background thread.
+
+    Entries are queued by the browser threads and written by batches, so
+    requests are not delayed by the serialization and the file accesses.
+    When the queue is full, callers wait for the writer to catch up.
+
+    Use :func:`get_har_writer` to get the writer of a file, there must be only
+    one per file.
+
+    :param path: path of the HAR file
+    :param har_format: one of :data:`HAR_FORMATS`
+    :param compress: write a gzip-compressed file (only for the ``lines`` format)
+    :param logger: parent logger
+    """
+
+    QUEUE_SIZE = 1000
+    """
+    Maximum number of entries waiting to be written.
+    """
+
+    BATCH_SIZE = 100
+    """
+    Maximum number of entries written at once.
+    """
+
+    def __init__(self, path, har_format='har', compress=False, logger=None):
+        if har_format not in HAR_FORMATS:
+            raise ValueError('Unknown HAR format %r' % har_format)
+        if compress and har_format != 'lines':
+            raise ValueError('Only the "lines" HAR format can be compressed')
+
+        self.path = path
+        self.har_format = har_format
+        self.compress = compress
+        self.logger = getLogger('har', logger)
+
+        self.queue = queue.Queue(self.QUEUE_SIZE)
+        self.thread = Thread(target=self._run, name='har-writer', daemon=True)
+        self.thread.start()
+
+    def write(self, bundle, har_entry):
+        """
+        Queue an entry.
+
+        :param bundle: HAR object, without entries, written with the first entry
+        :param har_entry: entry to append
+        """
+        self.queue.put((bundle, har_entry))
+
+    def flush(self):
+        """
+        Wait until every queued entry has been written.
+        """
+        self.queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                if self.har_format == 'lines':
+                    self._write_lines(batch)
+                else:
+                    self._write_har(batch)
+            except Exception as exc:
+                self.logger.warning('Unable to write %d HAR entries to %s: %s', len(batch), self.path, exc)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _write_har(self, batch):
+        entries = [har_entry for _, har_entry in batch]
+
+        if not os.path.isfile(self.path):
+            bundle = dict(batch[0][0])
+            bundle['log'] = dict(bundle['log'], entries=entries)
+            with open(self.path, 'w') as fd:
+                json.dump(bundle, fd, separators=(',', ':'))
+            return
+
+        # hack to avoid rewriting the whole file: entries are last in the JSON file
+        # we need to seek at the right place and write the new entries.
+        # this will unfortunately overwrite closings.
+        suffix = "]}}"
+        with open(self.path, 'r+') as fd:
+            # can't seek with a negative value...
+            fd.seek(0, io.SEEK_END)
+            after_entry_pos = fd.tell() - len(suffix)
+            fd.seek(after_entry_pos)
+
+            if fd.read(len(suffix)) != suffix:
+                self.logger.warning('HAR file does not end with the expected pattern')
+                return
+
+            fd.seek(after_entry_pos)
+            for har_entry in entries:
+                fd.write(',')  # there should have been at least one entry
+                json.dump(har_entry, fd, separators=(',', ':'))
+            fd.write(suffix)
+
+    def _write_lines(self, batch):
+        lines = []
+        if not os.path.isfile(self.path):
+            bundle = dict(batch[0][0])
+            bundle['log'] = {k: v for k, v in bundle['log'].items() if k != 'entries'}
+            lines.append(json.dumps(bundle, separators=(',', ':')))
+        lines.extend(json.dumps(har_entry, separators=(',', ':')) for _, har_entry in batch)
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+
+        if self.compress:
+            # concatenated gzip members are a valid gzip file
+            data = gzip.compress(data)
+
+        with open(self.path, 'ab') as fd:
+            fd.write(data)
+
+
+_har_writers = {}
+_har_writers_lock = Lock()
+
+
+def get_har_writer(path, har_format='har', compress=False, logger=None):
+    """
+    Get the writer of a HAR file, shared by all the browsers saving to it.
+    """
+    path = os.path.abspath(path)
+    with _har_writers_lock:
+        writer = _har_writers.get(path)
+        if writer is None:
+            writer = _har_writers[path] = HARWriter(path, har_format, compress, logger)
+        return writer
+
+
+@atexit.register
+def flush_har_writers():
+    """
+    Wait until every queued HAR entry has been written.
+    """
+    with _har_writers_lock:
+        writers = list(_har_writers.values())
+
+    for writer in writers:
+        writer.flush()
+
+
+def load_har(path):
+    """
+    Read a HAR file written by :class:`HARManager`, in any format.
+
+    :param path: path of the file, which may be gzip-compressed
+    :return: the HAR object, with all its entries
+    :rtype: dict
+    """
+    with open(path, 'rb') as fd:
+        compressed = fd.read(2) == b'\x1f\x8b'
+
+    opener = gzip.open if compressed else open
+    with opener(path, 'rt', encoding='utf-8') as fd:
+        first_line = fd.readline()
+        try:
+            header = json.loads(first_line)
+        except ValueError:
+            # standard, indented HAR file
+            header = None
+        else:
+            if 'entries' in header.get('log', {}):
+                # standard HAR file on a single line
+                return header
+
+        if header is None:
+            fd.seek(0)
+            return json.load(fd)
+
+        header['log']['entries'] = [json.loads(line) for line in fd if line.strip()]
+        return header
 
 
 class HARManager:
-    def __init__(self, responses_dirname, logger):
-        self.har_path = os.path.join(responses_dirname, 'bundle.har')
+    """
+    Save requests and responses of a browser to a HAR file.
+
+    The format is given by the ``WOOB_HAR_FORMAT`` environment variable (see
+    :data:`HAR_FORMATS`), and the ``lines`` format is gzip-compressed if
+    ``WOOB_HAR_COMPRESS`` is set to 1.
+
+    :param responses_dirname: directory where the file is written
+    :param logger: parent logger
+    :param har_format: override ``WOOB_HAR_FORMAT``
+    :param compress: override ``WOOB_HAR_COMPRESS``
+    """
+
+    def __init__(self, responses_dirname, logger, har_format=None, compress=None):
+        if har_format is None:
+            har_format = os.environ.get('WOOB_HAR_FORMAT') or 'har'
+        if compress is None:
+            compress = har_format == 'lines' and os.environ.get('WOOB_HAR_COMPRESS') == '1'
+
+        if har_format not in HAR_FORMATS:
+            raise ValueError('Unknown HAR format %r' % har_format)
+        if compress and har_format != 'lines':
+            raise ValueError('Only the "lines" HAR format can be compressed')
+
+        if har_format == 'lines':
+            filename = 'bundle.harl.gz' if compress else 'bundle.harl'
+        else:
+            filename = 'bundle.har'
+
+        self.har_path = os.path.join(responses_dirname, filename)
+        self.har_format = har_format
+        self.compress = compress
         self.responses_lock = Lock()
         self.logger = getLogger('har', logger)
 
@@ -205,29 +435,18 @@ def _build_har_entry(self, slug, request, response=None, time=''):
         return har_entry
 
     def _save_har_entry(self, har_entry):
-        self.bundle['log']['entries'].append(har_entry)
+        writer = get_har_writer(self.har_path, self.har_format, self.compress, self.logger)
+        writer.write(self.bundle, har_entry)
 
-        if not os.path.isfile(self.har_path):
-            with open(self.har_path, 'w') as fd:
-                json.dump(self.bundle, fd, separators=(',', ':'))
-        else:
-            # hack to avoid rewriting the whole file: entries are last in the JSON file
-            # we need to seek at the right place and write the new entry.
-            # this will unfortunately overwrite closings.
-            suffix = "]}}"
-            with open(self.har_path, 'r+') as fd:
-                # can't seek with a negative value...
-                fd.seek(0, io.SEEK_END)
-                after_entry_pos = fd.tell() - len(suffix)
-                fd.seek(after_entry_pos)
-
-                if fd.read(len(suffix)) != suffix:
-                    self.logger.warning('HAR file does not end with the expected pattern')
-                else:
-                    fd.seek(after_entry_pos)
-                    fd.write(',')  # there should have been at least one entry
-                    json.dump(har_entry, fd, separators=(',', ':'))
-                    fd.write(suffix)
+    def flush(self):
+        """
+        Wait until every saved entry has been written to the file.
+        """
+        with _har_writers_lock:
+            writer = _har_writers.get(os.path.abspath(self.har_path))
+
+        if writer is not None:
+            writer.flush()
 
     def save_response(self, slug, response):
         request = response.request
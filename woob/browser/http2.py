@@ -0,0 +1,290 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+HTTP/2 transport of browsers.
+
+It is used by browsers with :attr:`woob.browser.browsers.Browser.HTTP2`
+set, and needs the ``httpx`` and ``h2`` packages (``http2`` extra of woob).
+"""
+
+from http.client import HTTPMessage
+import io
+import os
+import ssl
+from threading import Lock
+from time import monotonic
+
+try:
+    import httpx
+except ImportError as exc:
+    raise ImportError('Please install woob[http2]') from exc
+
+import requests
+from requests.adapters import DEFAULT_POOLSIZE, DEFAULT_RETRIES, BaseAdapter
+from requests.utils import select_proxy
+from urllib3 import HTTPResponse
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, ProtocolError, ReadTimeoutError
+from urllib3.util.retry import Retry
+
+from .adapters import _BodySizesMixin, _RecordedResponse
+
+
+__all__ = ['HTTP2Adapter']
+
+
+class _StreamReader(io.RawIOBase):
+    # file object reading the body of a httpx response, as it is received
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+        self.chunks = response.iter_raw()
+        self.pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            try:
+                self.pending = next(self.chunks)
+            except StopIteration:
+                return 0
+            except httpx.TransportError as exc:
+                raise ProtocolError('Connection broken: %r' % exc, exc) from exc
+
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self.response.close()
+        super().close()
+
+
+class HTTP2Adapter(_BodySizesMixin, BaseAdapter):
+    """
+    Adapter sending requests with HTTP/2, through httpx.
+
+    Requests sent to the same host at the same time share one connection,
+    instead of each using its own. Redirections, cookies, hooks and errors
+    are still handled by the requests session, so responses are the usual
+    :class:`requests.Response` objects.
+
+    Responses have the ``timings`` and ``sizes`` attributes given by
+    :class:`woob.browser.adapters.HTTPAdapter`, but without the ``connect``
+    and ``tls`` timings.
+
+    Servers which do not support HTTP/2 are talked to with HTTP/1.1. Retries
+    are handled as with :class:`requests.adapters.HTTPAdapter`, but custom SSL
+    contexts and shared connection pools of
+    :class:`woob.browser.adapters.HTTPAdapter` are not used.
+
+    :param http1: allow HTTP/1.1 when the server does not negotiate HTTP/2;
+        if False, HTTP/2 is also used without TLS (``h2c`` with prior
+        knowledge)
+    :param max_retries: maximum number of retries of each request, or a
+        :class:`urllib3.util.Retry` object (like
+        :class:`woob.browser.adapters.RetryPolicy`)
+    :param pool_maxsize: maximum number of connections
+    :param proxy_headers: headers to send to proxy (if any)
+    :type proxy_headers: dict
+    """
+
+    def __init__(self, http1=True, pool_maxsize=DEFAULT_POOLSIZE, proxy_headers=None, max_retries=DEFAULT_RETRIES):
+        super().__init__()
+        self.http1 = http1
+        self.pool_maxsize = pool_maxsize
+        self._proxy_headers = proxy_headers or {}
+        if max_retries == DEFAULT_RETRIES:
+            self.max_retries = Retry(0, read=False)
+        else:
+            self.max_retries = Retry.from_int(max_retries)
+        self._transports = {}
+        self._lock = Lock()
+
+    def __getstate__(self):
+        return {
+            'http1': self.http1,
+            'pool_maxsize': self.pool_maxsize,
+            '_proxy_headers': self._proxy_headers,
+            'max_retries': self.max_retries,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state['http1'], state['pool_maxsize'], state['_proxy_headers'], state['max_retries'])
+
+    def add_proxy_header(self, key, value):
+        self._proxy_headers[key] = value
+
+    def update_proxy_headers(self, headers):
+        self._proxy_headers.update(headers)
+
+    def ssl_context(self, verify, cert):
+        """
+        Build the SSL context of connections, from the ``verify`` and ``cert``
+        arguments of :meth:`requests.Session.send`.
+        """
+        if isinstance(verify, str) and os.path.isdir(verify):
+            context = ssl.create_default_context(capath=verify)
+        elif isinstance(verify, str):
+            context = ssl.create_default_context(cafile=verify)
+        else:
+            # same certificates as requests
+            context = ssl.create_default_context(cafile=requests.certs.where())
+            if not verify:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+
+        if isinstance(cert, str):
+            context.load_cert_chain(cert)
+        elif cert:
+            context.load_cert_chain(*cert)
+        return context
+
+    def get_transport(self, verify, cert, proxy):
+        """
+        Get the transport of a configuration, with its connections.
+        """
+        if isinstance(cert, list):
+            cert = tuple(cert)
+        key = (verify, cert, proxy)
+
+        with self._lock:
+            transport = self._transports.get(key)
+            if transport is None:
+                if proxy:
+                    proxy = httpx.Proxy(proxy, headers=self._proxy_headers)
+                transport = self._transports[key] = httpx.HTTPTransport(
+                    verify=self.ssl_context(verify, cert),
+                    http1=self.http1,
+                    http2=True,
+                    limits=httpx.Limits(max_connections=self.pool_maxsize),
+                    proxy=proxy or None,
+                )
+            return transport
+
+    @staticmethod
+    def _timeout(timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    @staticmethod
+    def _retry_error(exc):
+        # urllib3 exception of the same kind as a httpx one, for Retry to
+        # count it as a connect or read error
+        if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.ProxyError)):
+            return ConnectTimeoutError(str(exc))
+        if isinstance(exc, httpx.ReadTimeout):
+            return ReadTimeoutError(None, None, str(exc))
+        return ProtocolError(str(exc), exc)
+
+    @staticmethod
+    def _request_error(exc, request):
+        if isinstance(exc, httpx.ConnectTimeout):
+            return requests.exceptions.ConnectTimeout(exc, request=request)
+        if isinstance(exc, httpx.ReadTimeout):
+            return requests.exceptions.ReadTimeout(exc, request=request)
+        if isinstance(exc, httpx.TimeoutException):
+            return requests.exceptions.Timeout(exc, request=request)
+        if isinstance(exc, httpx.ProxyError):
+            return requests.exceptions.ProxyError(exc, request=request)
+        return requests.exceptions.ConnectionError(exc, request=request)
+
+    def _build_raw(self, request, http_response):
+        headers = http_response.headers.multi_items()
+        message = HTTPMessage()
+        for name, value in headers:
+            message.add_header(name, value)
+
+        http_version = http_response.extensions.get('http_version', b'HTTP/1.1').decode('ascii')
+        return HTTPResponse(
+            body=_StreamReader(http_response),
+            headers=headers,
+            status=http_response.status_code,
+            version=20 if http_version == 'HTTP/2' else 11,
+            reason=http_response.reason_phrase,
+            preload_content=False,
+            decode_content=False,
+            original_response=_RecordedResponse(message),
+            request_method=request.method,
+            request_url=request.url,
+        )
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        transport = self.get_transport(verify, cert, select_proxy(request.url, proxies or {}))
+
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        retries = self.max_retries
+        while True:
+            http_request = httpx.Request(
+                request.method,
+                request.url,
+                headers=list(request.headers.items()),
+                content=body,
+                extensions={'timeout': self._timeout(timeout).as_dict()},
+            )
+
+            start = monotonic()
+            try:
+                http_response = transport.handle_request(http_request)
+            except httpx.TransportError as exc:
+                try:
+                    retries = retries.increment(request.method, request.url, error=self._retry_error(exc))
+                except Exception:
+                    raise self._request_error(exc, request) from exc
+                retries.sleep()
+                continue
+            received = monotonic()
+
+            raw = self._build_raw(request, http_response)
+            if not retries.is_retry(request.method, raw.status, bool(raw.headers.get('Retry-After'))):
+                break
+
+            try:
+                retries = retries.increment(request.method, request.url, response=raw)
+            except MaxRetryError as exc:
+                if retries.raise_on_status:
+                    http_response.close()
+                    raise requests.exceptions.RetryError(exc, request=request) from exc
+                # the last response is handled as usual
+                break
+            http_response.close()
+            retries.sleep(raw)
+
+        response = self.build_response(request, raw)
+        response.timings = {'ttfb': received - start, 'received': received}
+        self._count_sizes(response)
+        if not stream:
+            # read the body now, so the stream is released
+            response.content
+        return response
+
+    build_response = requests.adapters.HTTPAdapter.build_response
+
+    def close(self):
+        with self._lock:
+            transports, self._transports = self._transports, {}
+        for transport in transports.values():
+            transport.close()
@@ -0,0 +1,238 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import math
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+from urllib.parse import urlsplit
+
+import requests
+
+
+__all__ = ['RequestMetrics', 'MetricsCollector']
+
+
+def percentile(values: List[float], ratio: float) -> float:
+    """
+    Percentile of sorted values, with the nearest-rank method.
+    """
+    if not values:
+        return 0.
+    return values[max(0, math.ceil(ratio * len(values)) - 1)]
+
+
+class RequestMetrics:
+    """
+    Timings of a request and of the processing of its response.
+
+    Every duration is in seconds. ``connect`` and ``tls`` are 0 when an
+    already established connection was reused, and ``None`` when the
+    transport does not report them.
+
+    :param response: the response, which carries the transport timings
+        given by :class:`~woob.browser.adapters.HTTPAdapter`
+    """
+
+    PHASES = ('connect', 'tls', 'ttfb', 'download', 'parse', 'iteration')
+
+    def __init__(self, response: requests.Response):
+        timings = getattr(response, 'timings', {})
+
+        self.name: str | None = None
+        """Name of the :class:`~woob.browser.url.URL` attribute of the page."""
+
+        self.method = response.request.method
+        self.url = response.url
+        self.status = response.status_code
+        self.redirects = len(response.history)
+
+        self.connect: float | None = timings.get('connect')
+        """Time to establish the TCP connection."""
+
+        self.tls: float | None = timings.get('tls')
+        """Time of the TLS handshake."""
+
+        self.ttfb: float = timings.get('ttfb', response.elapsed.total_seconds())
+        """Time to the first byte, from the sending of the request to the
+        reception of headers, including ``connect`` and ``tls``."""
+
+        self.download: float = 0.
+        """Time to receive the body."""
+        if 'received' in timings:
+            self.download = monotonic() - timings['received']
+
+        self.parse: float = 0.
+        """Time to build the documents of pages."""
+
+        self.iteration: float = 0.
+        """Time spent in element methods of the page (``@method``)."""
+
+        # time spent in nested measures, for each measure in progress
+        self._nested: List[float] = []
+
+        # counted by the adapter as the body is read, even when it is
+        # streamed after the metrics are recorded
+        self._sizes: Dict[str, int] | None = getattr(response, 'sizes', None)
+        if self._sizes is None:
+            self._sizes = {'received': 0, 'decoded': 0}
+            try:
+                self._sizes['received'] = response.raw.tell()
+            except (AttributeError, TypeError):
+                self._sizes['received'] = len(response.content) if response._content_consumed else 0
+            if response._content_consumed and response._content:
+                self._sizes['decoded'] = len(response._content)
+
+        self.content_encoding: str | None = response.headers.get('Content-Encoding')
+        """Compression of the body."""
+
+    def __repr__(self):
+        return '<%s %s %s %s total=%.3f>' % (
+            type(self).__name__, self.name, self.method, self.url, self.total,
+        )
+
+    @property
+    def size(self) -> int:
+        """
+        Bytes received for the body, before decompression.
+        """
+        return self._sizes['received']
+
+    @property
+    def decoded_size(self) -> int:
+        """
+        Bytes of the body, after decompression.
+        """
+        return self._sizes['decoded']
+
+    @property
+    def total(self) -> float:
+        """
+        Sum of the time of every phase.
+        """
+        return self.ttfb + self.download + self.parse + self.iteration
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        """
+        Add the time spent in the block to a phase.
+
+        Time spent in nested measures, like building the document while
+        iterating on elements, is only added to the inner phase.
+        """
+        start = monotonic()
+        self._nested.append(0.)
+        try:
+            yield
+        finally:
+            elapsed = monotonic() - start
+            nested = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            setattr(self, phase, getattr(self, phase) + elapsed - nested)
+
+    def measure_iter(self, phase: str, iterable: Iterable) -> Iterator:
+        """
+        Add the time spent getting the items of an iterable to a phase.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.measure(phase):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'method': self.method,
+            'url': self.url,
+            'status': self.status,
+            'redirects': self.redirects,
+            'size': self.size,
+            'decoded_size': self.decoded_size,
+            'content_encoding': self.content_encoding,
+            'total': self.total,
+            **{phase: getattr(self, phase) for phase in self.PHASES},
+        }
+
+
+class MetricsCollector:
+    """
+    Collect the :class:`RequestMetrics` of the requests of a browser.
+
+    Metrics are given to every callback of :attr:`callbacks` once the
+    response has been received and handled. The ``parse`` and ``iteration``
+    times are only known afterwards, when the page is used, as documents are
+    built lazily: they are updated on the same object, and included in
+    :meth:`summary`.
+    """
+
+    def __init__(self):
+        self.records: List[RequestMetrics] = []
+        self.callbacks: List[Callable[[RequestMetrics], Any]] = []
+        self._lock = Lock()
+
+    def record(self, metrics: RequestMetrics):
+        with self._lock:
+            self.records.append(metrics)
+        for callback in self.callbacks:
+            callback(metrics)
+
+    def clear(self):
+        with self._lock:
+            self.records = []
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregate the metrics by :class:`~woob.browser.url.URL` name.
+
+        Requests which did not match any URL object are grouped under their
+        method and host.
+
+        :return: for each name, the ``count`` of requests, the ``bytes``
+            received and the ``decoded_bytes`` after decompression, and the
+            sum, p50 and p95 of the ``total`` time and of each phase
+        """
+        with self._lock:
+            records = list(self.records)
+
+        groups: Dict[str, List[RequestMetrics]] = {}
+        for metrics in records:
+            key = metrics.name or '%s %s' % (metrics.method, urlsplit(metrics.url).netloc)
+            groups.setdefault(key, []).append(metrics)
+
+        summary = {}
+        for key, group in groups.items():
+            summary[key] = stats = {
+                'count': len(group),
+                'bytes': sum(metrics.size for metrics in group),
+                'decoded_bytes': sum(metrics.decoded_size for metrics in group),
+            }
+            for phase in ('total',) + RequestMetrics.PHASES:
+                values = sorted(getattr(metrics, phase) or 0. for metrics in group)
+                stats[phase] = {
+                    'sum': sum(values),
+                    'p50': percentile(values, .5),
+                    'p95': percentile(values, .95),
+                }
+        return summary
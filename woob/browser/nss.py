@@ -37,6 +37,7 @@
 # import certificate:
 #   find -L /etc/ssl/certs -name "*.pem" | while read f; do certutil -A -d pki -i $f -n $f -t TCu,Cu,Tu; done
 
+import base64
 from functools import wraps
 from io import RawIOBase, BufferedRWPair
 import hashlib
@@ -47,6 +48,7 @@
 import subprocess
 from tempfile import NamedTemporaryFile
 from threading import Lock
+import time
 import warnings
 
 try:
@@ -57,13 +59,14 @@
     raise ImportError('Please install python3-nss')
 from requests.packages.urllib3.util.ssl_ import ssl_wrap_socket as old_ssl_wrap_socket
 import requests  # for AIA
+from woob.tools.json import json
 from woob.tools.log import getLogger
 
 
 warnings.warn('Use of NSS is deprecated, it will be removed in woob 4.0', DeprecationWarning, stacklevel=2)
 
 
-__all__ = ['init_nss', 'inject_in_urllib3', 'certificate_db_filename']
+__all__ = ['init_nss', 'inject_in_urllib3', 'certificate_db_filename', 'AIACache', 'set_aia_cache_path']
 
 
 CTX = None
@@ -246,8 +249,151 @@ def auth_cert_pinning(sock, check_sig, is_server, path):
     return (expected.signed_data.data == cert.signed_data.data)
 
 
-AIA_CACHE = {}
-AIA_LOCK = Lock()
+class AIACache:
+    """
+    Cache of the intermediate certificates fetched from AIA URLs.
+
+    Certificates are kept in memory and, if ``path`` is given, in files of
+    this directory, so they are reused by the next connections and the next
+    runs instead of being fetched again during TLS handshakes. They are
+    keyed by AIA URL and issuer name of the certificate needing them.
+
+    :param path: directory where certificates are stored, or None to only
+        keep them in memory
+    :param max_age: seconds during which a fetched certificate is reused,
+        it is also never used after its expiration
+    """
+
+    def __init__(self, path=None, max_age=7 * 24 * 3600):
+        self.path = path
+        self.max_age = max_age
+        self.lock = Lock()
+        self.entries = {}
+
+    @staticmethod
+    def key(url, issuer):
+        return hashlib.sha256(('%s\n%s' % (url, issuer)).encode('utf-8')).hexdigest()
+
+    def _filename(self, key):
+        return os.path.join(self.path, '%s.json' % key)
+
+    def _load(self, key):
+        try:
+            with open(self._filename(key)) as fd:
+                entry = json.load(fd)
+            entry['der'] = base64.b64decode(entry['der'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return entry
+
+    def _is_valid(self, entry):
+        now = time.time()
+        return now - entry['fetched'] < self.max_age and now < entry['not_after']
+
+    def get(self, url, issuer):
+        """
+        Get the DER data of a certificate, or None if it is not cached.
+        """
+        key = self.key(url, issuer)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None and self.path:
+                entry = self._load(key)
+                if entry is not None:
+                    self.entries[key] = entry
+
+            if entry is None or not self._is_valid(entry):
+                return None
+            return entry['der']
+
+    def set(self, url, issuer, der):
+        """
+        Store the DER data of a fetched certificate.
+        """
+        certificate = nss.nss.Certificate(der, perm=False)
+        entry = {
+            'url': url,
+            'issuer': issuer,
+            'fetched': time.time(),
+            # in microseconds since epoch
+            'not_after': certificate.valid_not_after / 1e6,
+            'der': der,
+        }
+
+        key = self.key(url, issuer)
+        with self.lock:
+            self.entries[key] = entry
+            if not self.path:
+                return
+
+            os.makedirs(self.path, exist_ok=True)
+            data = dict(entry, der=base64.b64encode(der).decode('ascii'))
+            # written atomically, as several processes may use the cache
+            with NamedTemporaryFile('w', dir=self.path, delete=False) as fd:
+                json.dump(data, fd)
+            os.replace(fd.name, self._filename(key))
+
+    def discard(self, url, issuer):
+        """
+        Remove a certificate, for example when it is not valid anymore.
+        """
+        key = self.key(url, issuer)
+        with self.lock:
+            self.entries.pop(key, None)
+            if self.path:
+                try:
+                    os.remove(self._filename(key))
+                except OSError:
+                    pass
+
+    def fetch(self, url, issuer):
+        """
+        Get a certificate from the cache, or fetch it.
+
+        :return: DER data of the certificate, and whether it was cached
+        """
+        der = self.get(url, issuer)
+        if der is not None:
+            return der, True
+
+        der = requests.get(url, timeout=30).content
+        self.set(url, issuer, der)
+        return der, False
+
+    def iter_certificates(self):
+        """
+        Iterate on the DER data of the valid certificates stored in ``path``.
+        """
+        if not self.path or not os.path.isdir(self.path):
+            return
+
+        for filename in sorted(os.listdir(self.path)):
+            if not filename.endswith('.json'):
+                continue
+            entry = self._load(filename[:-len('.json')])
+            if entry is not None and self._is_valid(entry):
+                yield entry['der']
+
+
+AIA_CACHE = AIACache()
+"""
+Cache used to verify certificates with AIA. It is only kept in memory,
+unless a directory is given to :func:`set_aia_cache_path`, :func:`init_nss`
+or :func:`create_cert_db`.
+"""
+
+
+def set_aia_cache_path(path):
+    """
+    Keep the certificates of :data:`AIA_CACHE` in a directory, to reuse them
+    in the next runs.
+
+    :param path: directory where certificates are stored
+    """
+    global AIA_CACHE
+
+    if AIA_CACHE.path != path:
+        AIA_CACHE = AIACache(path, max_age=AIA_CACHE.max_age)
 
 
 def auth_cert_basic(sock, check_sig, is_server):
@@ -287,23 +433,25 @@ def auth_cert_aia_only(sock, check_sig, is_server):
     # yes, the parent TLS cert is behind an HTTP URL
     parent_url = re.search(r'Method: PKIX CA issuers access method Location: URI: (http:\S+)', aia_text).group(1)
 
-    with AIA_LOCK:
-        parent_der = AIA_CACHE.get(parent_url)
+    cache = AIA_CACHE
+    issuer = str(cert.issuer)
+    while True:
+        parent_der, cached = cache.fetch(parent_url, issuer)
 
-    if parent_der is None:
-        parent_der = requests.get(parent_url, timeout=30).content
-        with AIA_LOCK:
-            AIA_CACHE[parent_url] = parent_der
+        # verify parent cert is a CA in our db
+        parent = nss.nss.Certificate(parent_der, perm=False)
+        required = nss.nss.certificateUsageAnyCA
+        try:
+            usages = parent.verify_now(db, check_sig, required) & required
+        except nss.error.NSPRError:
+            usages = 0
+        if usages:
+            break
 
-    # verify parent cert is a CA in our db
-    parent = nss.nss.Certificate(parent_der, perm=False)
-    required = nss.nss.certificateUsageAnyCA
-    try:
-        usages = parent.verify_now(db, check_sig, required) & required
-    except nss.error.NSPRError:
-        return False
-    if not usages:
-        return False
+        cache.discard(parent_url, issuer)
+        if not cached:
+            return False
+        # the cached certificate may have been replaced, fetch it again
 
     # verify leaf certificate
     try:
@@ -417,9 +565,12 @@ def inject_in_urllib3():
         pkg.connection.ssl_wrap_socket = ssl_wrap_socket
 
 
-def init_nss(path, rw=False):
+def init_nss(path, rw=False, aia_cache_path=None):
     global CTX, INIT_PID, INIT_ARGS
 
+    if aia_cache_path is not None:
+        set_aia_cache_path(aia_cache_path)
+
     if CTX is not None and INIT_PID == os.getpid():
         return
 
@@ -435,20 +586,22 @@ def init_nss(path, rw=False):
     CTX = nss.nss.nss_init_context(path, flags=flags)
 
 
-def add_nss_cert(dbpath, certpath, nickname):
+def add_nss_cert(dbpath, certpath, nickname, trust='TC,C,T'):
     # Even if you use a different nickname, NSS will not add a cert that is
     # already in db, without signaling it.
-    subprocess.check_call(['certutil', '-A', '-d', dbpath, '-i', certpath, '-n', nickname, '-t', 'TC,C,T'])
+    subprocess.check_call(['certutil', '-A', '-d', dbpath, '-i', certpath, '-n', nickname, '-t', trust])
 
 
 def del_nss_cert(dbpath, nickname):
     subprocess.check_call(['certutil', '-D', '-d', dbpath, '-n', nickname])
 
 
-def create_cert_db(path):
+def create_cert_db(path, aia_cache_path=None):
     # continue to provide this function for braindead customers who believe a development version
     # is an api-stable version
-    update_cert_db(path)
+    if aia_cache_path is not None:
+        set_aia_cache_path(aia_cache_path)
+    update_cert_db(path, aia_cache=AIA_CACHE)
 
 
 def iter_db_certs(path):
@@ -474,8 +627,15 @@ def create_empty_db(path):
         raise ImportError('Please install libnss3-tools')
 
 
-def update_cert_db(dbpath):
-    """Imports certificates from system dir into NSS database."""
+def update_cert_db(dbpath, aia_cache=None):
+    """Imports certificates from system dir into NSS database.
+
+    :param aia_cache: if given, intermediate certificates of this
+        :class:`AIACache` are imported too, without being trusted, so chains
+        of servers which do not send them can be verified without fetching
+        them
+    :type aia_cache: :class:`AIACache`
+    """
 
     # Tries to keep unchanged certificates.
     # Each certificate has a "nickname" in NSS db, which is defined by us, not
@@ -555,6 +715,24 @@ def update_cert_db(dbpath):
         except subprocess.CalledProcessError:
             LOGGER.warning('Unable to handle ca file {}'.format(cert_file))
 
+    if aia_cache is not None:
+        for der in aia_cache.iter_certificates():
+            nick = 'aia-%s' % hashlib.sha1(der).hexdigest()
+            if nick in db_certs:
+                obsolete_certs.discard(nick)
+                continue
+
+            with NamedTemporaryFile('wb') as fd:
+                fd.write(der)
+                fd.flush()
+                try:
+                    # only used to build chains, not as trust anchors
+                    add_nss_cert(dbpath, fd.name, nick, trust=',,')
+                except subprocess.CalledProcessError:
+                    LOGGER.warning('Unable to import AIA certificate %s', nick)
+                else:
+                    db_certs.add(nick)
+
     for nick in obsolete_certs:
         # Those certs were imported in a previous session, but they don't seem
         # to be on the system anymore.
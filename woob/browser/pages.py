@@ -18,11 +18,12 @@
 from __future__ import annotations
 
 import codecs
+from contextlib import nullcontext
 import importlib
 import re
 import warnings
 from typing import (
-    Dict, Callable, List, Any, Iterator, Type, ClassVar, TYPE_CHECKING
+    Dict, Callable, List, Any, Iterable, Iterator, Type, ClassVar, TYPE_CHECKING
 )
 from collections import OrderedDict
 from functools import wraps
@@ -37,16 +38,22 @@
 
 from woob.browser.filters.base import _Filter
 from woob.exceptions import ParseError
-from woob.tools.json import json, mini_jsonpath
+from woob.tools.json import loads as json_loads, mini_jsonpath
 from woob.tools.log import getLogger
 from woob.tools.pdf import decompress_pdf
 
 from .exceptions import LoggedOut
 
 if TYPE_CHECKING:
+    from concurrent.futures import Future
+
     from woob.browser.browsers import Browser
 
 
+# marks the document of a page as not built yet
+_NOT_BUILT = object()
+
+
 def pagination(func: Callable):
     r"""
     This helper decorator can be used to handle pagination pages easily.
@@ -101,9 +108,13 @@ class NextPage(Exception):
     go on the next page.
 
     See :meth:`PagesBrowser.pagination` or decorator :func:`pagination`.
+
+    :param request: URL or request of the next page, the next page itself,
+        or the :class:`~concurrent.futures.Future` of the request of the
+        next page, if it has already been sent
     """
 
-    def __init__(self, request: str | Page):
+    def __init__(self, request: str | requests.Request | Page | Future):
         super().__init__()
         self.request = request
 
@@ -119,6 +130,9 @@ class Page:
     response content is accessible in :attr:`text`, decoded with specified
     :attr:`encoding`.
 
+    The document, :attr:`doc`, is only built the first time it is used, after
+    the encoding has been detected by :meth:`detect_encoding`.
+
     :param browser: browser used to go on the page
     :type browser: :class:`woob.browser.browsers.Browser`
     :param response: response object
@@ -171,6 +185,9 @@ def __new__(cls, *args, **kwargs):
         """
         return object.__new__(cls)
 
+    _doc: Any = _NOT_BUILT
+    _detecting_encoding: bool = False
+
     def __init__(
         self,
         browser: Browser,
@@ -184,19 +201,47 @@ def __init__(
         self.url = self.response.url
         self.params = params
 
-        # Setup encoding and build document
+        # Setup encoding, the document is built when it is used
         self.forced_encoding = self.normalize_encoding(encoding or self.ENCODING)
         if self.forced_encoding:
             self.response.encoding = self.forced_encoding
-        self.doc = self.build_doc(self.data)
 
-        # Last chance to change encoding, according to :meth:`detect_encoding`,
-        # which can be used to detect a document-level encoding declaration
-        if not self.forced_encoding:
-            encoding = self.detect_encoding()
-            if encoding and encoding != self.encoding:
-                self.response.encoding = encoding
-                self.doc = self.build_doc(self.data)
+    @property
+    def doc(self) -> Any:
+        """
+        Document built by :meth:`build_doc` from :attr:`data`.
+        """
+        if self._doc is _NOT_BUILT:
+            if self._detecting_encoding:
+                # detect_encoding() needs the document, build it with the
+                # current encoding, it will be built again if it changes.
+                self._doc = self.build_doc(self.data)
+            else:
+                self._load_doc()
+        return self._doc
+
+    @doc.setter
+    def doc(self, value: Any):
+        self._doc = value
+
+    def _load_doc(self):
+        metrics = getattr(self.response, 'metrics', None)
+        with metrics.measure('parse') if metrics is not None else nullcontext():
+            # Last chance to change encoding, according to :meth:`detect_encoding`,
+            # which can be used to detect a document-level encoding declaration
+            if not self.forced_encoding:
+                self._detecting_encoding = True
+                try:
+                    encoding = self.detect_encoding()
+                finally:
+                    self._detecting_encoding = False
+
+                if encoding and encoding != self.encoding:
+                    self.response.encoding = encoding
+                    self._doc = _NOT_BUILT
+
+            if self._doc is _NOT_BUILT:
+                self._doc = self.build_doc(self.data)
 
     # Encoding issues are delegated to Response instance, implemented by
     # requests module.
@@ -254,6 +299,10 @@ def detect_encoding(self) -> None | str:
         """
         Override this method to implement detection of document-level encoding
         declaration, if any (eg. html5's <meta charset="some-charset">).
+
+        It is called before the document is built, so it should look at
+        :attr:`data` rather than :attr:`doc`: using :attr:`doc` is supported,
+        but the document is built twice if the encoding changes.
         """
         return None
 
@@ -428,7 +477,32 @@ class CsvPage(Page):
     This means the rows will be also available as dictionaries.
     """
 
-    def build_doc(self, content: bytes) -> List:
+    STREAM: ClassVar[bool] = False
+    """
+    If True, :attr:`doc` is an iterator on rows, which are read when they
+    are used, instead of a list.
+
+    When the response is opened with ``stream=True``, the body is decoded
+    and parsed as it is received, and is never entirely kept in memory:
+    :attr:`content` and :attr:`text` can't be used anymore once rows are
+    read. The document can only be iterated once.
+    """
+
+    CHUNK_SIZE: ClassVar[int] = 64 * 1024
+    """
+    Size of the chunks read from the response, with :attr:`STREAM`.
+    """
+
+    @property
+    def data(self) -> Any:
+        if self.STREAM:
+            return self.response.iter_content(self.CHUNK_SIZE)
+        return self.content
+
+    def build_doc(self, content: bytes | Iterable[bytes]) -> List | Iterator:
+        if self.STREAM:
+            return self.iter_rows(self.iter_lines(content))
+
         # We may need to temporarily convert content to utf-8 because csv
         # does not support Unicode.
         encoding = self.encoding
@@ -440,6 +514,40 @@ def build_doc(self, content: bytes) -> List:
             content = content.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
         return self.parse(StringIO(content.decode(encoding)))
 
+    def iter_lines(self, chunks: Iterable[bytes]) -> Iterator[str]:
+        """
+        Decode chunks of the file, and yield its lines.
+
+        :param chunks: chunks of the file, which can be split anywhere
+        """
+        encoding = self.encoding or 'utf-8'
+        if encoding == 'utf-16le':
+            # If there is a BOM, the utf-16 decoder will get rid of it
+            encoding = 'utf-16'
+        decoder = codecs.getincrementaldecoder(encoding)()
+
+        pending = ''
+        for chunk in chunks:
+            pending += decoder.decode(chunk)
+            if self.NEWLINES_HACK:
+                # a final \r may be the start of a \r\n
+                tail = '\r' if pending.endswith('\r') else ''
+                pending = pending[:len(pending) - len(tail)].replace('\r\n', '\n').replace('\r', '\n') + tail
+
+            *lines, pending = pending.split('\n')
+            for line in lines:
+                yield line + '\n'
+
+        pending += decoder.decode(b'', final=True)
+        if self.NEWLINES_HACK:
+            pending = pending.replace('\r\n', '\n').replace('\r', '\n')
+
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line + '\n'
+        if pending:
+            yield pending
+
     def parse(self, data: StringIO, encoding: str | None = None) -> List:
         """
         Method called by the constructor of :class:`CsvPage` to parse the document.
@@ -449,24 +557,28 @@ def parse(self, data: StringIO, encoding: str | None = None) -> List:
         :param encoding: if given, use it to decode cell strings
         :type encoding: :class:`str`
         """
-        reader = csv.reader(data, dialect=self.DIALECT, **self.FMTPARAMS)
+        return list(self.iter_rows(data))
+
+    def iter_rows(self, lines: Iterable[str]) -> Iterator[List[str] | Dict[str, str]]:
+        """
+        Parse lines of the file, and yield its rows.
+
+        Rows are lists of cells, or dictionaries if :attr:`HEADER` is set.
+
+        :param lines: lines of the file, or a file stream
+        """
+        reader = csv.reader(lines, dialect=self.DIALECT, **self.FMTPARAMS)
         header = None
-        drows: List = []
-        rows: List = []
         for i, row in enumerate(reader):
             if self.HEADER and i+1 < self.HEADER:
                 continue
             row = [c.strip() for c in row]
             if header is None and self.HEADER:
                 header = row
-            else:
-                rows.append(row)
-                if header:
-                    drow = {}
-                    for i, cell in enumerate(row):
-                        drow[header[i]] = cell
-                    drows.append(drow)
-        return drows if header is not None else rows
+            elif header is None:
+                yield row
+            elif header:
+                yield {name: row[n] if n < len(row) else None for n, name in enumerate(header)}
 
     def decode_row(self, row: List, encoding: str) -> List:
         """
@@ -491,7 +603,23 @@ class JsonPage(Page):
     ENCODING = 'utf-8-sig'
 
     @property
-    def data(self) -> str:
+    def data(self) -> str | bytes:
+        """
+        Content of the response, given to the JSON backend.
+
+        It is the raw content if it is UTF-8, which is decoded faster than
+        :attr:`text`, unless :meth:`build_doc` is overridden, as pages doing
+        it may expect text.
+        """
+        if (
+            self.encoding in ('utf-8', 'utf-8-sig')
+            and type(self).build_doc is JsonPage.build_doc
+            and isinstance(self.response, requests.Response)
+        ):
+            content = self.content
+            if content.startswith(codecs.BOM_UTF8):
+                content = content[len(codecs.BOM_UTF8):]
+            return content
         return self.response.text
 
     def get(self, path: str, default: Any | None = None) -> Any:
@@ -507,8 +635,8 @@ def path(
     ) -> Iterator:
         return mini_jsonpath(context or self.doc, path)
 
-    def build_doc(self, text) -> Dict | List:
-        return json.loads(text)
+    def build_doc(self, text: str | bytes) -> Dict | List:
+        return json_loads(text)
 
 
 class XLSPage(Page):
@@ -526,7 +654,20 @@ class XLSPage(Page):
     Specify the index of the worksheet to use.
     """
 
-    def build_doc(self, content: bytes) -> List:
+    STREAM: ClassVar[bool] = False
+    """
+    If True, :attr:`doc` is an iterator on the rows of the worksheet, read
+    when they are used, instead of a list.
+
+    xlsx files are read with :mod:`openpyxl` in read-only mode, which parses
+    rows as they are iterated; empty cells are None and numbers and dates
+    keep their types. xls files are read with :mod:`xlrd`, only loading the
+    worksheet used. The document can only be iterated once.
+    """
+
+    def build_doc(self, content: bytes) -> List | Iterator:
+        if self.STREAM:
+            return self.iter_rows(self.iter_sheet(content))
         return self.parse(content)
 
     def parse(self, data: bytes) -> List:
@@ -538,23 +679,53 @@ def parse(self, data: bytes) -> List:
         wb = xlrd.open_workbook(file_contents=data)
         sh = wb.sheet_by_index(self.SHEET_INDEX)
 
+        return list(self.iter_rows(sh.row_values(i) for i in range(sh.nrows)))
+
+    def iter_sheet(self, data: bytes) -> Iterator[List]:
+        """
+        Yield the cells of each row of the worksheet, reading only what is
+        needed.
+        """
+        if data.startswith(b'PK\x03\x04'):
+            # xlsx files are zip archives
+            import openpyxl
+            wb = openpyxl.load_workbook(BytesIO(data), read_only=True, data_only=True)
+            try:
+                ws = wb.worksheets[self.SHEET_INDEX]
+                # the dimension declared in the file may be wrong, in
+                # which case rows would be truncated
+                ws.reset_dimensions()
+                for row in ws.iter_rows(values_only=True):
+                    yield list(row)
+            finally:
+                wb.close()
+        else:
+            import xlrd
+            wb = xlrd.open_workbook(file_contents=data, on_demand=True)
+            try:
+                sh = wb.sheet_by_index(self.SHEET_INDEX)
+                for i in range(sh.nrows):
+                    yield sh.row_values(i)
+            finally:
+                wb.release_resources()
+
+    def iter_rows(self, rows: Iterable[List]) -> Iterator[List | Dict]:
+        """
+        Yield rows of the worksheet, as dictionaries if :attr:`HEADER` is set.
+
+        Rows may not have the same length; with a header, missing cells are
+        None and cells without a column name are ignored.
+        """
         header = None
-        drows: List = []
-        rows: List = []
-        for i in range(sh.nrows):
+        for i, row in enumerate(rows):
             if self.HEADER and i + 1 < self.HEADER:
                 continue
-            row = sh.row_values(i)
             if header is None and self.HEADER:
-                header = [s.replace('/', '') for s in row]
-            else:
-                rows.append(row)
-                if header:
-                    drow = {}
-                    for i, cell in enumerate(sh.row_values(i)):
-                        drow[header[i]] = cell
-                    drows.append(drow)
-        return drows if header is not None else rows
+                header = [str(s).replace('/', '') if s is not None else '' for s in row]
+            elif header is None:
+                yield row
+            elif header:
+                yield {name: row[n] if n < len(row) else None for n, name in enumerate(header)}
 
 
 class XMLPage(Page):
@@ -584,6 +755,13 @@ def build_doc(self, content: bytes) -> bytes:
         return content
 
 
+# the meta elements declaring the encoding must be in the head
+HTML_HEAD_MAX_SIZE = 64 * 1024
+HTML_HEAD_END_RE = re.compile(br'</head\s*>|<body[\s>]', re.IGNORECASE)
+HTML_META_RE = re.compile(br'<meta(\s[^>]*)>', re.IGNORECASE)
+HTML_ATTR_RE = re.compile(br"""([^\s=/>]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+
+
 class HTMLPage(Page):
     """
     HTML page.
@@ -748,21 +926,36 @@ def build_doc(self, content: bytes) -> lxml.etree._ElementTree:
     def detect_encoding(self) -> str:
         """
         Look for encoding in the document "http-equiv" and "charset" meta nodes.
+
+        Only the raw content is read, before the document is built.
         """
         encoding: str | None = self.encoding
-        for content in self.doc.xpath('//head/meta[lower-case(@http-equiv)="content-type"]/@content'):
-            # meta http-equiv=content-type content=...
-
-            # Use request's method to get encoding from headers, so we simulate
-            # an headers dict.
-            encoding = self.normalize_encoding(
-                requests.utils.get_encoding_from_headers(
-                    {'content-type': content}
+        charset: str | None = None
+
+        head = HTML_HEAD_END_RE.split(self.content[:HTML_HEAD_MAX_SIZE], maxsplit=1)[0]
+        for meta in HTML_META_RE.finditer(head):
+            attrs = {
+                name.decode('ascii', 'replace').lower(): (quoted or single or bare).decode('ascii', 'replace')
+                for name, quoted, single, bare in HTML_ATTR_RE.findall(meta.group(1))
+            }
+
+            if attrs.get('http-equiv', '').lower() == 'content-type' and 'content' in attrs:
+                # meta http-equiv=content-type content=...
+
+                # Use request's method to get encoding from headers, so we simulate
+                # an headers dict.
+                encoding = self.normalize_encoding(
+                    requests.utils.get_encoding_from_headers(
+                        {'content-type': attrs['content']}
+                    )
                 )
-            )
 
-        for charset in self.doc.xpath('//head/meta[@charset]/@charset'):
-            # meta charset=...
+            if 'charset' in attrs:
+                # meta charset=...
+                charset = attrs['charset'].strip()
+
+        if charset is not None:
+            # takes precedence over http-equiv
             encoding = self.normalize_encoding(charset)
 
         if encoding == 'iso-8859-1' or not encoding:
@@ -0,0 +1,307 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable
+
+from urllib3.poolmanager import PoolManager, ProxyManager
+
+
+__all__ = ['ConnectionPoolRegistry', 'get_pool_registry']
+
+
+class _SharedManagerMixin:
+    """
+    Record when each connection pool of a urllib3 manager is used, so the
+    registry can evict the ones which stayed idle for too long.
+    """
+
+    registry: ConnectionPoolRegistry
+
+    def _setup_tracking(self, registry):
+        self.registry = registry
+        self.last_used = {}
+
+    def _new_pool(self, *args, **kwargs):
+        pool = super()._new_pool(*args, **kwargs)
+        self.registry._count('pools_created')
+        return pool
+
+    def connection_from_pool_key(self, pool_key, request_context):
+        pool = super().connection_from_pool_key(pool_key, request_context)
+        now = monotonic()
+        with self.pools.lock:
+            self.last_used[pool_key] = now
+        self.registry._touch(now)
+        return pool
+
+    def evict_idle(self, deadline):
+        """
+        Close and forget pools which have not been used since ``deadline``.
+
+        :return: number of evicted pools
+        """
+        evicted = 0
+        with self.pools.lock:
+            for pool_key, last_used in list(self.last_used.items()):
+                if last_used > deadline:
+                    continue
+
+                del self.last_used[pool_key]
+                if pool_key not in self.pools.keys():
+                    # already evicted by the LRU container
+                    continue
+
+                self.registry._archive(self.pools[pool_key])
+                # disposing the pool closes its idle connections
+                del self.pools[pool_key]
+                evicted += 1
+        return evicted
+
+
+class SharedPoolManager(_SharedManagerMixin, PoolManager):
+    def __init__(self, registry, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._setup_tracking(registry)
+
+
+class SharedProxyManager(_SharedManagerMixin, ProxyManager):
+    def __init__(self, registry, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._setup_tracking(registry)
+
+
+class ConnectionPoolRegistry:
+    """
+    Registry of urllib3 connection pools shared by every adapter using it.
+
+    By default, each :class:`~woob.browser.browsers.Browser` has its own pools,
+    so keep-alive connections are lost when the browser is closed and are
+    never reused by other browsers talking to the same hosts. When adapters
+    are created with a registry, they take their pool managers from it
+    instead, and closing them does not close the shared connections.
+
+    Pools are keyed by scheme, host, port, proxy and TLS parameters (CA
+    bundle, client certificate), so connections are only reused by requests
+    which would have opened the exact same connection.
+
+    :param maxsize: maximum number of connections kept for each host
+    :param block: if True, wait for a free connection when ``maxsize``
+        connections to a host are already in use, instead of opening a new
+        one which will not be kept afterwards
+    :param num_pools: maximum number of host pools kept by each manager
+    :param idle_timeout: seconds after which an unused host pool is closed,
+        or None to keep them until they are evicted by newer ones
+    """
+
+    SWEEP_INTERVAL = 5.0
+    """
+    Minimal delay in seconds between two searches for idle pools.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10,
+        block: bool = False,
+        num_pools: int = 100,
+        idle_timeout: float | None = 300.0,
+    ):
+        self.maxsize = maxsize
+        self.block = block
+        self.num_pools = num_pools
+        self.idle_timeout = idle_timeout
+
+        self._lock = Lock()
+        self._managers: Dict[Hashable, _SharedManagerMixin] = {}
+        self._last_sweep = monotonic()
+        self._counters = {
+            'pools_created': 0,
+            'pools_evicted': 0,
+            # connections and requests of pools which have been evicted
+            'connections': 0,
+            'requests': 0,
+        }
+
+    def _get_manager(self, key: Hashable, factory: Callable[[], _SharedManagerMixin]) -> _SharedManagerMixin:
+        with self._lock:
+            manager = self._managers.get(key)
+            if manager is None:
+                manager = self._managers[key] = factory()
+            return manager
+
+    def pool_manager(self, key: Hashable, **pool_kwargs: Any) -> PoolManager:
+        """
+        Get the shared pool manager for direct connections.
+
+        :param key: identifies the adapter configuration, managers created
+            with different settings (for example SSL contexts) must not
+            have the same key
+        :param pool_kwargs: extra arguments given to the manager if it has
+            to be created
+        """
+        return self._get_manager(
+            ('direct', key),
+            lambda: SharedPoolManager(
+                self,
+                num_pools=self.num_pools,
+                maxsize=self.maxsize,
+                block=self.block,
+                **pool_kwargs,
+            ),
+        )
+
+    def proxy_manager(self, key: Hashable, proxy: str, proxy_headers: Dict[str, str], **proxy_kwargs: Any) -> ProxyManager:
+        """
+        Get the shared manager for connections through an HTTP(S) proxy.
+
+        :param key: identifies the adapter configuration
+        :param proxy: URL of the proxy
+        :param proxy_headers: headers sent to the proxy, part of the key
+            as they often contain credentials
+        :param proxy_kwargs: extra arguments given to the manager if it
+            has to be created
+        """
+        return self._get_manager(
+            ('proxy', key, proxy, tuple(sorted(proxy_headers.items()))),
+            lambda: SharedProxyManager(
+                self,
+                proxy,
+                proxy_headers=proxy_headers,
+                num_pools=self.num_pools,
+                maxsize=self.maxsize,
+                block=self.block,
+                **proxy_kwargs,
+            ),
+        )
+
+    def is_shared(self, manager: PoolManager) -> bool:
+        """
+        Whether a manager is owned by this registry.
+        """
+        return isinstance(manager, _SharedManagerMixin) and manager.registry is self
+
+    def _count(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def _archive(self, pool):
+        with self._lock:
+            self._counters['pools_evicted'] += 1
+            self._counters['connections'] += pool.num_connections
+            self._counters['requests'] += pool.num_requests
+
+    def _touch(self, now: float):
+        if self.idle_timeout is None or now - self._last_sweep < self.SWEEP_INTERVAL:
+            return
+
+        self._last_sweep = now
+        self.evict_idle(now)
+
+    def evict_idle(self, now: float | None = None) -> int:
+        """
+        Close host pools which have not been used for ``idle_timeout`` seconds.
+
+        It is automatically called while requests are made, but can be
+        called explicitly, for example between two runs of a long-lived
+        process.
+
+        :return: number of closed pools
+        """
+        if self.idle_timeout is None:
+            return 0
+
+        if now is None:
+            now = monotonic()
+
+        with self._lock:
+            managers = list(self._managers.values())
+
+        return sum(manager.evict_idle(now - self.idle_timeout) for manager in managers)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get statistics about the shared pools.
+
+        ``connections`` is the number of connections opened and ``requests``
+        the number of requests sent since the registry was created, so
+        ``requests - connections`` is the number of requests which reused a
+        kept-alive connection.
+
+        ``hosts`` details the live pools, by ``scheme://host:port``, with
+        the number of idle connections currently kept.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            managers = list(self._managers.values())
+
+        hosts: Dict[str, Dict[str, int]] = {}
+        pools = 0
+        for manager in managers:
+            with manager.pools.lock:
+                live = [manager.pools[key] for key in manager.pools.keys()]
+
+            for pool in live:
+                pools += 1
+                host = hosts.setdefault(
+                    '%s://%s:%s' % (pool.scheme, pool.host, pool.port),
+                    {'connections': 0, 'requests': 0, 'idle': 0},
+                )
+                host['connections'] += pool.num_connections
+                host['requests'] += pool.num_requests
+                if pool.pool is not None:
+                    # the pool queue is filled with None placeholders
+                    host['idle'] += sum(conn is not None for conn in list(pool.pool.queue))
+
+                stats['connections'] += pool.num_connections
+                stats['requests'] += pool.num_requests
+
+        stats['pools'] = pools
+        stats['hosts'] = hosts
+        return stats
+
+    def clear(self):
+        """
+        Close every shared connection.
+        """
+        with self._lock:
+            managers = list(self._managers.values())
+            self._managers.clear()
+
+        for manager in managers:
+            manager.clear()
+
+
+_default_registry: ConnectionPoolRegistry | None = None
+_default_registry_lock = Lock()
+
+
+def get_pool_registry() -> ConnectionPoolRegistry:
+    """
+    Get the process-wide connection pool registry.
+
+    It is the one used by browsers having
+    :attr:`~woob.browser.browsers.Browser.SHARED_POOLS` set to ``True``.
+    """
+    global _default_registry
+
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ConnectionPoolRegistry()
+        return _default_registry
@@ -37,7 +37,9 @@ def setup_session(self, session):
 
         Warning: Do not enable lzma, bzip or bzip2, sdch encodings
         as python-requests does not support it yet.
-        Supported as of 2.2: gzip, deflate, compress.
+        Only the encodings of ``ENCODINGS`` can be decoded: gzip and
+        deflate, plus br and zstd when the brotli and zstd modules
+        supported by urllib3 are installed.
         In doubt, do not change the default Accept-Encoding header
         of python-requests.
         """
@@ -101,8 +103,10 @@ def setup_session(self, session):
             ('DNT', '1'),
         ])
 
-        if 'br' in ENCODINGS:
-            session.headers['Accept-Encoding'] += ', br'
+        # like Firefox, but only with the encodings which can be decoded
+        for encoding in ('br', 'zstd'):
+            if encoding in ENCODINGS:
+                session.headers['Accept-Encoding'] += ', %s' % encoding
 
 
 class GoogleBot(Profile):
@@ -0,0 +1,242 @@
+# Copyright(C) 2024 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import os
+import re
+from tempfile import gettempdir
+from threading import BoundedSemaphore, Lock, local
+from time import monotonic, sleep, time
+from typing import Dict, Iterator, Mapping
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+__all__ = ['RateLimit', 'RateLimiter']
+
+
+class _TokenBucket:
+    """
+    Token bucket shared by the threads of the process.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = monotonic()
+        self.lock = Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token.
+
+        :return: seconds to wait before the token is really available
+        """
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # tokens can be borrowed, so concurrent callers wait one after
+            # the other instead of polling
+            self.tokens -= 1
+            return max(0., -self.tokens / self.rate)
+
+
+class _FileTokenBucket(_TokenBucket):
+    """
+    Token bucket stored in a file, shared by every process using it.
+    """
+
+    def __init__(self, rate: float, burst: float, path: str):
+        super().__init__(rate, burst)
+        self.path = path
+
+    def reserve(self) -> float:
+        # the thread lock is needed too, as flock() locks are held by the
+        # open file description, not by the thread
+        with self.lock, open(self.path, 'a+') as fd:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                fd.seek(0)
+                try:
+                    tokens, updated = (float(value) for value in fd.read().split())
+                except ValueError:
+                    tokens, updated = self.burst, time()
+
+                now = time()
+                tokens = min(self.burst, tokens + max(0., now - updated) * self.rate) - 1
+
+                fd.seek(0)
+                fd.truncate()
+                fd.write('%r %r' % (tokens, now))
+                fd.flush()
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+        return max(0., -tokens / self.rate)
+
+
+class _HostLimit:
+    def __init__(self, bucket: _TokenBucket | None, max_concurrent: int | None):
+        self.bucket = bucket
+        self.semaphore = BoundedSemaphore(max_concurrent) if max_concurrent else None
+        # threads currently holding a slot, so redirections, which are sent
+        # while the first request still holds it, don't wait for themselves
+        self.holders = local()
+
+
+class RateLimit:
+    """
+    Limits of the requests sent to a host.
+
+    Each host gets its own limits: a ``RateLimit`` used for several hosts
+    does not make them share their budget.
+
+    :param rate: maximum average number of requests per second, or None
+        to not limit it
+    :param burst: number of requests which can be sent at once before being
+        limited by ``rate`` (default is 1, requests are evenly spaced)
+    :param max_concurrent: maximum number of requests being sent at the
+        same time, or None to not limit it
+    :param shared: if set, the rate is shared with every process using a
+        limit with the same name, through a file in the temporary directory
+        (like :func:`woob.tools.misc.ratelimit`). The concurrency limit is
+        not shared between processes.
+    """
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        burst: float = 1,
+        max_concurrent: int | None = None,
+        shared: str | None = None,
+    ):
+        if rate is not None and rate <= 0:
+            raise ValueError('rate must be positive')
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+        if shared is not None and fcntl is None:
+            raise NotImplementedError('rate limits can only be shared between processes on POSIX systems')
+
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.shared = shared
+
+        self._lock = Lock()
+        self._hosts: Dict[str, _HostLimit] = {}
+
+    def __repr__(self):
+        return '<%s rate=%r burst=%r max_concurrent=%r shared=%r>' % (
+            type(self).__name__, self.rate, self.burst, self.max_concurrent, self.shared,
+        )
+
+    def _new_bucket(self, host: str) -> _TokenBucket | None:
+        if self.rate is None:
+            return None
+        if self.shared is None:
+            return _TokenBucket(self.rate, self.burst)
+
+        path = os.path.join(
+            gettempdir(),
+            'woob_ratelimit.%s.%s' % (self.shared, re.sub(r'[^\w.-]', '_', host)),
+        )
+        return _FileTokenBucket(self.rate, self.burst, path)
+
+    def _get_host(self, host: str) -> _HostLimit:
+        with self._lock:
+            limit = self._hosts.get(host)
+            if limit is None:
+                limit = self._hosts[host] = _HostLimit(self._new_bucket(host), self.max_concurrent)
+            return limit
+
+    @contextmanager
+    def acquire(self, host: str) -> Iterator[None]:
+        """
+        Wait until a request to ``host`` can be sent, and hold a concurrency
+        slot until the end of the block.
+        """
+        limit = self._get_host(host)
+
+        nested = getattr(limit.holders, 'count', 0) > 0
+        if limit.semaphore is not None and not nested:
+            limit.semaphore.acquire()
+
+        limit.holders.count = getattr(limit.holders, 'count', 0) + 1
+        try:
+            if limit.bucket is not None:
+                delay = limit.bucket.reserve()
+                if delay > 0:
+                    sleep(delay)
+            yield
+        finally:
+            limit.holders.count -= 1
+            if limit.semaphore is not None and not nested:
+                limit.semaphore.release()
+
+
+class RateLimiter:
+    """
+    Find and apply the :class:`RateLimit` of each request.
+
+    :param limits: a :class:`RateLimit` applied to every host, or a mapping
+        of host names to limits. In a mapping, a name starting with a dot
+        also matches subdomains, and ``'*'`` matches every other host.
+    """
+
+    def __init__(self, limits: RateLimit | Mapping[str, RateLimit]):
+        if isinstance(limits, RateLimit):
+            limits = {'*': limits}
+        self.limits = {host.lower(): limit for host, limit in limits.items()}
+
+    def limit_for(self, host: str) -> RateLimit | None:
+        """
+        Get the limit of a host, or None if it is not limited.
+        """
+        host = host.lower()
+        if host in self.limits:
+            return self.limits[host]
+
+        parts = host.split('.')
+        for n in range(len(parts)):
+            limit = self.limits.get('.' + '.'.join(parts[n:]))
+            if limit is not None:
+                return limit
+
+        return self.limits.get('*')
+
+    @contextmanager
+    def acquire(self, url: str) -> Iterator[None]:
+        """
+        Wait until a request to ``url`` can be sent, according to the limit
+        of its host.
+        """
+        host = urlsplit(url).hostname or ''
+        limit = self.limit_for(host)
+        if limit is None:
+            yield
+            return
+
+        with limit.acquire(host):
+            yield
@@ -15,6 +15,7 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
+import atexit
 import codecs
 from collections import OrderedDict
 from contextlib import contextmanager
@@ -25,6 +26,7 @@
 from tempfile import NamedTemporaryFile
 import time
 import logging
+from threading import Condition
 from urllib.parse import (
     urljoin, urlparse, urlencode, parse_qsl,
     urlunparse,
@@ -52,7 +54,7 @@
 
 
 __all__ = (
-    'SeleniumBrowser', 'SeleniumPage', 'HTMLPage',
+    'SeleniumBrowser', 'SeleniumPage', 'HTMLPage', 'DriverPool', 'DriverPoolTimeout',
     'CustomCondition', 'AnyCondition', 'AllCondition', 'NotCondition',
     'IsHereCondition', 'VisibleXPath', 'ClickableXPath', 'ClickableLinkText',
     'HasTextCondition', 'WrapException',
@@ -386,6 +388,167 @@ class SeleniumBrowserSetupError(Exception):
     """
 
 
+class DriverPoolTimeout(Exception):
+    """
+    Raised when no driver of a :class:`DriverPool` became available in time.
+    """
+
+
+class DriverPool:
+    """Pool of warm Selenium drivers, reused by browser instances.
+
+    Starting a browser process takes seconds and a lot of memory, so drivers
+    released by :meth:`SeleniumBrowser.deinit` are kept, after being reset,
+    and given to the next browser needing a driver with the same settings.
+
+    See :attr:`SeleniumBrowser.DRIVER_POOL`.
+
+    :param max_drivers: maximum number of drivers alive at the same time,
+        in use or idle. Browsers wait for a driver when it is reached.
+    :param idle_timeout: seconds after which an idle driver is quit
+    :param max_uses: number of uses after which a driver is quit instead of
+        being reused, or None
+    :param wait_timeout: maximum seconds to wait for a driver, or None
+    """
+
+    def __init__(self, max_drivers=4, idle_timeout=300., max_uses=None, wait_timeout=None):
+        self.max_drivers = max_drivers
+        self.idle_timeout = idle_timeout
+        self.max_uses = max_uses
+        self.wait_timeout = wait_timeout
+
+        self._condition = Condition()
+        # idle drivers by key, with the time they were released
+        self._idle = {}
+        self._uses = {}
+        self._alive = 0
+
+        # don't leave browser processes behind
+        atexit.register(self.close)
+
+    def _pop_expired(self, now):
+        # called with the lock held
+        expired = []
+        for key, idle in list(self._idle.items()):
+            for entry in list(idle):
+                if now - entry[1] >= self.idle_timeout:
+                    idle.remove(entry)
+                    expired.append(entry[0])
+            if not idle:
+                del self._idle[key]
+        return expired
+
+    def _pop_oldest(self):
+        # called with the lock held
+        entries = [(entry[1], key, entry) for key, idle in self._idle.items() for entry in idle]
+        if not entries:
+            return None
+
+        _, key, entry = min(entries, key=lambda item: item[0])
+        self._idle[key].remove(entry)
+        if not self._idle[key]:
+            del self._idle[key]
+        return entry[0]
+
+    def _quit(self, drivers):
+        for driver in drivers:
+            self._uses.pop(id(driver), None)
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def acquire(self, key, factory):
+        """
+        Get an idle driver created for ``key``, or create one with ``factory``.
+        """
+        victims = []
+        try:
+            with self._condition:
+                deadline = None if self.wait_timeout is None else time.monotonic() + self.wait_timeout
+                while True:
+                    expired = self._pop_expired(time.monotonic())
+                    self._alive -= len(expired)
+                    victims += expired
+
+                    idle = self._idle.get(key)
+                    if idle:
+                        driver = idle.pop()[0]
+                        if not idle:
+                            del self._idle[key]
+                        return driver
+
+                    if self._alive < self.max_drivers:
+                        self._alive += 1
+                        break
+
+                    # replace an idle driver having other settings
+                    victim = self._pop_oldest()
+                    if victim is not None:
+                        victims.append(victim)
+                        break
+
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise DriverPoolTimeout('No driver available after %ss' % self.wait_timeout)
+                    self._condition.wait(remaining)
+        finally:
+            self._quit(victims)
+
+        try:
+            return factory()
+        except BaseException:
+            with self._condition:
+                self._alive -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, key, driver, reusable=True):
+        """
+        Give a driver back to the pool.
+
+        :param reusable: if False, the driver is quit instead of being kept
+        """
+        uses = self._uses.get(id(driver), 0) + 1
+        if self.max_uses is not None and uses >= self.max_uses:
+            reusable = False
+
+        with self._condition:
+            if reusable:
+                self._uses[id(driver)] = uses
+                self._idle.setdefault(key, []).append((driver, time.monotonic()))
+                expired = self._pop_expired(time.monotonic())
+            else:
+                expired = [driver]
+            self._alive -= len(expired)
+            self._condition.notify()
+
+        self._quit(expired)
+
+    def evict_idle(self):
+        """
+        Quit drivers which have been idle for ``idle_timeout`` seconds.
+
+        It is automatically called when drivers are acquired or released.
+        """
+        with self._condition:
+            expired = self._pop_expired(time.monotonic())
+            self._alive -= len(expired)
+            self._condition.notify_all()
+        self._quit(expired)
+
+    def close(self):
+        """
+        Quit every idle driver.
+        """
+        with self._condition:
+            drivers = [entry[0] for idle in self._idle.values() for entry in idle]
+            self._idle.clear()
+            self._alive -= len(drivers)
+            self._condition.notify_all()
+        self._quit(drivers)
+
+
 class SeleniumBrowser:
     """Browser similar to PagesBrowser, but using Selenium.
 
@@ -417,6 +580,21 @@ class SeleniumBrowser:
     on the viewport size.
     """
 
+    DRIVER_POOL = None
+    """Pool of drivers, to reuse drivers of previous instances
+
+    If it is a :class:`DriverPool`, the driver is taken from it, and given
+    back to it by :meth:`deinit`, after :meth:`reset_driver`, instead of
+    being quit. Only drivers created with the same settings are reused.
+    Drivers are not pooled when responses are saved, as the profile is
+    then stored with them.
+
+    Each browser using a pooled driver works in its own browser context,
+    which is destroyed with all its data when the driver is released. This
+    needs the DevTools protocol, so it is only supported with local Chrome
+    drivers.
+    """
+
     BASEURL = None
 
     MAX_SAVED_RESPONSES = (1 << 30)  # limit to 1GiB
@@ -441,7 +619,31 @@ def __init__(self, logger=None, proxy=None, responses_dirname=None, weboob=None,
         self.implicit_timeout = 0
         self.last_page_hash = None
 
-        self._setup_driver(preferences)
+        self.driver = None
+        self._driver_key = None
+        self._browser_context = None
+        if self.DRIVER_POOL is not None and not self.responses_dirname:
+            if self.DRIVER is not webdriver.Chrome or self.remote_driver_url:
+                raise SeleniumBrowserSetupError(
+                    'DRIVER_POOL is only supported with local Chrome drivers, '
+                    + 'as other drivers can not be entirely cleared before being reused'
+                )
+
+            self._driver_key = self._build_driver_key(preferences)
+
+            def create_driver():
+                self._setup_driver(preferences)
+                return self.driver
+
+            self.driver = self.DRIVER_POOL.acquire(self._driver_key, create_driver)
+            try:
+                self._open_browser_context()
+            except Exception:
+                self.DRIVER_POOL.release(self._driver_key, self.driver, reusable=False)
+                self.driver = None
+                raise
+        else:
+            self._setup_driver(preferences)
 
         self._urls = []
         cls = type(self)
@@ -554,10 +756,70 @@ def _setup_remote_driver(self, options, capabilities, proxy):
             proxy=proxy
         )
 
+    def _build_driver_key(self, preferences):
+        # drivers can only be reused by browsers which would have created
+        # the same one
+        return (
+            self.DRIVER, self.HEADLESS, self.WINDOW_SIZE, self.remote_driver_url,
+            bool(getattr(self, 'VERIFY', False)),
+            tuple(sorted(self.proxy.items())),
+            repr(sorted((preferences or {}).items())),
+        )
+
+    def _open_browser_context(self):
+        # work in a new window of a new browser context, isolated from the
+        # data of the previous users of the driver
+        driver = self.driver
+        handles = set(driver.window_handles)
+        self._browser_context = driver.execute_cdp_cmd(
+            'Target.createBrowserContext', {'disposeOnDetach': False},
+        )['browserContextId']
+        driver.execute_cdp_cmd(
+            'Target.createTarget', {'url': 'about:blank', 'browserContextId': self._browser_context},
+        )
+        handle, = set(driver.window_handles) - handles
+        driver.switch_to.window(handle)
+        if self.WINDOW_SIZE:
+            driver.set_window_size(*self.WINDOW_SIZE)
+
+    def reset_driver(self):
+        """
+        Clear the state of the driver, before it is reused by another browser.
+
+        The browser context used by this browser is destroyed, with its
+        windows, cookies, storage, IndexedDB databases and cache. Cookies and
+        cache of the default context are cleared too.
+
+        If it raises an exception, the driver is quit instead of being reused.
+        """
+        driver = self.driver
+        driver.execute_cdp_cmd('Target.disposeBrowserContext', {'browserContextId': self._browser_context})
+        self._browser_context = None
+
+        # the first window, of the default context, is the only one left
+        driver.switch_to.window(driver.window_handles[0])
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+        driver.get('about:blank')
+
     ### Browser
     def deinit(self):
-        if self.driver:
+        if not self.driver:
+            return
+
+        if self._driver_key is None:
             self.driver.quit()
+            return
+
+        reusable = True
+        try:
+            self.reset_driver()
+        except Exception as exc:
+            self.logger.warning('Unable to reset the driver, it will not be reused: %s', exc)
+            reusable = False
+
+        driver, self.driver = self.driver, None
+        self.DRIVER_POOL.release(self._driver_key, driver, reusable=reusable)
 
     @property
     def url(self):
@@ -16,11 +16,12 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 try:
-    from concurrent.futures import ThreadPoolExecutor
+    from concurrent.futures import Future, ThreadPoolExecutor
 except ImportError:
-    ThreadPoolExecutor = None
+    Future = ThreadPoolExecutor = None
 
 from http import cookiejar
+from threading import Lock
 
 from requests import Session
 from requests.adapters import DEFAULT_POOLSIZE
@@ -31,6 +32,7 @@
 from requests.utils import get_netrc_auth
 
 from .adapters import HTTPAdapter
+from .cookies import WoobCookieJar
 
 
 def merge_hooks(request_hooks, session_hooks):
@@ -73,8 +75,12 @@ def prepare_request(self, request):
             cookies = cookiejar_from_dict(cookies)
 
         # Merge with session cookies
-        merged_cookies = RequestsCookieJar()
-        merged_cookies.update(self.cookies)
+        if isinstance(self.cookies, WoobCookieJar):
+            # without copying the session cookies
+            merged_cookies = self.cookies.overlay()
+        else:
+            merged_cookies = RequestsCookieJar()
+            merged_cookies.update(self.cookies)
         merged_cookies.update(cookies)
 
         # Set environment's basic authentication if not explicitly set.
@@ -101,8 +107,30 @@ def prepare_request(self, request):
 WeboobSession = WoobSession
 
 
+def _copy_response(response):
+    """
+    Shallow copy of a response, with its own headers, history and cookies,
+    so that it can be modified independently.
+    """
+    copy = response.__class__.__new__(response.__class__)
+    copy.__dict__.update(response.__dict__)
+    copy.headers = response.headers.copy()
+    copy.history = list(response.history)
+    copy.cookies = response.cookies.copy()
+    return copy
+
+
 class FuturesSession(WoobSession):
-    def __init__(self, executor=None, max_workers=2, max_retries=2, adapter_class=HTTPAdapter, *args, **kwargs):
+    DEDUPLICATED_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+    """
+    Methods of requests which can share their response with identical
+    requests sent at the same time.
+    """
+
+    def __init__(
+        self, executor=None, max_workers=2, max_retries=2, adapter_class=HTTPAdapter,
+        *args, pool_registry=None, deduplicate=False, rate_limiter=None, **kwargs
+    ):
         """Creates a FuturesSession
 
         Notes
@@ -113,17 +141,39 @@ def __init__(self, executor=None, max_workers=2, max_retries=2, adapter_class=HT
 
         * If you provide both `executor` and `max_workers`, the latter is
           ignored and provided executor is used as is.
+
+        * If `pool_registry` is given, connection pools are taken from this
+          :class:`woob.browser.pools.ConnectionPoolRegistry` and shared with
+          every other session using it.
+
+        * If `deduplicate` is True, a request identical to one which is
+          already being sent, from another thread or asynchronously, is not
+          sent again: it waits for the response of the first one, and both
+          callers get the same response object.
+
+        * If `rate_limiter` is given, this
+          :class:`woob.browser.ratelimit.RateLimiter` delays requests to
+          respect the rate and concurrency limits of their host.
         """
         super(FuturesSession, self).__init__(*args, **kwargs)
+        self.deduplicate = deduplicate
+        self.rate_limiter = rate_limiter
+        self._inflight = {}
+        self._inflight_lock = Lock()
+        adapter_kwargs = {}
         if executor is None and ThreadPoolExecutor is not None:
             executor = ThreadPoolExecutor(max_workers=max_workers)
             # set connection pool size equal to max_workers if needed
             if max_workers > DEFAULT_POOLSIZE:
-                adapter_kwargs = dict(pool_connections=max_workers,
+                adapter_kwargs.update(pool_connections=max_workers,
                                       pool_maxsize=max_workers,
                                       max_retries=max_retries)
-                self.mount('https://', adapter_class(**adapter_kwargs))
-                self.mount('http://', adapter_class(**adapter_kwargs))
+        if pool_registry is not None:
+            adapter_kwargs['pool_registry'] = pool_registry
+
+        if adapter_kwargs:
+            self.mount('https://', adapter_class(**adapter_kwargs))
+            self.mount('http://', adapter_class(**adapter_kwargs))
 
         self.executor = executor
 
@@ -145,12 +195,17 @@ def send(self, *args, **kwargs):
             del kwargs['async']
 
         sup = super(FuturesSession, self).send
+        if self.rate_limiter is not None:
+            sup = self._limited(sup)
 
         callback = kwargs.pop('callback', lambda future, response: response)
         is_async = kwargs.pop('is_async', False)
 
         def func(*args, **kwargs):
-            resp = sup(*args, **kwargs)
+            if self.deduplicate:
+                resp = self._send_once(sup, *args, **kwargs)
+            else:
+                resp = sup(*args, **kwargs)
             return callback(self, resp)
 
         if is_async:
@@ -160,6 +215,63 @@ def func(*args, **kwargs):
 
         return func(*args, **kwargs)
 
+    def _limited(self, send):
+        def limited_send(request, **kwargs):
+            with self.rate_limiter.acquire(request.url):
+                return send(request, **kwargs)
+        return limited_send
+
+    def inflight_key(self, request, stream=None, allow_redirects=True, verify=None, cert=None, proxies=None, **kwargs):
+        """
+        Key used to find identical in-flight requests.
+
+        Returns None if the request must always be sent, because it is not
+        idempotent, its body can't be compared or its response is streamed.
+        """
+        if request.method not in self.DEDUPLICATED_METHODS or stream:
+            return None
+
+        if request.body is not None and not isinstance(request.body, (bytes, str)):
+            return None
+
+        return (
+            request.method,
+            request.url,
+            request.body,
+            tuple(sorted((k.lower(), v) for k, v in request.headers.items())),
+            allow_redirects,
+            verify if isinstance(verify, (bool, str)) else repr(verify),
+            cert if not isinstance(cert, list) else tuple(cert),
+            tuple(sorted((proxies or {}).items())),
+        )
+
+    def _send_once(self, send, request, **kwargs):
+        key = self.inflight_key(request, **kwargs)
+        if key is None or Future is None:
+            return send(request, **kwargs)
+
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+
+        if not owner:
+            # callbacks may modify the response, each caller gets its own
+            return _copy_response(future.result())
+
+        try:
+            resp = send(request, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(_copy_response(resp))
+            return resp
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+
     def close(self):
         super(FuturesSession, self).close()
         if self.executor:
@@ -17,9 +17,11 @@
 
 from __future__ import annotations
 
-from functools import wraps
+from functools import lru_cache, wraps
 import re
-from typing import Callable, Dict, Optional, TYPE_CHECKING, Tuple, Type, TypeVar
+from typing import (
+    Callable, Dict, FrozenSet, Iterator, List, Optional, TYPE_CHECKING, Tuple, Type, TypeVar,
+)
 from urllib.parse import unquote
 
 import requests
@@ -35,6 +37,145 @@
 
 URLType = TypeVar('URLType', bound='URL')
 
+_REGEX_SPECIAL_CHARS = frozenset('.^$*+?{}[]|()')
+_REGEX_OPTIONAL_CHARS = frozenset('*?{')
+_REGEX_INLINE_FLAGS = frozenset('aiLmsux')
+
+
+@lru_cache(maxsize=2048)
+def compile_url_regex(regex: str, base: str | None = None) -> re.Pattern:
+    """
+    Compile the regexp of an :class:`URL`, relative to ``base`` if given.
+    """
+    if base is not None:
+        regex = re.escape(base).rstrip('/') + '/' + regex.lstrip('/')
+    return re.compile(regex)
+
+
+def _has_global_construct(regex: str) -> bool:
+    """
+    Whether a regexp contains a top-level alternation or inline flags,
+    which make the literal prefix of its first characters meaningless.
+    """
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(regex):
+        char = regex[i]
+        if char == '\\':
+            i += 2
+            continue
+
+        if in_class:
+            if char == ']':
+                in_class = False
+        elif char == '[':
+            in_class = True
+            if regex[i + 1:i + 2] == '^':
+                i += 1
+            if regex[i + 1:i + 2] == ']':
+                # a leading ] is a literal character of the class
+                i += 1
+        elif char == '(':
+            if regex[i + 1:i + 2] == '?':
+                end = i + 2
+                while regex[end:end + 1] in _REGEX_INLINE_FLAGS:
+                    end += 1
+                if end > i + 2 and regex[end:end + 1] == ')':
+                    # flags applied to the whole regexp, e.g. (?i)
+                    return True
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+        i += 1
+
+    return False
+
+
+def regex_literal_prefix(regex: str) -> str:
+    """
+    Get the text every string matching a regexp starts with.
+
+    It is not necessarily the longest one, as the parsing stops on the
+    first construct which is not a plain or escaped character. It is empty
+    when the regexp has a top-level alternation or inline flags.
+    """
+    if _has_global_construct(regex):
+        return ''
+
+    prefix = []
+    i = 0
+    while i < len(regex):
+        char = regex[i]
+        if char == '\\':
+            if i + 1 >= len(regex) or regex[i + 1].isalnum():
+                # character class, group reference, anchor, etc.
+                break
+            char = regex[i + 1]
+            step = 2
+        elif char in _REGEX_SPECIAL_CHARS:
+            break
+        else:
+            step = 1
+
+        if regex[i + step:i + step + 1] in _REGEX_OPTIONAL_CHARS:
+            # this character may not be present
+            break
+
+        prefix.append(char)
+        i += step
+
+    return ''.join(prefix)
+
+
+_PLACEHOLDER_RE = re.compile(r'%\((\w+)\)s')
+_UNRESOLVED_PLACEHOLDER_RE = re.compile(r'%\([A-z_]+\)s')
+
+
+@lru_cache(maxsize=1024)
+def reverse_url_patterns(regexes: Tuple[str, ...]) -> Tuple[Tuple[str, FrozenSet[str], FrozenSet[str]], ...]:
+    """
+    Get the patterns to build URLs matching regexps.
+
+    :return: for each pattern given by
+        :func:`woob.tools.regex_helper.normalize`, a tuple with the pattern,
+        the names of its placeholders, and the names which must be given
+        to use it
+    """
+    patterns = []
+    for regex in regexes:
+        for pattern, _ in normalize(regex):
+            names = frozenset(_PLACEHOLDER_RE.findall(pattern))
+            required = frozenset(
+                name for name in names
+                if _UNRESOLVED_PLACEHOLDER_RE.fullmatch('%%(%s)s' % name)
+            )
+            patterns.append((pattern, names, required))
+    return tuple(patterns)
+
+
+@lru_cache(maxsize=4096)
+def select_reverse_pattern(regexes: Tuple[str, ...], names: FrozenSet[str]) -> str | None:
+    """
+    Get the first pattern to build an URL matching regexps with the given
+    parameter names, which must all be used.
+    """
+    for pattern, pattern_names, required in reverse_url_patterns(regexes):
+        if required <= names <= pattern_names:
+            return pattern
+    return None
+
+
+def _url_origin(url: str) -> str | None:
+    # scheme and authority, without any normalization as regexps are
+    # matched against the raw URL
+    scheme, sep, rest = url.partition('://')
+    if not sep or '/' not in rest:
+        return None
+    return '%s://%s/' % (scheme, rest.partition('/')[0])
+
 
 class UrlNotResolvable(Exception):
     """
@@ -285,38 +426,29 @@ def build(self, **kwargs) -> str:
         assert browser is not None
 
         params = kwargs.pop('params', None)
-        patterns = []
-        for url in self.urls:
-            patterns += normalize(url)
-
-        base = None
-        for pattern, _ in patterns:
-            url = pattern
-            # only use full-name substitutions, to allow % in URLs
-            args = kwargs.copy()
-            for key in list(args.keys()):  # need to use keys() because of pop()
-                search = f'%({key})s'
-                if search in pattern:
-                    url = url.replace(search, str(args.pop(key)))
-            # if there are named substitutions left, ignore pattern
-            if re.search(r'%\([A-z_]+\)s', url):
-                continue
-            # if not all args were used
-            if len(args):
-                continue
-
-            if base is None and not ABSOLUTE_URL_PATTERN_RE.match(url):
-                base = self.get_base_url(browser=browser, for_pattern=url)
-                url = browser.absurl(url, base=base)
-
-            if params:
-                p = requests.models.PreparedRequest()
-                p.prepare_url(url, params)
-                assert p.url is not None
-                url = p.url
-            return url
-
-        raise UrlNotResolvable('Unable to resolve URL with %r. Available are %s' % (kwargs, ', '.join([pattern for pattern, _ in patterns])))
+        regexes = tuple(self.urls)
+
+        pattern = select_reverse_pattern(regexes, frozenset(kwargs))
+        if pattern is None:
+            raise UrlNotResolvable('Unable to resolve URL with %r. Available are %s' % (
+                kwargs, ', '.join([pattern for pattern, _, _ in reverse_url_patterns(regexes)]),
+            ))
+
+        url = pattern
+        # only use full-name substitutions, to allow % in URLs
+        for key, value in kwargs.items():
+            url = url.replace(f'%({key})s', str(value))
+
+        if not ABSOLUTE_URL_PATTERN_RE.match(url):
+            base = self.get_base_url(browser=browser, for_pattern=url)
+            url = browser.absurl(url, base=base)
+
+        if params:
+            p = requests.models.PreparedRequest()
+            p.prepare_url(url, params)
+            assert p.url is not None
+            url = p.url
+        return url
 
     def match(
         self, url: str,
@@ -332,14 +464,32 @@ def match(
                 if not base:
                     base = self.get_base_url(browser=None, for_pattern=regex)
 
-                regex = re.escape(base).rstrip('/') + '/' + regex.lstrip('/')
+                m = compile_url_regex(regex, base).match(url)
+            else:
+                m = compile_url_regex(regex).match(url)
 
-            m = re.match(regex, url)
             if m:
                 return m
 
         return None
 
+    def literal_prefixes(self, base: str | None = None) -> List[str]:
+        """
+        Get the text URLs matching each regexp of this object start with.
+
+        :raises: :class:`ValueError` if the base URL is needed and not
+            defined
+        """
+        prefixes = []
+        for regex in self.urls:
+            if not ABSOLUTE_URL_PATTERN_RE.match(regex):
+                if not base:
+                    base = self.get_base_url(browser=None, for_pattern=regex)
+                prefixes.append(regex_literal_prefix(compile_url_regex(regex, base).pattern))
+            else:
+                prefixes.append(regex_literal_prefix(regex))
+        return prefixes
+
     def handle(self, response: requests.Response) -> Page | None:
         """
         Handle a HTTP response to get an instance of the klass if it matches.
@@ -625,7 +775,7 @@ def build(self, **kwargs) -> str:
                 raise ValueError('parameter %r is reserved by URL pattern')
 
         for url in self.urls:
-            for groupname in re.compile(url).groupindex:
+            for groupname in compile_url_regex(url).groupindex:
                 if groupname.startswith(prefix):
                     attrname = groupname[len(prefix):]
                     kwargs[groupname] = getattr(self.browser, attrname)
@@ -659,3 +809,74 @@ def norm_domain(m):
         return ''.join((m.group(1), auth, authsep, host, portsep, port))
 
     return re.sub(r'^(https?://)([^/#?]+)', norm_domain, url)
+
+
+class URLDispatcher:
+    """
+    Index of the :class:`URL` objects of a browser, to find the ones which
+    may match a response URL without trying all their regexps.
+
+    URLs are indexed by the literal text their regexps start with, like
+    ``https://example.org/accounts/``. Candidates are returned in the
+    declaration order, so the first one handling a response is the same
+    as when trying every URL.
+
+    The index depends on the base URLs of the browser: use
+    :meth:`is_valid` to check it is still up to date.
+
+    :param browser: browser the URLs are bound to
+    :param urls: URL objects of the browser, by attribute name
+    """
+
+    def __init__(self, browser: Browser, urls: Dict[str, URL]):
+        self.bases = {
+            name: getattr(browser, name, None)
+            for name in {url._base for url in urls.values()}
+        }
+
+        # origin (or None for any origin) -> declaration order -> (name, url, prefixes)
+        self._origins: Dict[str | None, Dict[int, Tuple[str, URL, List[str]]]] = {}
+        self._candidates: Dict[str | None, List[Tuple[str, URL, List[str]]]] = {}
+
+        for order, (name, url) in enumerate(urls.items()):
+            try:
+                prefixes = url.literal_prefixes()
+            except ValueError:
+                # the base URL is missing, let URL.handle() raise when the
+                # URL is tried, as before indexing.
+                prefixes = ['']
+
+            for prefix in prefixes:
+                entry = self._origins.setdefault(_url_origin(prefix), {}).setdefault(order, (name, url, []))
+                entry[2].append(prefix)
+
+    def is_valid(self, browser: Browser) -> bool:
+        """
+        Whether the base URLs of the browser have not changed since the
+        index was built.
+        """
+        return all(getattr(browser, name, None) == value for name, value in self.bases.items())
+
+    def _entries(self, origin: str | None) -> List[Tuple[str, URL, List[str]]]:
+        entries = self._candidates.get(origin)
+        if entries is None:
+            merged = dict(self._origins.get(None, {}))
+            if origin is not None:
+                for order, (name, url, prefixes) in self._origins.get(origin, {}).items():
+                    if order in merged:
+                        merged[order] = (name, url, merged[order][2] + prefixes)
+                    else:
+                        merged[order] = (name, url, prefixes)
+            entries = self._candidates[origin] = [merged[order] for order in sorted(merged)]
+        return entries
+
+    def candidates(self, url: str) -> Iterator[Tuple[str, URL]]:
+        """
+        Iterate on the URL objects which may match an URL, in declaration
+        order.
+
+        :return: (attribute name, URL object) tuples
+        """
+        for name, url_obj, prefixes in self._entries(_url_origin(url)):
+            if any(url.startswith(prefix) for prefix in prefixes):
+                yield name, url_obj
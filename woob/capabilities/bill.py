@@ -295,6 +295,23 @@ def download_document(self, id):
         """
         raise NotImplementedError()
 
+    def download_document_stream(self, id):
+        """
+        Download a document by chunks, without loading it in memory.
+
+        Modules should override it, for example with
+        :meth:`woob.browser.browsers.Browser.iter_download`. The default
+        implementation yields the whole result of :meth:`download_document`,
+        which is then loaded in memory.
+
+        :param id: ID of document
+        :rtype: iter[bytes]
+        :raises: :class:`DocumentNotFound`
+        """
+        buf = self.download_document(id)
+        if buf:
+            yield buf
+
     def download_document_pdf(self, id):
         """
         Download a document, convert it to PDF if it isn't the document format.
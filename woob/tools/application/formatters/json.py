@@ -16,7 +16,7 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 
-from woob.tools.json import json, WoobEncoder
+from woob.tools.json import dumps
 
 from .iformatter import IFormatter
 
@@ -33,7 +33,7 @@ def __init__(self):
         self.queue = []
 
     def flush(self):
-        self.output(json.dumps(self.queue, cls=WoobEncoder))
+        self.output(dumps(self.queue))
 
     def format_dict(self, item):
         self.queue.append(item)
@@ -49,4 +49,4 @@ class JsonLineFormatter(IFormatter):
     """
 
     def format_dict(self, item):
-        self.output(json.dumps(item, cls=WoobEncoder))
+        self.output(dumps(item))
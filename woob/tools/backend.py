@@ -20,7 +20,7 @@
 import logging
 import importlib
 import os
-from copy import copy
+from copy import copy, deepcopy
 from threading import RLock
 import warnings
 from urllib.request import getproxies
@@ -381,7 +381,17 @@ def dump_state(self):
         Dump module state into storage.
         """
         if hasattr(self.browser, 'dump_state'):
-            self.storage.set('browser_state', self.browser.dump_state())
+            state = self.browser.dump_state()
+            if (
+                hasattr(self.browser, 'is_state_dirty')
+                and not self.browser.is_state_dirty(state, self.storage.get('browser_state', default=None))
+            ):
+                self.logger.debug('Browser state has not changed, not saving it')
+                return
+
+            # copied, so changes of the browser attributes are not seen in the
+            # stored state, to be detected the next time
+            self.storage.set('browser_state', deepcopy(state))
             self.storage.save()
 
     def deinit(self):
@@ -483,7 +493,7 @@ def create_browser(self, *args, **kwargs) -> Browser | None:
         browser = klass(*args, **kwargs)
 
         if should_load_state and hasattr(browser, 'load_state'):
-            browser.load_state(self.storage.get('browser_state', default={}))
+            browser.load_state(deepcopy(self.storage.get('browser_state', default={})))
 
         return browser
 
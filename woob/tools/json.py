@@ -18,8 +18,13 @@
 # because we don't want to import this file by "import json"
 from decimal import Decimal
 from datetime import datetime, date, time, timedelta
+from functools import lru_cache
+import os
 
-__all__ = ['json', 'mini_jsonpath']
+__all__ = [
+    'json', 'mini_jsonpath', 'compile_jsonpath',
+    'loads', 'dumps', 'JsonBackend', 'get_json_backend', 'set_json_backend',
+]
 
 try:
     # try simplejson first because it is faster
@@ -50,30 +55,62 @@ def mini_jsonpath(node, path):
     [13, 42, 128]
     """
 
-    def iterkeys(i):
-        return range(len(i)) if isinstance(i, list) else i
+    if isinstance(node, str):
+        node = loads(node)
 
-    def cut(s):
-        p = s.split('.', 1) if s else [None]
-        return p + [None] if len(p) == 1 else p
+    yield from compile_jsonpath(path)(node)
 
-    if isinstance(node, str):
-        node = json.loads(node)
-
-    queue = [(node, cut(path))]
-    while queue:
-        node, (name, rest) = queue.pop(0)
-        if name is None:
-            yield node
-            continue
-        elif name == '*':
-            keys = iterkeys(node)
-        elif type(node) not in (dict, list) or name not in node:
-            continue
+
+def _jsonpath_key(name, next_step):
+    def step(node):
+        if type(node) not in (dict, list) or name not in node:
+            return ()
+        return next_step(node[int(name) if type(node) is list else name])
+    return step
+
+
+def _jsonpath_wildcard(next_step):
+    def step(node):
+        keys = range(len(node)) if isinstance(node, list) else node
+        for key in keys:
+            yield from next_step(node[key])
+    return step
+
+
+@lru_cache(maxsize=1024)
+def compile_jsonpath(path):
+    """
+    Compile a path of :func:`mini_jsonpath`, once for each path.
+
+    :return: function taking the JSON data, and returning an iterable on the
+        values matched by the path
+    """
+    names = path.split('.') if path else []
+    if len(names) > 1 and not names[-1]:
+        # a final dot is ignored
+        names.pop()
+
+    if '*' not in names:
+        # at most one value, found without generators
+        def step(node):
+            for name in names:
+                if type(node) not in (dict, list) or name not in node:
+                    return ()
+                node = node[int(name) if type(node) is list else name]
+            return (node,)
+        return step
+
+    step = _jsonpath_single
+    for name in reversed(names):
+        if name == '*':
+            step = _jsonpath_wildcard(step)
         else:
-            keys = [int(name) if type(node) is list else name]
-        for k in keys:
-            queue.append((node[k], cut(rest)))
+            step = _jsonpath_key(name, step)
+    return step
+
+
+def _jsonpath_single(node):
+    return (node,)
 
 
 class WoobEncoder(json.JSONEncoder):
@@ -108,3 +145,159 @@ def default(self, o):
 
 
 WeboobEncoder = WoobEncoder
+
+
+class JsonBackend:
+    """
+    Library used to decode and encode JSON, by :func:`loads` and :func:`dumps`.
+
+    This one uses the :mod:`json` module (or :mod:`simplejson` if it is
+    installed). Other backends give the same data, but may format it
+    differently.
+    """
+
+    name = 'json'
+
+    def loads(self, data):
+        """
+        Decode a JSON document.
+
+        :param data: document, bytes are decoded as UTF-8
+        :type data: :class:`str` or :class:`bytes`
+        """
+        return json.loads(data)
+
+    def dumps(self, obj):
+        """
+        Encode an object, which can contain woob objects, in a JSON document.
+
+        :rtype: :class:`str`
+        """
+        return json.dumps(obj, cls=WoobEncoder)
+
+
+class OrjsonBackend(JsonBackend):
+    """
+    Backend using :mod:`orjson`, which is much faster, mostly on large
+    documents.
+
+    Documents are encoded without spaces, and non-ASCII characters are not
+    escaped. Documents it does not support, like ones with ``NaN``, or
+    objects with integers over 64 bits, are handled by :mod:`json`. However
+    integers over 64 bits are decoded as floats.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+        self.default = WoobEncoder().default
+
+    def loads(self, data):
+        try:
+            return self.orjson.loads(data)
+        except self.orjson.JSONDecodeError:
+            return super().loads(data)
+
+    def dumps(self, obj):
+        try:
+            return self.orjson.dumps(obj, default=self.default, option=self.orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except self.orjson.JSONEncodeError:
+            return super().dumps(obj)
+
+
+class UjsonBackend(JsonBackend):
+    """
+    Backend using :mod:`ujson`.
+
+    Documents are encoded without spaces, non-ASCII characters and slashes
+    are not escaped, and :class:`~decimal.Decimal` are encoded as numbers.
+    """
+
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+
+        self.ujson = ujson
+        self.default = WoobEncoder().default
+
+    def loads(self, data):
+        return self.ujson.loads(data)
+
+    def dumps(self, obj):
+        return self.ujson.dumps(obj, default=self.default, ensure_ascii=False, escape_forward_slashes=False)
+
+
+JSON_BACKENDS = {
+    'json': JsonBackend,
+    'orjson': OrjsonBackend,
+    'ujson': UjsonBackend,
+}
+"""
+Available backends, by name. ``json`` is used unless another one is chosen,
+as the other ones do not give exactly the same results.
+"""
+
+_backend = None
+
+
+def set_json_backend(name=None):
+    """
+    Choose the backend used by :func:`loads` and :func:`dumps`.
+
+    :param name: name of a backend of :data:`JSON_BACKENDS`, or None to use
+        the one given by the ``WOOB_JSON_BACKEND`` environment variable, or
+        ``json`` if it is not set
+    :raises ValueError: the backend is unknown
+    :raises ImportError: the library of the backend is not installed
+    :rtype: :class:`JsonBackend`
+    """
+    global _backend
+
+    if not name:
+        name = os.environ.get('WOOB_JSON_BACKEND') or 'json'
+        if name not in JSON_BACKENDS:
+            raise ValueError(
+                'Unknown JSON backend %r in WOOB_JSON_BACKEND, available backends are: %s'
+                % (name, ', '.join(JSON_BACKENDS))
+            )
+    elif name not in JSON_BACKENDS:
+        raise ValueError('Unknown JSON backend %r, available backends are: %s' % (name, ', '.join(JSON_BACKENDS)))
+
+    _backend = JSON_BACKENDS[name]()
+    return _backend
+
+
+def get_json_backend():
+    """
+    Get the backend used by :func:`loads` and :func:`dumps`.
+
+    :rtype: :class:`JsonBackend`
+    """
+    if _backend is None:
+        set_json_backend()
+    return _backend
+
+
+def loads(data):
+    """
+    Decode a JSON document with the current backend.
+
+    Decoding bytes directly avoids building an intermediate :class:`str`.
+
+    :param data: document, bytes are decoded as UTF-8
+    :type data: :class:`str` or :class:`bytes`
+    """
+    return get_json_backend().loads(data)
+
+
+def dumps(obj):
+    """
+    Encode an object, which can contain woob objects, with the current backend.
+
+    :rtype: :class:`str`
+    """
+    return get_json_backend().dumps(obj)
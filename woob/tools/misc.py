@@ -173,6 +173,8 @@ def ratelimit(group, delay):
 
     This function is not thread-safe. For reasonably non-critical rate
     limiting (like accessing a website), it should be sufficient nevertheless.
+    To limit the requests of a browser, prefer
+    :attr:`woob.browser.browsers.Browser.RATE_LIMITS`.
 
     @param group [string]  rate limiting group name, alphanumeric
     @param delay [int]  delay in seconds between each call
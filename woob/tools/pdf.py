@@ -17,6 +17,7 @@
 
 from io import BytesIO, StringIO
 from collections import namedtuple
+import hashlib
 import logging
 import os
 import subprocess
@@ -130,19 +131,26 @@ def angle(r):
     return ANGLE_OTHER
 
 
+_MISSING = object()
+
+
 class ApproxVecDict(dict):
     # since coords are never strictly equal, search coords around
     # store vectors and points
+    #
+    # keys are already buckets of a grid: a lookup is a fixed number of
+    # hash probes in the neighbourhood of coords, whatever the size of the
+    # dict, so they are done with get() rather than by catching KeyError.
 
     def __getitem__(self, coords):
         x, y = coords
+        get = super(ApproxVecDict, self).get
         for i in (0, -1, 1):
             for j in (0, -1, 1):
-                try:
-                    return super(ApproxVecDict, self).__getitem__((x+i, y+j))
-                except KeyError:
-                    pass
-        raise KeyError()
+                value = get((x+i, y+j), _MISSING)
+                if value is not _MISSING:
+                    return value
+        raise KeyError(coords)
 
     def get(self, k, v=None):
         try:
@@ -155,25 +163,26 @@ class ApproxRectDict(dict):
     # like ApproxVecDict, but store rects
     def __getitem__(self, coords):
         x0, y0, x1, y1 = coords
+        get = super(ApproxRectDict, self).get
+
+        if x0 == x1:
+            candidates = (
+                (x0+i, y0+j, x0+i, y1+j2)
+                for i in (0, -1, 1) for j in (0, -1, 1) for j2 in (0, -1, 1)
+            )
+        elif y0 == y1:
+            candidates = (
+                (x0+i, y0+j, x1+i2, y0+j)
+                for i in (0, -1, 1) for j in (0, -1, 1) for i2 in (0, -1, 1)
+            )
+        else:
+            return super(ApproxRectDict, self).__getitem__((x0, y0, x1, y1))
 
-        for i in (0, -1, 1):
-            for j in (0, -1, 1):
-                if x0 == x1:
-                    for j2 in (0, -1, 1):
-                        try:
-                            return super(ApproxRectDict, self).__getitem__((x0+i, y0+j, x0+i, y1+j2))
-                        except KeyError:
-                            pass
-                elif y0 == y1:
-                    for i2 in (0, -1, 1):
-                        try:
-                            return super(ApproxRectDict, self).__getitem__((x0+i, y0+j, x1+i2, y0+j))
-                        except KeyError:
-                            pass
-                else:
-                    return super(ApproxRectDict, self).__getitem__((x0, y0, x1, y1))
-
-        raise KeyError()
+        for key in candidates:
+            value = get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        raise KeyError(coords)
 
 
 def uniq_lines(lines):
@@ -268,11 +277,65 @@ def find_in_table(rows, rect):
                 return i, j
 
 
+class TableIndex:
+    """
+    Find the boxes of rows containing rects, like :func:`find_in_table`,
+    without looking at every row.
+
+    Rows are sorted by their top, so rows starting below a rect are not
+    looked at. The highest bottom of the rows before each one is also kept,
+    so rows ending above a rect are skipped with a binary search.
+
+    :param rows: rows of boxes, sorted by top, as given by :func:`build_rows`
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.tops = [row[0].y0 for row in rows]
+        self.bottoms = []
+        bottom = float('-inf')
+        for row in rows:
+            bottom = max(bottom, row[0].y1)
+            self.bottoms.append(bottom)
+
+    @staticmethod
+    def _first(values, pred):
+        # index of the first value for which pred is true, for a predicate
+        # which stays true once it is
+        lo, hi = 0, len(values)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if pred(values[mid]):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def find(self, rect):
+        """
+        Get the position of the box containing ``rect``, as ``(column, row)``,
+        or None.
+        """
+        # same comparisons as ApproxFloat in find_in_table
+        start = self._first(self.bottoms, lambda bottom: bottom - rect.y1 > -2)
+        end = self._first(self.tops, lambda top: top - rect.y1 >= 2)
+
+        for j in range(start, end):
+            row = self.rows[j]
+            if not (row[0].y0 - rect.y0 < 2 and row[0].y1 - rect.y1 > -2):
+                continue
+
+            for i, box in enumerate(row):
+                if box.x0 - rect.x0 < 2 and box.x1 - rect.x1 > -2:
+                    return i, j
+
+
 def arrange_texts_in_rows(rows, trects):
     table = [[[] for _ in row] for row in rows]
+    index = TableIndex(rows)
 
     for trect in trects:
-        pos = find_in_table(rows, trect)
+        pos = index.find(trect)
         if not pos:
             continue
         table[pos[1]][pos[0]].append(trect.text)
@@ -283,7 +346,7 @@ def arrange_texts_in_rows(rows, trects):
 DEBUGFILES = logging.DEBUG - 1
 
 
-def get_pdf_rows(data, miner_layout=True):
+def get_pdf_rows(data, miner_layout=True, workers=None, cache=None):
     """
     Takes PDF file content as string and yield table row data for each page.
 
@@ -297,8 +360,42 @@ def get_pdf_rows(data, miner_layout=True):
 
     External dependencies:
     PDFMiner (https://github.com/euske/pdfminer).
+
+    :param workers: if more than 1, number of processes parsing pages at
+        the same time, instead of parsing them one after the other
+    :param cache: mapping where rows of every page are stored, with a key
+        computed from the content, like a :class:`dict` or a
+        :class:`shelve.Shelf`, so each file is only parsed once. Rows are
+        only stored once every page has been read.
     """
 
+    if cache is not None:
+        key = '%s-%s' % (hashlib.sha256(data).hexdigest(), 'layout' if miner_layout else 'raw')
+        try:
+            pages = cache[key]
+        except KeyError:
+            pass
+        else:
+            yield from pages
+            return
+
+    pages = []
+    if workers and workers > 1:
+        rows = _get_pdf_rows_parallel(data, miner_layout, workers)
+    else:
+        rows = _get_pdf_rows(data, miner_layout)
+
+    for textrows in rows:
+        if cache is not None:
+            pages.append(textrows)
+        yield textrows
+
+    if cache is not None:
+        cache[key] = pages
+
+
+def _open_pdf(data):
+    # get the PDFPage objects, or None if the document is invalid
     try:
         from pdfminer.pdfparser import PDFParser, PDFSyntaxError
     except ImportError:
@@ -311,9 +408,6 @@ def get_pdf_rows(data, miner_layout=True):
     except ImportError:
         from pdfminer.pdfparser import PDFDocument
         newapi = False
-    from pdfminer.converter import PDFPageAggregator
-    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
-    from pdfminer.layout import LAParams, LTRect, LTTextBox, LTTextLine, LTLine, LTChar, LTCurve
 
     parser = PDFParser(BytesIO(data))
     try:
@@ -324,6 +418,23 @@ def get_pdf_rows(data, miner_layout=True):
             parser.set_document(doc)
             doc.set_parser(parser)
     except PDFSyntaxError:
+        return None
+
+    if newapi:
+        return PDFPage.get_pages(BytesIO(data), check_extractable=True)
+
+    doc.initialize()
+    return doc.get_pages()
+
+
+def _get_pdf_rows(data, miner_layout, pagenos=None):
+    # yield rows of pages, only those of pagenos if given
+    from pdfminer.converter import PDFPageAggregator
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.layout import LAParams
+
+    pages = _open_pdf(data)
+    if pages is None:
         return
 
     rsrcmgr = PDFResourceManager()
@@ -333,87 +444,123 @@ def get_pdf_rows(data, miner_layout=True):
         device = PDFPageAggregator(rsrcmgr)
 
     interpreter = PDFPageInterpreter(rsrcmgr, device)
-    if newapi:
-        pages = PDFPage.get_pages(BytesIO(data), check_extractable=True)
-    else:
-        doc.initialize()
-        pages = doc.get_pages()
 
+    path = None
     if LOGGER.isEnabledFor(DEBUGFILES):
         import tempfile
-        import PIL.Image as Image
-        import PIL.ImageDraw as ImageDraw
-        import random
 
         path = tempfile.mkdtemp(prefix='pdf')
 
     for npage, page in enumerate(pages):
+        if pagenos is not None:
+            if npage > pagenos[-1]:
+                break
+            if npage not in pagenos:
+                continue
+
         LOGGER.debug('processing page %s', npage)
         interpreter.process_page(page)
-        page_layout = device.get_result()
-
-        texts = sum([list(lttext_to_multilines(obj, page_layout)) for obj in page_layout._objs if isinstance(obj, (LTTextBox, LTTextLine, LTChar))], [])
-        LOGGER.debug('found %d text objects', len(texts))
-        if LOGGER.isEnabledFor(DEBUGFILES):
-            img = Image.new('RGB', (int(page.mediabox[2]), int(page.mediabox[3])), (255, 255, 255))
-            draw = ImageDraw.Draw(img)
-            for t in texts:
+        yield _get_page_rows(page, device.get_result(), npage, miner_layout, path)
+    device.close()
+
+
+def _get_pages_rows(data, miner_layout, pagenos):
+    # run in worker processes
+    return list(_get_pdf_rows(data, miner_layout, pagenos))
+
+
+def _get_pdf_rows_parallel(data, miner_layout, workers):
+    from concurrent.futures import ProcessPoolExecutor
+
+    pages = _open_pdf(data)
+    if pages is None:
+        return
+    count = sum(1 for _ in pages)
+
+    # a few pages per task, as each worker parses the document structure
+    size = max(1, -(-count // (workers * 4)))
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(_get_pages_rows, data, miner_layout, range(start, min(start + size, count)))
+            for start in range(0, count, size)
+        ]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def _get_page_rows(page, page_layout, npage, miner_layout, path):
+    from pdfminer.layout import LTRect, LTTextBox, LTTextLine, LTLine, LTChar, LTCurve
+
+    if path is not None:
+        import PIL.Image as Image
+        import PIL.ImageDraw as ImageDraw
+        import random
+
+    texts = sum([list(lttext_to_multilines(obj, page_layout)) for obj in page_layout._objs if isinstance(obj, (LTTextBox, LTTextLine, LTChar))], [])
+    LOGGER.debug('found %d text objects', len(texts))
+    if path is not None:
+        img = Image.new('RGB', (int(page.mediabox[2]), int(page.mediabox[3])), (255, 255, 255))
+        draw = ImageDraw.Draw(img)
+        for t in texts:
+            color = (random.randint(127, 255), random.randint(127, 255), random.randint(127, 255))
+            draw.rectangle((t.x0, t.y0, t.x1, t.y1), outline=color)
+            draw.text((t.x0, t.y0), t.text.encode('utf-8'), color)
+        fpath = '%s/1text-%03d.png' % (path, npage)
+        img.save(fpath)
+        LOGGER.log(DEBUGFILES, 'saved %r', fpath)
+
+    if not miner_layout:
+        texts.sort(key=lambda t: (t.y0, t.x0))
+
+    # TODO filter ltcurves that are not lines?
+    # TODO convert rects to 4 lines?
+    lines = [lt_to_coords(obj, page_layout) for obj in page_layout._objs if isinstance(obj, (LTRect, LTLine, LTCurve))]
+    LOGGER.debug('found %d lines', len(lines))
+    if path is not None:
+        img = Image.new('RGB', (int(page.mediabox[2]), int(page.mediabox[3])), (255, 255, 255))
+        draw = ImageDraw.Draw(img)
+        for l in lines:
+            color = (random.randint(127, 255), random.randint(127, 255), random.randint(127, 255))
+            draw.rectangle((l.x0, l.y0, l.x1, l.y1), outline=color)
+        fpath = '%s/2lines-%03d.png' % (path, npage)
+        img.save(fpath)
+        LOGGER.log(DEBUGFILES, 'saved %r', fpath)
+
+    lines = list(uniq_lines(lines))
+    LOGGER.debug('found %d unique lines', len(lines))
+
+    rows = build_rows(lines)
+    LOGGER.debug('built %d rows (%d boxes)', len(rows), sum(len(row) for row in rows))
+    if path is not None:
+        img = Image.new('RGB', (int(page.mediabox[2]), int(page.mediabox[3])), (255, 255, 255))
+        draw = ImageDraw.Draw(img)
+        for r in rows:
+            for b in r:
                 color = (random.randint(127, 255), random.randint(127, 255), random.randint(127, 255))
-                draw.rectangle((t.x0, t.y0, t.x1, t.y1), outline=color)
-                draw.text((t.x0, t.y0), t.text.encode('utf-8'), color)
-            fpath = '%s/1text-%03d.png' % (path, npage)
-            img.save(fpath)
-            LOGGER.log(DEBUGFILES, 'saved %r', fpath)
-
-        if not miner_layout:
-            texts.sort(key=lambda t: (t.y0, t.x0))
-
-        # TODO filter ltcurves that are not lines?
-        # TODO convert rects to 4 lines?
-        lines = [lt_to_coords(obj, page_layout) for obj in page_layout._objs if isinstance(obj, (LTRect, LTLine, LTCurve))]
-        LOGGER.debug('found %d lines', len(lines))
-        if LOGGER.isEnabledFor(DEBUGFILES):
-            img = Image.new('RGB', (int(page.mediabox[2]), int(page.mediabox[3])), (255, 255, 255))
-            draw = ImageDraw.Draw(img)
-            for l in lines:
+                draw.rectangle((b.x0 + 1, b.y0 + 1, b.x1 - 1, b.y1 - 1), outline=color)
+        fpath = '%s/3rows-%03d.png' % (path, npage)
+        img.save(fpath)
+        LOGGER.log(DEBUGFILES, 'saved %r', fpath)
+
+    textrows = arrange_texts_in_rows(rows, texts)
+    LOGGER.debug('assigned %d strings', sum(sum(len(c) for c in r) for r in textrows))
+    if path is not None:
+        img = Image.new('RGB', (int(page.mediabox[2]), int(page.mediabox[3])), (255, 255, 255))
+        draw = ImageDraw.Draw(img)
+        for row, trow in zip(rows, textrows):
+            for b, tlines in zip(row, trow):
                 color = (random.randint(127, 255), random.randint(127, 255), random.randint(127, 255))
-                draw.rectangle((l.x0, l.y0, l.x1, l.y1), outline=color)
-            fpath = '%s/2lines-%03d.png' % (path, npage)
-            img.save(fpath)
-            LOGGER.log(DEBUGFILES, 'saved %r', fpath)
-
-        lines = list(uniq_lines(lines))
-        LOGGER.debug('found %d unique lines', len(lines))
-
-        rows = build_rows(lines)
-        LOGGER.debug('built %d rows (%d boxes)', len(rows), sum(len(row) for row in rows))
-        if LOGGER.isEnabledFor(DEBUGFILES):
-            img = Image.new('RGB', (int(page.mediabox[2]), int(page.mediabox[3])), (255, 255, 255))
-            draw = ImageDraw.Draw(img)
-            for r in rows:
-                for b in r:
-                    color = (random.randint(127, 255), random.randint(127, 255), random.randint(127, 255))
-                    draw.rectangle((b.x0 + 1, b.y0 + 1, b.x1 - 1, b.y1 - 1), outline=color)
-            fpath = '%s/3rows-%03d.png' % (path, npage)
-            img.save(fpath)
-            LOGGER.log(DEBUGFILES, 'saved %r', fpath)
-
-        textrows = arrange_texts_in_rows(rows, texts)
-        LOGGER.debug('assigned %d strings', sum(sum(len(c) for c in r) for r in textrows))
-        if LOGGER.isEnabledFor(DEBUGFILES):
-            img = Image.new('RGB', (int(page.mediabox[2]), int(page.mediabox[3])), (255, 255, 255))
-            draw = ImageDraw.Draw(img)
-            for row, trow in zip(rows, textrows):
-                for b, tlines in zip(row, trow):
-                    color = (random.randint(127, 255), random.randint(127, 255), random.randint(127, 255))
-                    draw.rectangle((b.x0 + 1, b.y0 + 1, b.x1 - 1, b.y1 - 1), outline=color)
-                    draw.text((b.x0 + 1, b.y0 + 1), '\n'.join(tlines).encode('utf-8'), color)
-            fpath = '%s/4cells-%03d.png' % (path, npage)
-            img.save(fpath)
-            LOGGER.log(DEBUGFILES, 'saved %r', fpath)
+                draw.rectangle((b.x0 + 1, b.y0 + 1, b.x1 - 1, b.y1 - 1), outline=color)
+                draw.text((b.x0 + 1, b.y0 + 1), '\n'.join(tlines).encode('utf-8'), color)
+        fpath = '%s/4cells-%03d.png' % (path, npage)
+        img.save(fpath)
+        LOGGER.log(DEBUGFILES, 'saved %r', fpath)
 
-        yield textrows
-    device.close()
+    return textrows
 
 # Export part #
 